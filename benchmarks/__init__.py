@@ -0,0 +1,6 @@
+"""
+Performance benchmarks for the fetch, parse, indicator and export stages.
+
+Run with ``python -m benchmarks`` (``--help`` for options). Network stages
+talk to a local replay server, so results do not depend on Alpaca.
+"""
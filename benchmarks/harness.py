@@ -0,0 +1,161 @@
+import gc
+import json
+import multiprocessing
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+# A case's setup returns the function to time and the number of bars one
+# call processes
+Setup = Callable[..., Tuple[Callable[[], Any], int]]
+
+# Peak RSS moves by a few MB between identical runs (allocator arenas,
+# import order); growth below this is not reported as a regression
+MEMORY_SLACK_MB = 16.0
+
+
+class Result:
+    """Timings of one benchmark case."""
+
+    __slots__ = ("name", "bars", "latencies", "peak_rss", "stage_rss")
+
+    def __init__(
+        self,
+        name: str,
+        bars: int,
+        latencies: List[float],
+        peak_rss: int,
+        stage_rss: int,
+    ):
+        """
+        Args:
+            name: Case name, e.g. 'indicators/rows=100000/n=5'.
+            bars: Bars processed per call.
+            latencies: Seconds per timed call.
+            peak_rss: Peak resident set size of the process, in bytes.
+            stage_rss: Growth of the peak RSS while the stage ran (on top of
+                       the inputs built during setup), in bytes.
+        """
+        self.name = name
+        self.bars = bars
+        self.latencies = latencies
+        self.peak_rss = peak_rss
+        self.stage_rss = stage_rss
+
+    def percentile(self, q: float) -> float:
+        """Latency percentile in seconds (``q`` in 0-100)."""
+        return float(np.percentile(self.latencies, q))
+
+    @property
+    def bars_per_second(self) -> float:
+        """Throughput at the median latency."""
+        median = self.percentile(50)
+        return self.bars / median if median > 0 else float("inf")
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "bars": self.bars,
+            "bars_per_s": self.bars_per_second,
+            "p50_ms": self.percentile(50) * 1000,
+            "p90_ms": self.percentile(90) * 1000,
+            "p99_ms": self.percentile(99) * 1000,
+            "peak_rss_mb": self.peak_rss / 2**20,
+            "stage_rss_mb": self.stage_rss / 2**20,
+        }
+
+
+def run_case(
+    name: str, setup: Setup, kwargs: Dict[str, Any], repeat: int = 5, warmup: int = 1
+) -> Result:
+    """
+    Runs one case in a fresh interpreter, so the peak RSS belongs to that
+    stage alone and earlier cases leave no caches or fragmentation behind.
+
+    Args:
+        name: Case name for the report.
+        setup: Module-level function (picklable) building the inputs and
+               returning ``(run, bars)``.
+        kwargs: Arguments for ``setup``.
+        repeat: Timed calls.
+        warmup: Untimed calls before the timed ones.
+    """
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        bars, latencies, peak_rss, stage_rss = pool.submit(
+            _measure, setup, kwargs, repeat, warmup
+        ).result()
+    return Result(name, bars, latencies, peak_rss, stage_rss)
+
+
+def compare(
+    results: List[Result], baseline: Dict[str, Dict[str, float]], tolerance: float
+) -> List[str]:
+    """
+    Lists regressions against a stored baseline: throughput more than
+    ``tolerance`` (a fraction) below it, or stage memory more than
+    ``tolerance`` (plus ``MEMORY_SLACK_MB``) above it. Cases missing from
+    the baseline are skipped.
+    """
+    regressions = []
+    for result in results:
+        reference = baseline.get(result.name)
+        if reference is None:
+            continue
+        current = result.to_dict()
+        if current["bars_per_s"] < reference["bars_per_s"] * (1 - tolerance):
+            regressions.append(
+                f"{result.name}: {current['bars_per_s']:,.0f} bars/s vs "
+                f"{reference['bars_per_s']:,.0f} in the baseline"
+            )
+        limit = reference["stage_rss_mb"] * (1 + tolerance) + MEMORY_SLACK_MB
+        if current["stage_rss_mb"] > limit:
+            regressions.append(
+                f"{result.name}: {current['stage_rss_mb']:.1f} MB stage RSS vs "
+                f"{reference['stage_rss_mb']:.1f} MB in the baseline"
+            )
+    return regressions
+
+
+def load_baseline(path: Path) -> Dict[str, Dict[str, float]]:
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+def save_results(results: List[Result], path: Path) -> None:
+    """Writes the results as JSON (usable as a baseline later)."""
+    payload = {
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "results": {r.name: r.to_dict() for r in results},
+    }
+    with open(path, "w") as f:
+        json.dump(payload, f, indent=2)
+
+
+def _measure(
+    setup: Setup, kwargs: Dict[str, Any], repeat: int, warmup: int
+) -> Tuple[int, List[float], int, int]:
+    run, bars = setup(**kwargs)
+    gc.collect()
+    before = _max_rss()
+    for _ in range(warmup):
+        run()
+
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        latencies.append(time.perf_counter() - started)
+    peak = _max_rss()
+    return bars, latencies, peak, peak - before
+
+
+def _max_rss() -> int:
+    """Peak RSS of this process in bytes (ru_maxrss is KiB on Linux)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
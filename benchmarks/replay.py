@@ -0,0 +1,132 @@
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+
+def synthetic_bars(
+    count: int, start: str = "2024-01-02T14:30:00Z", seed: int = 0
+) -> List[Dict[str, Any]]:
+    """
+    ``count`` consecutive minute bars in the REST API's format (t, o, h, l,
+    c, v, n, vw), as a seeded random walk so every run sees the same data.
+    """
+    rng = np.random.default_rng(seed)
+    close = 100.0 + np.cumsum(rng.normal(0.0, 0.05, count))
+    spread = rng.uniform(0.01, 0.1, count)
+    volume = rng.integers(100, 10_000, count)
+    stamps = pd.date_range(start, periods=count, freq="min").strftime(
+        "%Y-%m-%dT%H:%M:%SZ"
+    )
+    return [
+        {
+            "t": stamps[i],
+            "o": round(close[i] - spread[i] / 2, 4),
+            "h": round(close[i] + spread[i], 4),
+            "l": round(close[i] - spread[i], 4),
+            "c": round(close[i], 4),
+            "v": int(volume[i]),
+            "n": int(volume[i] // 50),
+            "vw": round(close[i], 4),
+        }
+        for i in range(count)
+    ]
+
+
+def encode_pages(
+    symbols: List[str], bars_per_symbol: int, page_size: int = 10_000
+) -> List[bytes]:
+    """
+    Paginated response bodies for ``synthetic_bars`` of every symbol, encoded
+    compactly like the API does, with ``next_page_token`` 'page-N' linking
+    page N-1 to page N.
+    """
+    bars = synthetic_bars(bars_per_symbol)
+    rows = [(symbol, bar) for symbol in symbols for bar in bars]
+    bodies = []
+    chunks = range(0, len(rows), page_size)
+    for number, offset in enumerate(chunks, start=1):
+        page: Dict[str, List[dict]] = {}
+        for symbol, bar in rows[offset : offset + page_size]:
+            page.setdefault(symbol, []).append(bar)
+        token = f"page-{number}" if number < len(chunks) else None
+        payload = {"bars": page, "next_page_token": token}
+        bodies.append(json.dumps(payload, separators=(",", ":")).encode())
+    return bodies
+
+
+class ReplayServer:
+    """
+    Local stand-in for the ``/v2/stocks/bars`` endpoint.
+
+    Serves the same pre-encoded pages (plain or gzip, as the client asks)
+    for every request chain, following ``page_token`` like the real API, so
+    fetch benchmarks measure the client rather than the network or Alpaca.
+    Query parameters other than ``page_token`` are ignored.
+    """
+
+    def __init__(
+        self,
+        symbols: List[str],
+        bars_per_symbol: int,
+        page_size: int = 10_000,
+    ):
+        """
+        Args:
+            symbols: Symbols in the payload, paged through in order.
+            bars_per_symbol: Minute bars generated per symbol.
+            page_size: Bars per page (across symbols), like ``limit``.
+        """
+        self.total_bars = len(symbols) * bars_per_symbol
+        self.requests = 0
+        self._pages = [
+            {"identity": body, "gzip": gzip.compress(body, 1)}
+            for body in encode_pages(symbols, bars_per_symbol, page_size)
+        ]
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Starts serving on a background thread; returns the bars URL."""
+        replay = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                token = query.get("page_token", ["page-0"])[0]
+                replay.requests += 1
+                encoding = (
+                    "gzip"
+                    if "gzip" in self.headers.get("Accept-Encoding", "")
+                    else "identity"
+                )
+                body = replay._pages[int(token.rsplit("-", 1)[1])][encoding]
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                if encoding == "gzip":
+                    self.send_header("Content-Encoding", "gzip")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        bound_port = self._server.server_address[1]
+        return f"http://{host}:{bound_port}/v2/stocks/bars"
+
+    def close(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
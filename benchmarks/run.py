@@ -0,0 +1,202 @@
+import argparse
+import os
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+from rich.console import Console
+from rich.table import Table
+
+from benchmarks import harness, stages
+from benchmarks.replay import ReplayServer
+from market_data.decoders import DECODERS, get_decoder
+
+STAGES = ["fetch", "decode", "parse", "indicators", "panel", "export", "pipeline"]
+
+# Case sizes: (full run, --quick run)
+FETCH_BARS = (200_000, 20_000)
+DECODE_BARS = (200_000, 20_000)
+PARSE_BARS = (200_000, 20_000)
+INDICATOR_ROWS = ([10_000, 100_000, 1_000_000], [10_000, 100_000])
+INDICATOR_COUNTS = [1, 5, 10]
+PANEL_SYMBOLS = (5_000, 500)
+PANEL_ROWS = [60, 1_000]
+EXPORT_ROWS = (500_000, 50_000)
+PIPELINE_BARS = (100_000, 10_000)
+PAGE_SIZE = 10_000
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        description="Benchmarks the fetch, parse, indicator and export stages"
+    )
+    parser.add_argument(
+        "--stages",
+        type=str,
+        default=",".join(STAGES),
+        help=f"Comma-separated stages to run ({', '.join(STAGES)})",
+    )
+    parser.add_argument(
+        "--quick", action="store_true", help="Smaller inputs (for CI smoke runs)"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case")
+    parser.add_argument(
+        "--output", type=Path, default=None, help="Write the results as JSON"
+    )
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        default=None,
+        help="Compare against results saved with --output; exit 1 on regression",
+    )
+    parser.add_argument(
+        "--pages",
+        type=Path,
+        default=None,
+        help=(
+            "Directory of recorded bar pages (raw *.json response bodies) for "
+            "the decode stage; synthetic pages by default"
+        ),
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Allowed slowdown/memory growth vs the baseline (fraction)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    console = Console()
+    selected = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = set(selected) - set(STAGES)
+    if unknown:
+        console.print(f"[red]Unknown stage(s): {', '.join(sorted(unknown))}[/red]")
+        return 2
+
+    # Inherited by the spawned case processes: no progress bars in the
+    # timings, and the client needs (any) credentials to start
+    os.environ["TQDM_DISABLE"] = "1"
+    os.environ.setdefault("APCA_API_KEY_ID", "BENCHMARK")
+    os.environ.setdefault("APCA_API_SECRET_KEY", "BENCHMARK")
+
+    size = 1 if args.quick else 0
+    results = []
+    for stage in selected:
+        for name, setup, kwargs, server in _cases(stage, size, args.pages):
+            console.print(f"Running {name}...")
+            try:
+                results.append(harness.run_case(name, setup, kwargs, args.repeat))
+            finally:
+                if server is not None:
+                    server.close()
+
+    console.print(_table(results))
+    if args.output:
+        harness.save_results(results, args.output)
+        console.print(f"Results written to {args.output}")
+
+    if args.baseline:
+        regressions = harness.compare(
+            results, harness.load_baseline(args.baseline), args.tolerance
+        )
+        for regression in regressions:
+            console.print(f"[red]Regression: {regression}[/red]")
+        if regressions:
+            return 1
+        console.print(f"[green]No regressions against {args.baseline}[/green]")
+    return 0
+
+
+def _cases(stage: str, size: int, pages: Optional[Path] = None):
+    """Yields (name, setup, kwargs, replay server or None) for one stage."""
+    if stage == "fetch":
+        server = ReplayServer(["BENCH"], FETCH_BARS[size], PAGE_SIZE)
+        url = server.start()
+        kwargs = dict(url=url, bars=server.total_bars, page_size=PAGE_SIZE)
+        yield f"fetch/bars={server.total_bars}", stages.fetch, kwargs, server
+    elif stage == "decode":
+        bars = DECODE_BARS[size]
+        source = "recorded" if pages else f"bars={bars}"
+        for decoder in _installed_decoders():
+            for columnar in [False, True]:
+                step = "decode_bars" if columnar else "loads"
+                kwargs = dict(
+                    decoder=decoder,
+                    columnar=columnar,
+                    pages=str(pages) if pages else None,
+                    bars=bars,
+                )
+                name = f"decode/{decoder}/{step}/{source}"
+                yield name, stages.decode, kwargs, None
+    elif stage == "parse":
+        bars = PARSE_BARS[size]
+        yield f"parse/bars={bars}", stages.parse, dict(bars=bars), None
+    elif stage == "indicators":
+        for rows in INDICATOR_ROWS[size]:
+            for count in INDICATOR_COUNTS:
+                name = f"indicators/rows={rows}/n={count}"
+                yield name, stages.indicators, dict(rows=rows, count=count), None
+    elif stage == "panel":
+        symbols = PANEL_SYMBOLS[size]
+        for rows in PANEL_ROWS:
+            for vectorized in [False, True]:
+                mode = "panel" if vectorized else "per-symbol"
+                kwargs = dict(symbols=symbols, rows=rows, vectorized=vectorized)
+                name = f"panel/{mode}/symbols={symbols}/rows={rows}"
+                yield name, stages.panel, kwargs, None
+    elif stage == "export":
+        rows = EXPORT_ROWS[size]
+        for output_format in ["csv", "parquet", "feather"]:
+            if output_format != "csv" and not _has_pyarrow():
+                continue
+            kwargs = dict(rows=rows, output_format=output_format)
+            yield f"export/{output_format}/rows={rows}", stages.export, kwargs, None
+    elif stage == "pipeline":
+        server = ReplayServer(["BENCH"], PIPELINE_BARS[size], PAGE_SIZE)
+        url = server.start()
+        kwargs = dict(url=url, bars=server.total_bars, specs=stages.INDICATORS[:5])
+        yield f"pipeline/bars={server.total_bars}", stages.pipeline, kwargs, server
+
+
+def _table(results: List[harness.Result]) -> Table:
+    table = Table(title="Benchmarks")
+    table.add_column("case", no_wrap=True)
+    for column in ["bars/s", "p50 ms", "p90 ms", "p99 ms", "peak RSS MB"]:
+        table.add_column(column, justify="right")
+    for result in results:
+        row = result.to_dict()
+        table.add_row(
+            result.name,
+            f"{row['bars_per_s']:,.0f}",
+            f"{row['p50_ms']:.1f}",
+            f"{row['p90_ms']:.1f}",
+            f"{row['p99_ms']:.1f}",
+            f"{row['peak_rss_mb']:.0f} (+{row['stage_rss_mb']:.0f})",
+        )
+    return table
+
+
+def _installed_decoders() -> List[str]:
+    installed = []
+    for name in DECODERS:
+        try:
+            get_decoder(name)
+        except ImportError:
+            continue
+        installed.append(name)
+    return installed
+
+
+def _has_pyarrow() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+import logging
+import tempfile
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+from rich.console import Console
+
+from benchmarks.replay import encode_pages, synthetic_bars
+from market_data.buffers import BarBuffer
+from market_data.client import AlpacaClient
+from market_data.decoders import get_decoder
+from market_data.exporters import get_exporter
+from market_data.indicators import IndicatorCalculator
+from market_data.panel import Panel
+from market_data.pipeline import StockDataPipeline
+from market_data.ratelimit import TokenBucket
+
+# Every function here is a benchmark setup: it builds the inputs and returns
+# ``(run, bars)``, where ``run`` is the call being timed. Info logs (fetch
+# progress, indicator discovery) stay out of the report.
+logging.getLogger("rich").setLevel(logging.WARNING)
+
+# Indicator mix for the indicator stage, cheapest first; a case with n
+# indicators uses the first n
+INDICATORS = [
+    "SMA_20",
+    "EMA_20",
+    "RSI_14",
+    "MACD(12,26,9)",
+    "BBANDS(20,2,2)",
+    "ATR_14",
+    "MAX_50",
+    "MIN_50",
+    "OBV",
+    "STOCH",
+]
+
+
+def fetch(url: str, bars: int, page_size: int):
+    """``AlpacaClient.get_stock_bars`` over every page of the replay server."""
+    client = _client(url)
+
+    def run():
+        client.get_stock_bars(["BENCH"], "1Min", limit=page_size, start="2024-01-02")
+
+    return run, bars
+
+
+def decode(decoder: str, columnar: bool, pages: Optional[str], bars: int):
+    """
+    Decoding response bodies with one JSON backend: ``loads`` alone, or
+    ``decode_bars`` into per-symbol column buffers (``columnar``).
+
+    Args:
+        decoder: Decoder name ('json', 'orjson').
+        columnar: Time ``decode_bars`` instead of ``loads``.
+        pages: Directory of recorded pages (raw ``*.json`` response bodies);
+               synthetic pages of ``bars`` bars when None.
+        bars: Synthetic bars, split into 10,000-bar pages.
+    """
+    if pages:
+        bodies = [path.read_bytes() for path in sorted(Path(pages).glob("*.json"))]
+    else:
+        bodies = encode_pages(["BENCH"], bars)
+    json_decoder = get_decoder(decoder)
+    count = sum(
+        len(buffer)
+        for body in bodies
+        for buffer in json_decoder.decode_bars(body)[0].values()
+    )
+    step = json_decoder.decode_bars if columnar else json_decoder.loads
+
+    def run():
+        for body in bodies:
+            step(body)
+
+    return run, count
+
+
+def parse(bars: int):
+    """Building the columnar buffer and DataFrame from decoded bar dicts."""
+    payload = synthetic_bars(bars)
+
+    def run():
+        BarBuffer.from_bars(payload).to_frame()
+
+    return run, bars
+
+
+def indicators(rows: int, count: int):
+    """``IndicatorCalculator.add_indicators`` on an in-memory frame."""
+    frame = _frame(rows)
+    calculator = IndicatorCalculator()
+    specs = INDICATORS[:count]
+
+    def run():
+        calculator.add_indicators(frame, specs)
+
+    return run, rows
+
+
+def panel(symbols: int, rows: int, vectorized: bool):
+    """
+    Five indicators over a universe of daily series: ``Panel.add_indicators``
+    on the (symbols x time) block, or ``add_indicators`` once per symbol
+    frame.
+    """
+    frame = _frame(rows)
+    frames = {f"S{i:05d}": frame for i in range(symbols)}
+    calculator = IndicatorCalculator()
+    specs = INDICATORS[:5]
+    universe = Panel.from_frames(frames)
+
+    def run():
+        if vectorized:
+            universe.add_indicators(specs, calculator)
+        else:
+            for data in frames.values():
+                calculator.add_indicators(data, specs)
+
+    return run, symbols * rows
+
+
+def export(rows: int, output_format: str):
+    """Writing a frame with five indicator columns in one output format."""
+    frame = IndicatorCalculator().add_indicators(_frame(rows), INDICATORS[:5])
+    exporter = get_exporter(output_format)
+    directory = tempfile.mkdtemp(prefix="bench-export-")
+    path = Path(directory) / f"bars{exporter.extension}"
+
+    def run():
+        exporter.write(frame, path)
+
+    return run, rows
+
+
+def pipeline(url: str, bars: int, specs: List[str]):
+    """``StockDataPipeline.process_ticker`` end to end against the replay."""
+    directory = tempfile.mkdtemp(prefix="bench-pipeline-")
+    data_pipeline = StockDataPipeline(output_dir=directory, client=_client(url))
+
+    def run():
+        data_pipeline.process_ticker(
+            "BENCH", "1Min", start_date="2024-01-02", indicators=specs
+        )
+
+    return run, bars
+
+
+def _client(url: str) -> AlpacaClient:
+    client = AlpacaClient(rate_limiter=TokenBucket(rate_per_minute=1e9))
+    client.BASE_URL = url
+    client.console = Console(quiet=True)
+    return client
+
+
+def _frame(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    close = 100.0 + np.cumsum(rng.normal(0.0, 0.05, rows))
+    spread = rng.uniform(0.01, 0.1, rows)
+    return pd.DataFrame(
+        {
+            "date": pd.date_range(
+                "2024-01-02 14:30", periods=rows, freq="min", tz="UTC"
+            ),
+            "open": close - spread / 2,
+            "high": close + spread,
+            "low": close - spread,
+            "close": close,
+            "volume": rng.integers(100, 10_000, rows),
+        }
+    )
@@ -1,9 +1,27 @@
 import argparse
+import asyncio
+import math
 
 from dotenv import load_dotenv
 from rich.console import Console
+from rich.table import Table
 
+from market_data.cache import BarCache
+from market_data.client import AlpacaClient
+from market_data.exporters import EXPORTERS
+from market_data.indicators import split_indicators
+from market_data.jobs import JobManifest, JobRunner
+from market_data.live import LiveIngestor
+from market_data.metrics import JsonLinesSink, Metrics, PrometheusTextSink
 from market_data.pipeline import StockDataPipeline
+from market_data.ratelimit import SharedTokenBucket, TokenBucket
+from market_data.store import BarStore
+
+# Tickers per request chain when --batch-size is not given
+DEFAULT_BATCH_SIZE = 100
+
+# Shards of one ticker in flight with --shard-by when --concurrency is not given
+DEFAULT_SHARD_CONCURRENCY = 8
 
 
 def parse_args():
@@ -24,18 +42,322 @@ def parse_args():
         "--timeframe",
         type=str,
         default="1Day",
-        help="Timeframe (1Day, 1Hour, 1Min, etc.)",
+        help=(
+            "Timeframe (1Day, 1Hour, 1Min, etc.); several comma-separated "
+            "timeframes with --resample-from"
+        ),
+    )
+    parser.add_argument(
+        "--resample-from",
+        type=str,
+        default=None,
+        help=(
+            "Download this intraday timeframe once (e.g. 1Min) and derive every "
+            "--timeframe from it locally"
+        ),
     )
     parser.add_argument(
         "--indicators",
         type=str,
         default="",
-        help="Comma-separated list of indicators (e.g. SMA_50,RSI_14)",
+        help=(
+            "Comma-separated list of indicators "
+            "(e.g. SMA_50,RSI_14,'MACD(fast=12,slow=26,signal=9)')"
+        ),
     )
     parser.add_argument(
-        "--output-dir", type=str, default="data", help="Directory to save CSV files"
+        "--output-dir", type=str, default="data", help="Directory to save output files"
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--format",
+        type=str,
+        default="csv",
+        choices=sorted(EXPORTERS),
+        help="Output file format",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=None,
+        help=(
+            "Number of tickers fetched per request chain (1 = one per ticker; "
+            "default: 100, or split evenly across --concurrency chains)"
+        ),
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=None,
+        help=(
+            "Maximum number of requests in flight (default: 1, sequential; "
+            f"{DEFAULT_SHARD_CONCURRENCY} shards at a time with --shard-by)"
+        ),
+    )
+    parser.add_argument(
+        "--shard-by",
+        type=str,
+        default=None,
+        choices=["week", "month", "quarter", "year"],
+        help=(
+            "Fetch each ticker as date-range shards of this size, up to "
+            "--concurrency at a time (deep single-symbol backfills; not with "
+            "--stream)"
+        ),
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=200,
+        help="Maximum API requests per minute across all workers",
+    )
+    parser.add_argument(
+        "--rate-limit-state",
+        type=str,
+        default=None,
+        help="State file to share the rate limit with other processes",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=None,
+        help="Local bar cache directory; only missing ranges are downloaded",
+    )
+    parser.add_argument(
+        "--json-decoder",
+        type=str,
+        default="auto",
+        choices=["auto", "json", "orjson"],
+        help="JSON backend for API responses (auto: orjson when installed)",
+    )
+    parser.add_argument(
+        "--store-dir",
+        type=str,
+        default=None,
+        help=(
+            "Also keep every export in a memory-mapped bar store here, for "
+            "fast time-slice loading (market_data.store.BarStore)"
+        ),
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream pages straight to the output file (bounded memory)",
+    )
+    parser.add_argument(
+        "--append",
+        action="store_true",
+        help=(
+            "Only fetch bars after the last row of existing output files and "
+            "append them (tickers are processed one by one)"
+        ),
+    )
+    parser.add_argument(
+        "--job",
+        type=str,
+        default=None,
+        help=(
+            "Job manifest file: records finished tickers, page tokens and "
+            "files, and resumes the run if it already exists. Honours "
+            "--batch-size and --concurrency; downloads resume from their "
+            "last page with --batch-size 1 or --append"
+        ),
+    )
+    parser.add_argument(
+        "--retry-failed",
+        action="store_true",
+        help="With --job, only rerun the tickers that failed",
+    )
+    parser.add_argument(
+        "--live",
+        action="store_true",
+        help=(
+            "Subscribe to real-time bars for the tickers and append them to "
+            "<TICKER>_bars_live files until interrupted"
+        ),
+    )
+    parser.add_argument(
+        "--live-url",
+        type=str,
+        default=None,
+        help="Websocket URL for --live (defaults to Alpaca's stream for the feed)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes computing indicators for batched runs (1 = in-process)",
+    )
+    parser.add_argument(
+        "--metrics",
+        action="store_true",
+        help="Record per-stage timings and request metrics and print a summary",
+    )
+    parser.add_argument(
+        "--metrics-jsonl",
+        type=str,
+        default=None,
+        help="Append the metrics to this JSON lines file (implies --metrics)",
+    )
+    parser.add_argument(
+        "--metrics-prom",
+        type=str,
+        default=None,
+        help="Write the metrics in Prometheus text format (implies --metrics)",
+    )
+    args = parser.parse_args()
+    if args.shard_by and args.stream:
+        # Streaming follows one pagination chain from the first page
+        parser.error("--shard-by cannot be combined with --stream")
+    if args.append and args.stream:
+        # Appends write only the rows after the file's tail, not a new stream
+        parser.error("--append cannot be combined with --stream")
+    if args.concurrency is None:
+        args.concurrency = DEFAULT_SHARD_CONCURRENCY if args.shard_by else 1
+    return args
+
+
+def default_batch_size(tickers, concurrency) -> int:
+    """
+    Tickers per request chain when --batch-size is not given: 100, or fewer
+    so that the tickers spread over all ``concurrency`` chains instead of
+    queueing on one.
+    """
+    return max(1, min(DEFAULT_BATCH_SIZE, math.ceil(len(tickers) / concurrency)))
+
+
+def report_result(console, ticker, path, error) -> bool:
+    """Prints one ticker's outcome and returns whether it succeeded."""
+    if error is not None:
+        console.print(f"[red]✗ {ticker}: Failed - {error}[/red]")
+    elif path:
+        console.print(f"[green]✓ {ticker}: Saved to {path}[/green]")
+        return True
+    else:
+        console.print(f"[yellow]⚠ {ticker}: No data exported[/yellow]")
+    return False
+
+
+def run_job(pipeline, console, tickers, indicators, args) -> int:
+    """
+    Runs the tickers through a resumable job and returns the number of
+    successful tickers (including ones finished by earlier runs).
+    """
+    params = dict(
+        timeframe=args.timeframe,
+        start=args.start,
+        end=args.end,
+        indicators=indicators,
+        format=args.format,
+        output_dir=args.output_dir,
+        append=args.append,
+    )
+    manifest = JobManifest(args.job, params)
+    runner = JobRunner(pipeline, manifest)
+    if args.concurrency > 1 and not (args.append or args.shard_by):
+
+        async def run_concurrent_job():
+            async for ticker, path, error in runner.arun(
+                tickers,
+                args.timeframe,
+                args.start,
+                args.end,
+                indicators,
+                only_failed=args.retry_failed,
+                batch_size=args.batch_size,
+                max_concurrency=args.concurrency,
+            ):
+                report_result(console, ticker, path, error)
+
+        asyncio.run(run_concurrent_job())
+    else:
+        for ticker, path, error in runner.run(
+            tickers,
+            args.timeframe,
+            args.start,
+            args.end,
+            indicators,
+            only_failed=args.retry_failed,
+            append=args.append,
+            # Sharded downloads split one ticker's history at a time
+            batch_size=1 if args.shard_by else args.batch_size,
+        ):
+            report_result(console, ticker, path, error)
+
+    failed = manifest.failed()
+    if failed:
+        console.print(
+            f"[red]{len(failed)} tickers failed; rerun with --job {args.job} "
+            "--retry-failed to retry only those[/red]"
+        )
+    outputs = manifest.outputs()
+    return sum(1 for ticker in tickers if ticker in outputs)
+
+
+async def run_concurrent(pipeline, console, tickers, indicators, args) -> int:
+    """Runs the async pipeline and returns the number of successful tickers."""
+    success_count = 0
+    async for ticker, path, error in pipeline.aprocess_tickers(
+        tickers=tickers,
+        timeframe=args.timeframe,
+        start_date=args.start,
+        end_date=args.end,
+        indicators=indicators,
+        batch_size=args.batch_size,
+        max_concurrency=args.concurrency,
+    ):
+        success_count += report_result(console, ticker, path, error)
+    return success_count
+
+
+def build_metrics(args):
+    """Returns a Metrics recorder with the requested sinks, or None."""
+    sinks = []
+    if args.metrics_jsonl:
+        sinks.append(JsonLinesSink(args.metrics_jsonl))
+    if args.metrics_prom:
+        sinks.append(PrometheusTextSink(args.metrics_prom))
+    if not (args.metrics or sinks):
+        return None
+    return Metrics(sinks)
+
+
+def print_metrics(console, metrics) -> None:
+    """Summarises where the run spent its time."""
+    table = Table(title="Metrics")
+    table.add_column("metric")
+    for column in ["count", "total", "max"]:
+        table.add_column(column, justify="right")
+
+    timings = sorted(metrics.timings().items(), key=lambda item: -item[1][1])
+    for (name, labels), (count, total, peak) in timings:
+        label = ",".join(f"{k}={v}" for k, v in labels)
+        table.add_row(
+            f"{name}{{{label}}}" if label else name,
+            str(count),
+            f"{total:.3f}s",
+            f"{peak:.3f}s",
+        )
+    for (name, labels), value in sorted(metrics.counters().items()):
+        label = ",".join(f"{k}={v}" for k, v in labels)
+        table.add_row(f"{name}{{{label}}}" if label else name, f"{value:,.0f}", "", "")
+    console.print(table)
+
+
+def run_live(console, tickers, args) -> None:
+    """Streams real-time bars into the output directory until Ctrl-C."""
+    ingestor = LiveIngestor(
+        tickers,
+        output_dir=args.output_dir,
+        output_format=args.format,
+        url=args.live_url,
+    )
+    console.print(f"[bold]Streaming live bars for {len(tickers)} tickers...[/bold]")
+    try:
+        asyncio.run(ingestor.run())
+    except KeyboardInterrupt:
+        # run() flushes the buffered bars while being cancelled
+        pass
+    console.print(f"[bold blue]Live session ended: {ingestor.stats}[/bold blue]")
 
 
 def main():
@@ -46,35 +368,106 @@ def main():
     args = parse_args()
 
     tickers = [t.strip().upper() for t in args.tickers.split(",")]
-    indicators = (
-        [i.strip() for i in args.indicators.split(",")] if args.indicators else []
-    )
+    indicators = split_indicators(args.indicators)
+    if args.batch_size is None:
+        args.batch_size = default_batch_size(tickers, args.concurrency)
+
+    if args.live:
+        run_live(console, tickers, args)
+        return
 
-    pipeline = StockDataPipeline(output_dir=args.output_dir)
+    if args.rate_limit_state:
+        rate_limiter = SharedTokenBucket(args.rate_limit_state, args.rate_limit)
+    else:
+        rate_limiter = TokenBucket(args.rate_limit)
+    metrics = build_metrics(args)
+    client = AlpacaClient(
+        pool_size=max(10, args.concurrency),
+        rate_limiter=rate_limiter,
+        cache=BarCache(args.cache_dir) if args.cache_dir else None,
+        metrics=metrics,
+        decoder=args.json_decoder,
+    )
+    pipeline = StockDataPipeline(
+        output_dir=args.output_dir,
+        client=client,
+        output_format=args.format,
+        workers=args.workers,
+        metrics=metrics,
+        shard_period=args.shard_by,
+        shard_concurrency=args.concurrency,
+        store=BarStore(args.store_dir) if args.store_dir else None,
+    )
 
     console.print(f"[bold]Processing {len(tickers)} tickers...[/bold]")
     console.print(f"Timeframe: {args.timeframe}")
     console.print(f"Indicators: {indicators}")
 
-    success_count = 0
-    for ticker in tickers:
+    if args.resample_from:
+        success_count = 0
+        timeframes = [t.strip() for t in args.timeframe.split(",") if t.strip()]
+        for ticker in tickers:
+            try:
+                paths = pipeline.process_ticker_timeframes(
+                    ticker,
+                    timeframes,
+                    start_date=args.start,
+                    end_date=args.end,
+                    indicators=indicators,
+                    base_timeframe=args.resample_from,
+                )
+            except Exception as e:
+                report_result(console, ticker, None, e)
+                continue
+            exported = [str(p) for p in paths.values() if p]
+            success_count += report_result(console, ticker, ", ".join(exported), None)
+    elif args.job:
         try:
-            path = pipeline.process_ticker(
-                ticker=ticker,
-                timeframe=args.timeframe,
-                start_date=args.start,
-                end_date=args.end,
-                indicators=indicators,
-            )
-            if path:
-                console.print(f"[green]✓ {ticker}: Saved to {path}[/green]")
-                success_count += 1
-            else:
-                console.print(f"[yellow]⚠ {ticker}: No data exported[/yellow]")
-        except Exception as e:
-            console.print(f"[red]✗ {ticker}: Failed - {e}[/red]")
-            # Log full traceback?
-            # logging.exception("Failed")
+            success_count = run_job(pipeline, console, tickers, indicators, args)
+        except ValueError as e:
+            console.print(f"[red]{e}[/red]")
+            success_count = 0
+    elif args.stream or args.append or args.shard_by:
+        success_count = 0
+        options = dict(
+            timeframe=args.timeframe,
+            start_date=args.start,
+            end_date=args.end,
+            indicators=indicators,
+        )
+        for ticker in tickers:
+            try:
+                if args.append or not args.stream:
+                    path = pipeline.process_ticker(
+                        ticker, append=args.append, **options
+                    )
+                else:
+                    path = pipeline.process_ticker_streaming(ticker, **options)
+            except Exception as e:
+                report_result(console, ticker, None, e)
+                continue
+            success_count += report_result(console, ticker, path, None)
+    elif args.concurrency > 1:
+        success_count = asyncio.run(
+            run_concurrent(pipeline, console, tickers, indicators, args)
+        )
+    else:
+        success_count = 0
+        for ticker, path, error in pipeline.process_tickers(
+            tickers=tickers,
+            timeframe=args.timeframe,
+            start_date=args.start,
+            end_date=args.end,
+            indicators=indicators,
+            batch_size=args.batch_size,
+        ):
+            success_count += report_result(console, ticker, path, error)
+
+    pipeline.close()
+
+    if metrics is not None:
+        metrics.flush()
+        print_metrics(console, metrics)
 
     console.rule()
     console.print(
@@ -0,0 +1,211 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from market_data.buffers import BarBuffer
+from market_data.client import AlpacaClient
+from market_data.sharding import shard_ranges, stitch_shards
+
+logger = logging.getLogger("rich")
+
+
+class AsyncAlpacaClient:
+    """
+    asyncio front-end for ``AlpacaClient`` that keeps many requests in flight.
+
+    Pages are still requested through the wrapped client's pooled session (and
+    its retry handling); each blocking request runs on a worker thread while the
+    event loop schedules the next ones. A global semaphore caps the number of
+    in-flight requests and a per-host semaphore caps them per API host.
+    """
+
+    def __init__(
+        self,
+        client: Optional[AlpacaClient] = None,
+        max_concurrency: int = 8,
+        per_host_limit: Optional[int] = None,
+    ):
+        """
+        Args:
+            client: Client to issue requests with. By default a new one is
+                    created with a connection pool sized to the concurrency.
+            max_concurrency: Maximum number of requests in flight.
+            per_host_limit: Maximum number of requests in flight per host
+                            (defaults to ``max_concurrency``).
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        self.max_concurrency = max_concurrency
+        self.per_host_limit = per_host_limit or max_concurrency
+        self.client = client or AlpacaClient(pool_size=max_concurrency)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="alpaca-fetch"
+        )
+        # Semaphores are created lazily so they bind to the running loop
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+        if self.client.pool_size < max_concurrency:
+            logger.warning(
+                f"Client connection pool ({self.client.pool_size}) is smaller "
+                f"than max_concurrency ({max_concurrency}); extra connections "
+                "will not be kept alive."
+            )
+
+    async def __aenter__(self) -> "AsyncAlpacaClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Shuts down the worker threads (the wrapped client stays open)."""
+        self._executor.shutdown(wait=False)
+
+    async def get_stock_bars_columnar(
+        self,
+        tickers: List[str],
+        timeframe: str,
+        limit: int = 10000,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> Dict[str, BarBuffer]:
+        """
+        Follows one pagination chain and returns per-symbol column buffers.
+
+        Pages of a chain depend on the previous page token, so they are fetched
+        in sequence; concurrency comes from running several chains at once.
+        """
+        buffers: Dict[str, BarBuffer] = {}
+        params = self.client._build_params(tickers, timeframe, limit, start, end)
+
+        while True:
+            data = await self._fetch_page(dict(params))
+
+            for symbol, chunk in data["bars"].items():
+                if symbol in buffers:
+                    buffers[symbol].extend_buffer(chunk)
+                else:
+                    buffers[symbol] = chunk
+
+            next_page_token = data.get("next_page_token")
+            if not next_page_token:
+                return buffers
+            params["page_token"] = next_page_token
+
+    async def fetch_many(
+        self,
+        batches: List[List[str]],
+        timeframe: str,
+        limit: int = 10000,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> Dict[str, BarBuffer]:
+        """
+        Fetches several symbol batches concurrently, one pagination chain each.
+
+        Args:
+            batches: Groups of symbols; use single-symbol groups to fetch each
+                     ticker on its own chain.
+            timeframe: Timeframe for the bars (e.g., "1Day", "1Hour").
+            limit: Maximum number of bars per page.
+            start: Optional start date/time.
+            end: Optional end date/time.
+
+        Returns:
+            Dict mapping each symbol that returned data to its BarBuffer.
+        """
+        results = await asyncio.gather(
+            *(
+                self.get_stock_bars_columnar(batch, timeframe, limit, start, end)
+                for batch in batches
+            )
+        )
+        merged: Dict[str, BarBuffer] = {}
+        for buffers in results:
+            merged.update(buffers)
+        return merged
+
+    async def fetch_ranges(
+        self,
+        ticker: str,
+        timeframe: str,
+        ranges: List[Tuple[str, str]],
+        limit: int = 10000,
+    ) -> List[Optional[BarBuffer]]:
+        """
+        Fetches several date ranges of one ticker concurrently.
+
+        Args:
+            ticker: Stock symbol.
+            timeframe: Timeframe for the bars.
+            ranges: (start, end) pairs, each fetched on its own chain.
+            limit: Maximum number of bars per page.
+
+        Returns:
+            One buffer per range, in the order of ``ranges`` (None when a range
+            returned no bars).
+        """
+        results = await asyncio.gather(
+            *(
+                self.get_stock_bars_columnar([ticker], timeframe, limit, start, end)
+                for start, end in ranges
+            )
+        )
+        return [buffers.get(ticker) for buffers in results]
+
+    async def fetch_sharded(
+        self,
+        ticker: str,
+        timeframe: str,
+        start: str,
+        end: Optional[str] = None,
+        period: str = "month",
+        limit: int = 10000,
+    ) -> Optional[BarBuffer]:
+        """
+        Backfills one ticker by splitting [start, end] into shards (e.g. one
+        per month) that are fetched concurrently, then stitched back together.
+
+        A single pagination chain is strictly sequential; with shards, a deep
+        history is fetched at up to ``max_concurrency`` pages at a time.
+
+        Args:
+            ticker: Stock symbol.
+            timeframe: Timeframe for the bars.
+            start: Start date/time.
+            end: End date/time (default: now).
+            period: Shard size ('week', 'month', 'quarter', 'year' or a
+                    pandas offset alias).
+            limit: Maximum number of bars per page.
+
+        Returns:
+            The bars in time order without boundary duplicates (None when the
+            range returned no bars).
+        """
+        ranges = shard_ranges(start, end, period)
+        logger.info(f"Fetching {ticker} in {len(ranges)} shards ({period})")
+        shards = await self.fetch_ranges(ticker, timeframe, ranges, limit)
+        return stitch_shards(shards)
+
+    async def _fetch_page(self, params: Dict) -> Dict:
+        """
+        Runs one blocking page request under the concurrency limits; the bars
+        come back decoded into ``{symbol: BarBuffer}``.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        host = urlparse(self.client.BASE_URL).netloc
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(self.per_host_limit)
+
+        async with self._semaphore, self._host_semaphores[host]:
+            loop = asyncio.get_running_loop()
+            data = await loop.run_in_executor(
+                self._executor, self.client._fetch_page, params, True
+            )
+        return data
@@ -0,0 +1,193 @@
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+# Alpaca bar field -> (column dtype, fill value for bars missing the field)
+BAR_FIELDS = {
+    "t": (object, None),
+    "o": (np.float64, np.nan),
+    "h": (np.float64, np.nan),
+    "l": (np.float64, np.nan),
+    "c": (np.float64, np.nan),
+    "v": (np.int64, 0),
+    "n": (np.int64, 0),
+    "vw": (np.float64, np.nan),
+}
+
+# Alpaca bar field -> pipeline column name
+COLUMN_NAMES = {
+    "t": "date",
+    "o": "open",
+    "h": "high",
+    "l": "low",
+    "c": "close",
+    "v": "volume",
+    "n": "trade_count",
+    "vw": "vwap",
+}
+
+
+class BarBuffer:
+    """
+    Growable, columnar storage for one symbol's bars.
+
+    Each Alpaca field (t, o, h, l, c, v, n, vw) lives in its own NumPy array
+    that doubles in capacity when full, so pages can be appended as they
+    arrive without keeping a Python dict per bar around.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._capacity = max(int(capacity), 1)
+        self._size = 0
+        self._columns = {
+            field: np.empty(self._capacity, dtype=dtype)
+            for field, (dtype, _) in BAR_FIELDS.items()
+        }
+        # Optional fields (n, vw) are only exported if some bar carried them
+        self._present = set()
+
+    @classmethod
+    def from_bars(cls, bars: List[Dict[str, Any]]) -> "BarBuffer":
+        """Builds a buffer from a list of Alpaca bar dicts."""
+        buffer = cls(capacity=len(bars))
+        buffer.extend(bars)
+        return buffer
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, np.ndarray]) -> "BarBuffer":
+        """
+        Builds a buffer from equally long column arrays keyed by Alpaca field.
+        Fields that are not given are treated as absent.
+        """
+        size = len(next(iter(columns.values()))) if columns else 0
+        buffer = cls(capacity=size)
+        for field, values in columns.items():
+            dtype = BAR_FIELDS[field][0]
+            buffer._columns[field][:size] = np.asarray(values, dtype=dtype)
+            buffer._present.add(field)
+        buffer._size = size
+        return buffer
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def fields(self) -> List[str]:
+        """Fields present in at least one appended bar, in canonical order."""
+        return [f for f in BAR_FIELDS if f in self._present]
+
+    def column(self, field: str) -> np.ndarray:
+        """Returns a view of the filled part of a column."""
+        return self._columns[field][: self._size]
+
+    def extend(self, bars: List[Dict[str, Any]]) -> None:
+        """
+        Appends one page of bars.
+
+        Args:
+            bars: Alpaca bar dicts (e.g. ``{"t": ..., "o": ..., ...}``).
+        """
+        count = len(bars)
+        if count == 0:
+            return
+
+        self._reserve(self._size + count)
+        start, stop = self._size, self._size + count
+
+        for field, (_, fill) in BAR_FIELDS.items():
+            # Every bar normally carries every field: one list comprehension
+            # per column is the fastest way out of the dicts
+            try:
+                values = [bar[field] for bar in bars]
+                self._present.add(field)
+            except KeyError:
+                if any(field in bar for bar in bars):
+                    values = [bar.get(field, fill) for bar in bars]
+                    self._present.add(field)
+                else:
+                    values = fill
+
+            self._columns[field][start:stop] = values
+
+        self._size = stop
+
+    def extend_buffer(self, other: "BarBuffer") -> None:
+        """Appends all bars of another buffer (e.g. the next decoded page)."""
+        count = len(other)
+        if count == 0:
+            return
+
+        self._reserve(self._size + count)
+        start, stop = self._size, self._size + count
+        for field, (_, fill) in BAR_FIELDS.items():
+            if field in other._present:
+                self._columns[field][start:stop] = other.column(field)
+            else:
+                self._columns[field][start:stop] = fill
+        self._present |= other._present
+        self._size = stop
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Builds a DataFrame with the pipeline's column names
+        (date, open, high, low, close, volume, trade_count, vwap).
+
+        The timestamps are parsed here, once, into a tz-aware UTC
+        ``datetime64[ns]`` date column; everything downstream compares and
+        slices the parsed values.
+        """
+        columns = {COLUMN_NAMES[field]: self.column(field) for field in self.fields}
+        if "date" in columns:
+            columns["date"] = parse_timestamps(columns["date"])
+        return pd.DataFrame(columns)
+
+    def _reserve(self, required: int) -> None:
+        """Grows every column (amortised doubling) to hold ``required`` bars."""
+        if required <= self._capacity:
+            return
+
+        capacity = self._capacity
+        while capacity < required:
+            capacity *= 2
+
+        for field, column in self._columns.items():
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[: self._size] = column[: self._size]
+            self._columns[field] = grown
+        self._capacity = capacity
+
+
+def parse_timestamps(values) -> pd.DatetimeIndex:
+    """
+    Parses timestamps (ISO strings, epoch ns or datetimes) in one vectorized
+    pass to tz-aware UTC ``datetime64[ns]``. Naive values are taken as UTC.
+    """
+    if isinstance(values, (pd.Series, pd.Index)) and values.dtype.kind == "M":
+        # Already parsed: only make sure the values are UTC
+        index = pd.DatetimeIndex(values).as_unit("ns")
+        return index.tz_localize("UTC") if index.tz is None else index.tz_convert("UTC")
+    values = np.asarray(values)
+    if values.dtype.kind in "iu":
+        return pd.DatetimeIndex(values.astype("datetime64[ns]"), tz="UTC")
+    if values.dtype.kind == "O" and len(values) and isinstance(values[0], str):
+        # Alpaca sends RFC 3339 strings; a fixed format skips per-value
+        # format inference
+        return pd.to_datetime(values, utc=True, format="ISO8601")
+    return pd.to_datetime(values, utc=True)
+
+
+def format_timestamps(values) -> np.ndarray:
+    """
+    Formats timestamps as fixed-width RFC 3339 UTC strings
+    ("2024-01-02T14:30:00Z"), with fractional seconds only if some value has
+    them. Much faster than ``strftime`` on large columns.
+    """
+    ns = parse_timestamps(values).asi8
+    unit = "ns" if (ns % 10**9).any() else "s"
+    strings = np.datetime_as_string(
+        ns.view("datetime64[ns]").astype(f"datetime64[{unit}]"),
+        unit=unit,
+        timezone="UTC",
+    )
+    return strings.astype(object)
@@ -0,0 +1,280 @@
+import fcntl
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from market_data.buffers import (
+    BAR_FIELDS,
+    BarBuffer,
+    format_timestamps,
+    parse_timestamps,
+)
+from market_data.timeframes import timeframe_to_timedelta
+
+# Inclusive [start, end] interval in epoch nanoseconds (UTC)
+Range = Tuple[int, int]
+
+# Chunks per cache entry before a write compacts them into one
+MAX_CHUNKS = 32
+
+
+def to_ns(value: str) -> int:
+    """Parses a date/time string (naive values are UTC) to epoch nanoseconds."""
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize("UTC")
+    return int(ts.value)
+
+
+def ns_to_iso(value: int) -> str:
+    """Formats epoch nanoseconds as an RFC3339 UTC string for the API."""
+    return pd.Timestamp(value, tz="UTC").strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class BarCache:
+    """
+    Persistent local bar store keyed by (symbol, timeframe, feed).
+
+    Besides the bars, each entry records which time ranges have already been
+    downloaded (including ranges that legitimately had no bars, such as
+    holidays), so callers only need to fetch the gaps.
+
+    Layout: ``<root>/<feed>/<timeframe>/<SYMBOL>/`` holding ``index.json``
+    (covered ranges and the time span of every chunk) and immutable chunk
+    files ``<name>.npz`` with one array per bar field (timestamps as epoch
+    nanoseconds). Chunks never overlap in time. A write stores the new bars
+    as a chunk, merged only with the chunks they overlap, so refreshing the
+    latest bars of a long history does not rewrite it; reads load only the
+    chunks that intersect the requested range.
+
+    ``index.json`` is the commit point: chunk files are written first (under
+    unique temporary names) and the index is replaced atomically. Writers
+    hold an exclusive ``flock`` on the entry, readers a shared one, so
+    processes sharing a cache directory neither lose each other's bars nor
+    read chunks that are being replaced.
+    """
+
+    def __init__(self, root: str = "data/.cache", max_chunks: int = MAX_CHUNKS):
+        """
+        Args:
+            root: Cache directory.
+            max_chunks: Chunks per entry before they are compacted into one.
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_chunks = max_chunks
+
+    def missing_ranges(
+        self, symbol: str, timeframe: str, feed: str, start: int, end: int
+    ) -> List[Range]:
+        """
+        Returns the parts of [start, end] not yet covered for this key.
+
+        Gap boundaries coincide with the edges of the covered ranges; bars
+        fetched twice on a boundary are de-duplicated on write.
+        """
+        with self._locked(symbol, timeframe, feed, fcntl.LOCK_SH) as directory:
+            coverage = _load_index(directory)["coverage"]
+
+        gaps = []
+        cursor = start
+        for covered_start, covered_end in coverage:
+            if covered_end < cursor:
+                continue
+            if covered_start > end:
+                break
+            if covered_start > cursor:
+                gaps.append((cursor, covered_start))
+            cursor = max(cursor, covered_end)
+        if cursor < end:
+            gaps.append((cursor, end))
+        return gaps
+
+    def write(
+        self,
+        symbol: str,
+        timeframe: str,
+        feed: str,
+        bars: Optional[BarBuffer],
+        start: int,
+        end: int,
+    ) -> None:
+        """
+        Merges freshly fetched bars for [start, end] into the store.
+
+        Coverage is only recorded up to the last settled bar, so a bar that is
+        still forming (e.g. today's daily bar) is fetched again next time.
+        """
+        with self._locked(symbol, timeframe, feed, fcntl.LOCK_EX) as directory:
+            index = _load_index(directory)
+            chunks = index["chunks"]
+            replaced = []
+
+            if bars is not None and len(bars):
+                columns = {f: bars.column(f) for f in bars.fields}
+                columns["t"] = timestamps_to_ns(columns["t"])
+                first, last = int(columns["t"].min()), int(columns["t"].max())
+                # Bars the new ones may replace or interleave with
+                replaced = [
+                    c for c in chunks if c["first"] <= last and c["last"] >= first
+                ]
+                if len(chunks) - len(replaced) >= self.max_chunks:
+                    replaced = chunks
+                for chunk in replaced:
+                    columns = _merge_columns(
+                        _load_chunk(directory / chunk["file"]), columns
+                    )
+                chunks = [c for c in chunks if c not in replaced]
+                chunks.append(_write_chunk(directory, columns))
+                chunks.sort(key=lambda c: c["first"])
+
+            settled = pd.Timestamp.now(tz="UTC") - timeframe_to_timedelta(timeframe)
+            end = min(end, int(settled.value))
+            coverage = index["coverage"]
+            if end > start:
+                coverage = _merge_ranges(coverage + [(start, end)])
+
+            _save_index(directory, {"coverage": coverage, "chunks": chunks})
+            # Chunks the index no longer references: the merged ones, and
+            # any left behind by a writer that crashed before its commit
+            referenced = {c["file"] for c in chunks}
+            for path in directory.glob("*.npz"):
+                if path.name not in referenced:
+                    path.unlink()
+
+    def read(
+        self, symbol: str, timeframe: str, feed: str, start: int, end: int
+    ) -> Optional[BarBuffer]:
+        """Returns the cached bars with start <= t <= end, or None if empty."""
+        with self._locked(symbol, timeframe, feed, fcntl.LOCK_SH) as directory:
+            chunks = [
+                _load_chunk(directory / c["file"])
+                for c in _load_index(directory)["chunks"]
+                if c["first"] <= end and c["last"] >= start
+            ]
+        if not chunks:
+            return None
+
+        columns = {
+            f: np.concatenate(
+                [
+                    c[f] if f in c else np.full(len(c["t"]), BAR_FIELDS[f][1])
+                    for c in chunks
+                ]
+            )
+            for f in dict.fromkeys(f for c in chunks for f in c)
+        }
+        t = columns["t"]
+        lo = np.searchsorted(t, start, side="left")
+        hi = np.searchsorted(t, end, side="right")
+        if hi <= lo:
+            return None
+
+        sliced = {f: values[lo:hi] for f, values in columns.items()}
+        sliced["t"] = ns_to_timestamps(sliced["t"])
+        return BarBuffer.from_columns(sliced)
+
+    def _path(self, symbol: str, timeframe: str, feed: str) -> Path:
+        return self.root / feed / timeframe / symbol
+
+    @contextmanager
+    def _locked(
+        self, symbol: str, timeframe: str, feed: str, operation: int
+    ) -> Iterator[Path]:
+        """Holds ``flock(operation)`` on the entry's lock file."""
+        directory = self._path(symbol, timeframe, feed)
+        if operation == fcntl.LOCK_SH and not directory.exists():
+            # Nothing cached yet, and nothing to lock
+            yield directory
+            return
+        directory.mkdir(parents=True, exist_ok=True)
+        with open(directory / ".lock", "a") as f:
+            fcntl.flock(f, operation)
+            try:
+                yield directory
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def timestamps_to_ns(values: np.ndarray) -> np.ndarray:
+    """Converts Alpaca ISO timestamp strings to epoch nanoseconds."""
+    return parse_timestamps(values).asi8
+
+
+def ns_to_timestamps(values: np.ndarray) -> np.ndarray:
+    """Converts epoch nanoseconds back to Alpaca style ISO strings."""
+    return format_timestamps(values)
+
+
+def _merge_columns(
+    old: Dict[str, np.ndarray], new: Dict[str, np.ndarray]
+) -> Dict[str, np.ndarray]:
+    """Concatenates two column sets, sorts by time and keeps the newer bar."""
+    if not old:
+        return new
+
+    merged = {}
+    for field in dict.fromkeys([*old, *new]):
+        fill = BAR_FIELDS[field][1]
+        parts = [
+            source[field] if field in source else np.full(len(source["t"]), fill)
+            for source in (old, new)
+        ]
+        merged[field] = np.concatenate(parts)
+
+    # Stable sort keeps "old before new" for equal timestamps; keep the last
+    order = np.argsort(merged["t"], kind="stable")
+    t = merged["t"][order]
+    keep = np.append(t[1:] != t[:-1], True)
+    return {field: values[order][keep] for field, values in merged.items()}
+
+
+def _load_index(directory: Path) -> Dict[str, list]:
+    path = directory / "index.json"
+    if not path.exists():
+        return {"coverage": [], "chunks": []}
+    with open(path) as f:
+        index = json.load(f)
+    index["coverage"] = [tuple(r) for r in index["coverage"]]
+    return index
+
+
+def _save_index(directory: Path, index: Dict[str, list]) -> None:
+    # Unique temporary name, then rename: readers never see a partial index
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".index.", suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(index, f)
+    os.replace(tmp_path, directory / "index.json")
+
+
+def _load_chunk(path: Path) -> Dict[str, np.ndarray]:
+    with np.load(path) as npz:
+        return {f: npz[f] for f in npz.files}
+
+
+def _write_chunk(directory: Path, columns: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """Writes time-sorted columns to a new chunk file; returns its index entry."""
+    fd, path = tempfile.mkstemp(dir=directory, prefix="chunk-", suffix=".npz")
+    with os.fdopen(fd, "wb") as f:
+        np.savez(f, **columns)
+    return {
+        "file": Path(path).name,
+        "first": int(columns["t"][0]),
+        "last": int(columns["t"][-1]),
+    }
+
+
+def _merge_ranges(ranges: List[Range]) -> List[Range]:
+    merged: List[Range] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
@@ -1,13 +1,23 @@
 import logging
 import os
 import time
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 
+import pandas as pd
 import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
 from rich.console import Console
 from rich.logging import RichHandler
 from tqdm import tqdm
+from urllib3.util.retry import Retry
+
+from market_data import ratelimit
+from market_data.buffers import BarBuffer
+from market_data.cache import BarCache, ns_to_iso, to_ns
+from market_data.decoders import JsonDecoder, get_decoder
+from market_data.jobs import PageCheckpoint
+from market_data.metrics import NULL_METRICS, Metrics
 
 # Configure rich logging
 logging.basicConfig(
@@ -24,8 +34,48 @@ class AlpacaClient:
 
     BASE_URL = "https://data.alpaca.markets/v2/stocks/bars"
 
-    def __init__(self):
-        """Initialize the client by loading credentials from environment."""
+    def __init__(
+        self,
+        pool_size: int = 10,
+        connect_retries: int = 3,
+        backoff_factor: float = 0.5,
+        compression: bool = True,
+        rate_limiter: Optional[ratelimit.TokenBucket] = None,
+        max_rate_limit_retries: int = 10,
+        cache: Optional[BarCache] = None,
+        feed: str = "iex",
+        metrics: Optional[Metrics] = None,
+        decoder: Union[str, JsonDecoder] = "auto",
+    ):
+        """
+        Initialize the client by loading credentials from environment.
+
+        The client owns one pooled ``requests.Session`` for its whole lifetime,
+        so every page of every ``get_stock_bars`` call reuses kept-alive
+        connections instead of paying a TCP+TLS handshake per request.
+
+        Args:
+            pool_size: Maximum number of pooled connections per host.
+            connect_retries: Retries for connection-level failures (DNS,
+                             refused/reset connections), handled by the adapter.
+                             HTTP status retries stay in ``_make_request``.
+            backoff_factor: urllib3 backoff factor between connection retries.
+            compression: Request gzip/deflate encoded responses.
+            rate_limiter: Token bucket pacing every request. Defaults to a
+                          private bucket at Alpaca's basic quota; pass a shared
+                          (or ``SharedTokenBucket``) instance to pace several
+                          clients, threads or processes together.
+            max_rate_limit_retries: How many 429 responses to wait out per
+                                    request before giving up.
+            cache: Local bar store; when set, columnar fetches only download
+                   ranges that are not cached yet.
+            feed: Market data feed ("iex" or "sip").
+            metrics: Recorder for request counts, bytes, retries and decode
+                     timings (disabled by default).
+            decoder: JSON backend for response bodies, by name ('auto',
+                     'json', 'orjson') or instance. 'auto' uses orjson when it
+                     is installed and the stdlib otherwise.
+        """
         load_dotenv()
         self.api_key = os.getenv("APCA_API_KEY_ID")
         self.secret_key = os.getenv("APCA_API_SECRET_KEY")
@@ -42,6 +92,57 @@ class AlpacaClient:
             "accept": "application/json",
         }
         self.console = Console()
+        self.pool_size = pool_size
+        self.rate_limiter = rate_limiter or ratelimit.TokenBucket()
+        self.max_rate_limit_retries = max_rate_limit_retries
+        self.cache = cache
+        self.feed = feed
+        self.metrics = metrics or NULL_METRICS
+        self.decoder = get_decoder(decoder) if isinstance(decoder, str) else decoder
+        self.session = self._build_session(
+            pool_size, connect_retries, backoff_factor, compression
+        )
+
+    def __enter__(self) -> "AlpacaClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Closes the pooled session and its connections."""
+        self.session.close()
+
+    def _build_session(
+        self,
+        pool_size: int,
+        connect_retries: int,
+        backoff_factor: float,
+        compression: bool,
+    ) -> requests.Session:
+        """Creates the keep-alive session shared by all requests of this client."""
+        session = requests.Session()
+        session.headers.update(self.headers)
+        session.headers["Connection"] = "keep-alive"
+        session.headers["Accept-Encoding"] = (
+            "gzip, deflate" if compression else "identity"
+        )
+
+        retry = Retry(
+            total=connect_retries,
+            connect=connect_retries,
+            read=connect_retries,
+            status=0,
+            backoff_factor=backoff_factor,
+            allowed_methods=frozenset(["GET"]),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
 
     def get_stock_bars(
         self,
@@ -66,23 +167,201 @@ class AlpacaClient:
         """
         symbol_str = ",".join(tickers)
         all_bars = []
-        next_page_token = None
 
         self.console.print(
             f"[bold green]Starting data fetch for: {symbol_str}[/bold green]"
         )
 
-        # Initial query params
-        params = {
-            "symbols": symbol_str,
-            "timeframe": timeframe,
-            "limit": limit,
-            "feed": "iex",
-        }
-        if start:
-            params["start"] = start
-        if end:
-            params["end"] = end
+        for bars in self._iter_pages(tickers, timeframe, limit, start, end):
+            # Flatten the dictionary structure: {ticker: [bars]}
+            for _, ticker_bars in bars.items():
+                all_bars.extend(ticker_bars)
+
+        self.console.print(
+            f"[bold blue]Completed. Fetched {len(all_bars)} bars total.[/bold blue]"
+        )
+        return all_bars
+
+    def get_stock_bars_columnar(
+        self,
+        tickers: List[str],
+        timeframe: str,
+        limit: int = 10000,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        checkpoint: Optional[PageCheckpoint] = None,
+    ) -> Dict[str, BarBuffer]:
+        """
+        Fetch bars and append each page straight into per-symbol column buffers.
+
+        Unlike ``get_stock_bars`` this keeps symbol identity and never builds
+        one flat list of bar dicts, which keeps peak memory low for minute data.
+        When the client has a ``BarCache`` (and ``start`` is given), only the
+        ranges not cached yet are downloaded.
+
+        Args:
+            tickers: List of stock symbols (e.g., ["AAPL", "QQQ"]).
+            timeframe: Timeframe for the bars (e.g., "1Day", "1Hour").
+            limit: Maximum number of bars per page (default 10000).
+            start: Optional start date/time (e.g., "2023-01-01").
+            end: Optional end date/time.
+            checkpoint: Spools every page and its next page token (see
+                        ``jobs.PageCheckpoint``), and resumes an interrupted
+                        download from them. Not used with the cache.
+
+        Returns:
+            Dict mapping each symbol that returned data to its BarBuffer.
+        """
+        if self.cache is not None and start:
+            return self._get_cached_bars_columnar(tickers, timeframe, limit, start, end)
+        return self._fetch_bars_columnar(
+            tickers, timeframe, limit, start, end, checkpoint
+        )
+
+    def iter_stock_bars_columnar(
+        self,
+        tickers: List[str],
+        timeframe: str,
+        limit: int = 10000,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> Iterator[Tuple[str, BarBuffer]]:
+        """
+        Stream bars page by page as (symbol, BarBuffer) chunks.
+
+        Nothing is accumulated across pages, so peak memory is bounded by one
+        page regardless of the date range. Chunks of a symbol arrive in time
+        order. The cache is not consulted in streaming mode.
+
+        Args:
+            tickers: List of stock symbols (e.g., ["AAPL", "QQQ"]).
+            timeframe: Timeframe for the bars (e.g., "1Day", "1Hour").
+            limit: Maximum number of bars per page (default 10000).
+            start: Optional start date/time (e.g., "2023-01-01").
+            end: Optional end date/time.
+        """
+        pages = self._iter_pages(tickers, timeframe, limit, start, end, columnar=True)
+        for bars in pages:
+            for symbol, chunk in bars.items():
+                if len(chunk):
+                    yield symbol, chunk
+
+    def _get_cached_bars_columnar(
+        self,
+        tickers: List[str],
+        timeframe: str,
+        limit: int,
+        start: str,
+        end: Optional[str],
+    ) -> Dict[str, BarBuffer]:
+        """
+        Serves [start, end] from the local cache, fetching only the gaps.
+
+        Symbols that miss exactly the same ranges are fetched together, so a
+        daily refresh of a whole universe is still one request chain per gap.
+        """
+        start_ns = to_ns(start)
+        end_ns = to_ns(end) if end else int(pd.Timestamp.now(tz="UTC").value)
+
+        groups: Dict[Tuple[Tuple[int, int], ...], List[str]] = {}
+        for symbol in tickers:
+            gaps = self.cache.missing_ranges(
+                symbol, timeframe, self.feed, start_ns, end_ns
+            )
+            if gaps:
+                groups.setdefault(tuple(gaps), []).append(symbol)
+
+        cached = len(tickers) - sum(len(symbols) for symbols in groups.values())
+        if cached:
+            logger.info(f"Cache: {cached}/{len(tickers)} symbols fully cached")
+
+        for gaps, symbols in groups.items():
+            for gap_start, gap_end in gaps:
+                fetched = self._fetch_bars_columnar(
+                    symbols,
+                    timeframe,
+                    limit,
+                    ns_to_iso(gap_start),
+                    ns_to_iso(gap_end),
+                )
+                for symbol in symbols:
+                    self.cache.write(
+                        symbol,
+                        timeframe,
+                        self.feed,
+                        fetched.get(symbol),
+                        gap_start,
+                        gap_end,
+                    )
+
+        buffers = {}
+        for symbol in tickers:
+            bars = self.cache.read(symbol, timeframe, self.feed, start_ns, end_ns)
+            if bars is not None:
+                buffers[symbol] = bars
+        return buffers
+
+    def _fetch_bars_columnar(
+        self,
+        tickers: List[str],
+        timeframe: str,
+        limit: int,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        checkpoint: Optional[PageCheckpoint] = None,
+    ) -> Dict[str, BarBuffer]:
+        """Downloads a request chain into per-symbol column buffers."""
+        buffers: Dict[str, BarBuffer] = {}
+        if checkpoint is not None:
+            buffers = checkpoint.load()
+            if checkpoint.complete:
+                return buffers
+            if checkpoint.token:
+                spooled = sum(len(b) for b in buffers.values())
+                logger.info(f"Resuming download after {spooled} checkpointed bars")
+
+        self.console.print(
+            f"[bold green]Starting data fetch for: {','.join(tickers)}[/bold green]"
+        )
+
+        pages = self._iter_pages(
+            tickers, timeframe, limit, start, end, columnar=True, checkpoint=checkpoint
+        )
+        for bars in pages:
+            with self.metrics.timer("buffer_append_seconds"):
+                for symbol, chunk in bars.items():
+                    if symbol in buffers:
+                        buffers[symbol].extend_buffer(chunk)
+                    else:
+                        buffers[symbol] = chunk
+
+        total = sum(len(b) for b in buffers.values())
+        self.console.print(
+            f"[bold blue]Completed. Fetched {total} bars for "
+            f"{len(buffers)}/{len(tickers)} symbols.[/bold blue]"
+        )
+        return buffers
+
+    def _iter_pages(
+        self,
+        tickers: List[str],
+        timeframe: str,
+        limit: int,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        columnar: bool = False,
+        checkpoint: Optional[PageCheckpoint] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Follow ``next_page_token`` and yield the ``{symbol: [bars]}`` mapping
+        of every page (``{symbol: BarBuffer}`` when ``columnar``). With a
+        ``checkpoint`` (columnar only) the chain starts at its token and every
+        page is spooled before it is yielded.
+        """
+        next_page_token = checkpoint.token if checkpoint is not None else None
+        fetched = 0
+
+        params = self._build_params(tickers, timeframe, limit, start, end)
 
         # Progress bar (unknown total initially, so just a spinner/counter)
         with tqdm(desc="Fetching pages", unit="page") as pbar:
@@ -90,52 +369,124 @@ class AlpacaClient:
                 if next_page_token:
                     params["page_token"] = next_page_token
 
-                try:
-                    response = self._make_request(params)
-                    data = response.json()
+                data = self._fetch_page(params, columnar)
 
-                    bars = data.get("bars", {})
-                    # Flatten the dictionary structure: {ticker: [bars]}
-                    page_count = 0
-                    for _, ticker_bars in bars.items():
-                        all_bars.extend(ticker_bars)
-                        page_count += len(ticker_bars)
+                bars = data.get("bars") or {}
+                if checkpoint is not None:
+                    checkpoint.save_page(bars, data.get("next_page_token"))
+                page_bars = sum(len(b) for b in bars.values())
+                fetched += page_bars
+                self.metrics.increment("pages_total")
+                self.metrics.increment("bars_received_total", page_bars)
 
-                    pbar.update(1)
-                    pbar.set_postfix({"bars": len(all_bars)})
+                pbar.update(1)
+                pbar.set_postfix({"bars": fetched})
 
-                    next_page_token = data.get("next_page_token")
-                    if not next_page_token:
-                        break
+                yield bars
 
-                except requests.exceptions.HTTPError as e:
-                    logger.error(f"HTTP Error: {e}")
-                    raise
-                except Exception as e:
-                    logger.exception(f"Unexpected error: {e}")
-                    raise
+                next_page_token = data.get("next_page_token")
+                if not next_page_token:
+                    break
 
-        self.console.print(
-            f"[bold blue]Completed. Fetched {len(all_bars)} bars total.[/bold blue]"
-        )
-        return all_bars
+    def _build_params(
+        self,
+        tickers: List[str],
+        timeframe: str,
+        limit: int,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Initial query params for a bars request chain."""
+        params = {
+            "symbols": ",".join(tickers),
+            "timeframe": timeframe,
+            "limit": limit,
+            "feed": self.feed,
+        }
+        if start:
+            params["start"] = start
+        if end:
+            params["end"] = end
+        return params
+
+    def _fetch_page(
+        self, params: Dict[str, Any], columnar: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Requests and decodes a single page of bars. With ``columnar`` the
+        bars are decoded straight into ``{symbol: BarBuffer}``.
+        """
+        try:
+            response = self._make_request(params)
+            with self.metrics.timer("json_decode_seconds"):
+                if not columnar:
+                    return self.decoder.loads(response.content)
+                bars, next_page_token = self.decoder.decode_bars(response.content)
+                return {"bars": bars, "next_page_token": next_page_token}
+        except requests.exceptions.HTTPError as e:
+            logger.error(f"HTTP Error: {e}")
+            raise
+        except Exception as e:
+            logger.exception(f"Unexpected error: {e}")
+            raise
 
     def _make_request(
         self, params: Dict[str, Any], max_retries: int = 3
     ) -> requests.Response:
-        """Make a request with retry logic for 5xx errors."""
-        for attempt in range(max_retries):
+        """
+        Make a request with retry logic for 5xx errors and 429 throttling.
+
+        Every attempt first takes a token from the rate limiter. A 429 pauses
+        the (shared) limiter for the server's ``Retry-After`` before retrying
+        and does not count against ``max_retries``, up to
+        ``max_rate_limit_retries`` times.
+        """
+        attempt = 0
+        throttled = 0
+        while attempt < max_retries:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+
             try:
-                response = requests.get(
-                    self.BASE_URL, headers=self.headers, params=params
+                with self.metrics.timer("http_request_seconds"):
+                    response = self.session.get(self.BASE_URL, params=params)
+                self.metrics.increment(
+                    "http_requests_total", status=str(response.status_code)
+                )
+                # Response body size after decompression
+                self.metrics.increment(
+                    "http_bytes_received_total", len(response.content)
                 )
+                if self.rate_limiter is not None:
+                    self.rate_limiter.observe(response.headers)
+
+                if (
+                    response.status_code == 429
+                    and throttled < self.max_rate_limit_retries
+                ):
+                    delay = ratelimit.retry_after_seconds(response.headers)
+                    if delay is None:
+                        delay = ratelimit.backoff_delay(throttled)
+                    throttled += 1
+                    self.metrics.increment("http_retries_total", reason="rate_limited")
+                    logger.warning(
+                        f"Rate limited (429). Waiting {delay:.1f}s "
+                        f"({throttled}/{self.max_rate_limit_retries})..."
+                    )
+                    if self.rate_limiter is not None:
+                        self.rate_limiter.pause_for(delay)
+                    else:
+                        time.sleep(delay)
+                    continue
 
                 if response.status_code >= 500:
+                    self.metrics.increment("http_retries_total", reason="server_error")
                     logger.warning(
                         f"Server error {response.status_code}. "
                         f"Retrying ({attempt + 1}/{max_retries})..."
                     )
-                    time.sleep(2**attempt)  # Exponential backoff
+                    time.sleep(ratelimit.backoff_delay(attempt))  # Jittered exponential
+                    attempt += 1
                     continue
 
                 response.raise_for_status()
@@ -150,7 +501,9 @@ class AlpacaClient:
                 ):
                     # Don't retry 4xx errors
                     raise
+                self.metrics.increment("http_retries_total", reason="request_error")
                 logger.warning(f"Request failed: {e}. Retrying...")
-                time.sleep(1)
+                time.sleep(ratelimit.backoff_delay(attempt))
+                attempt += 1
 
         raise requests.exceptions.RetryError("Max retries exceeded")
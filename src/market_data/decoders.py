@@ -0,0 +1,95 @@
+import json
+from typing import Any, Dict, Optional, Tuple, Type
+
+from market_data.buffers import BarBuffer
+
+
+class JsonDecoder:
+    """
+    Decodes response bodies with the stdlib ``json`` module.
+
+    Always available; ``get_decoder`` picks a faster backend when one is
+    installed. Subclasses only need to implement ``loads``.
+    """
+
+    name = "json"
+
+    def loads(self, body: bytes) -> Any:
+        return json.loads(body)
+
+    def decode_bars(self, body: bytes) -> Tuple[Dict[str, BarBuffer], Optional[str]]:
+        """
+        Decodes one page of the bars endpoint into per-symbol column buffers.
+
+        The body is parsed by ``loads`` into the usual dicts, and each
+        symbol's bars are then copied into NumPy columns one field at a time
+        (``BarBuffer.from_bars``); pages are never flattened into one list of
+        bars or a DataFrame. Extracting the columns from the raw bytes without
+        building the dicts was measured slower in pure Python than the C
+        parsers, so the speed-up comes from the ``loads`` backend.
+
+        Returns:
+            ({symbol: BarBuffer}, next_page_token or None)
+        """
+        data = self.loads(body)
+        buffers = {
+            symbol: BarBuffer.from_bars(bars)
+            for symbol, bars in (data.get("bars") or {}).items()
+            if bars
+        }
+        return buffers, data.get("next_page_token")
+
+
+class OrjsonDecoder(JsonDecoder):
+    """Decodes with orjson (optional dependency), roughly twice as fast."""
+
+    name = "orjson"
+
+    def __init__(self):
+        self._orjson = _import_orjson()
+
+    def loads(self, body: bytes) -> Any:
+        return self._orjson.loads(body)
+
+
+DECODERS: Dict[str, Type[JsonDecoder]] = {
+    "json": JsonDecoder,
+    "orjson": OrjsonDecoder,
+}
+
+# Tried in order by get_decoder("auto")
+PREFERRED_DECODERS = ["orjson", "json"]
+
+
+def get_decoder(name: str = "auto") -> JsonDecoder:
+    """
+    Instantiates a JSON decoder by name ('json', 'orjson').
+
+    Args:
+        name: Backend name (case-insensitive). 'auto' picks the fastest one
+              installed and falls back to the stdlib.
+    """
+    key = name.lower()
+    if key == "auto":
+        for candidate in PREFERRED_DECODERS:
+            try:
+                return DECODERS[candidate]()
+            except ImportError:
+                continue
+    if key not in DECODERS:
+        raise ValueError(
+            f"Unknown JSON decoder '{name}'. Choose from: auto, {', '.join(DECODERS)}"
+        )
+    return DECODERS[key]()
+
+
+def _import_orjson():
+    """Imports orjson (optional dependency) with a helpful error message."""
+    try:
+        import orjson
+    except ImportError as e:
+        raise ImportError(
+            "The orjson decoder requires the optional orjson package. "
+            "Install it with `poetry install --extras fast-json`."
+        ) from e
+    return orjson
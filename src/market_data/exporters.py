@@ -0,0 +1,447 @@
+import io
+import os
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable, Dict, Optional, Type
+
+import pandas as pd
+
+from market_data.buffers import format_timestamps, parse_timestamps
+
+
+class BarExporter(ABC):
+    """
+    Writes a finished bars + indicators frame to disk.
+
+    Subclasses implement one file format; ``get_exporter`` picks one by name.
+    """
+
+    extension = ""
+
+    @abstractmethod
+    def write(self, df: pd.DataFrame, path: Path) -> None:
+        """Writes the whole frame to ``path``."""
+
+    @abstractmethod
+    def open_stream(self, path: Path, append: bool = False) -> "StreamWriter":
+        """
+        Opens ``path`` for writing the frame in consecutive chunks.
+
+        With ``append``, the chunks go after the rows of an existing file
+        (same columns) instead of replacing it.
+        """
+
+    @abstractmethod
+    def read_tail(self, path: Path, rows: int) -> pd.DataFrame:
+        """
+        Reads the last ``rows`` rows of a file written by this exporter, with
+        the same columns as the frame that was written and the date parsed to
+        tz-aware UTC datetimes.
+        """
+
+    @abstractmethod
+    def append(self, df: pd.DataFrame, path: Path) -> None:
+        """Appends rows (same columns as the file) to an existing file."""
+
+
+class StreamWriter(ABC):
+    """Appends chunks of one export file; ``close`` finalises the file."""
+
+    @abstractmethod
+    def write(self, df: pd.DataFrame) -> None:
+        """Appends one chunk."""
+
+    @abstractmethod
+    def close(self) -> None:
+        """Finalises the file."""
+
+
+class CsvExporter(BarExporter):
+    """
+    Plain CSV, one row per bar with the date as the first column, written as
+    fixed-format RFC 3339 UTC strings.
+    """
+
+    extension = ".csv"
+
+    def write(self, df: pd.DataFrame, path: Path) -> None:
+        _format_dates(df).to_csv(path, index=False)
+
+    def open_stream(self, path: Path, append: bool = False) -> StreamWriter:
+        return _CsvStreamWriter(path, append)
+
+    def read_tail(self, path: Path, rows: int) -> pd.DataFrame:
+        # Scan backwards from the end so the cost depends on ``rows`` only
+        with open(path, "rb") as f:
+            header = f.readline()
+            body_start = f.tell()
+            pos = f.seek(0, os.SEEK_END)
+            data = b""
+            while pos > body_start and data.count(b"\n") <= rows:
+                size = min(64 * 1024, pos - body_start)
+                pos -= size
+                f.seek(pos)
+                data = f.read(size) + data
+
+        lines = data.splitlines(keepends=True)
+        if lines and not lines[-1].endswith(b"\n"):
+            # Torn row of an append that crashed mid-write (``append`` drops it)
+            lines.pop()
+        lines = lines[-rows:] if rows > 0 else []
+        frame = pd.read_csv(io.BytesIO(header + b"".join(lines)), dtype={"date": str})
+        if "date" in frame.columns:
+            frame["date"] = parse_timestamps(frame["date"].to_numpy())
+        return frame
+
+    def append(self, df: pd.DataFrame, path: Path) -> None:
+        _drop_torn_line(path)
+        _format_dates(df).to_csv(path, mode="a", index=False, header=False)
+
+
+class ParquetExporter(BarExporter):
+    """
+    Apache Parquet via pyarrow, with a UTC datetime index and native dtypes so
+    readers can project columns and filter row groups without parsing text.
+    """
+
+    extension = ".parquet"
+
+    def __init__(
+        self, compression: Optional[str] = "zstd", row_group_size: int = 100_000
+    ):
+        """
+        Args:
+            compression: Codec name (e.g. 'zstd', 'snappy', 'gzip') or None.
+            row_group_size: Maximum number of rows per row group.
+        """
+        self.compression = compression
+        self.row_group_size = row_group_size
+
+    def write(self, df: pd.DataFrame, path: Path) -> None:
+        pq = _import_pyarrow("parquet")
+        table = _to_arrow_table(df)
+        pq.write_table(
+            table,
+            path,
+            compression=self.compression or "none",
+            row_group_size=self.row_group_size,
+        )
+
+    def open_stream(self, path: Path, append: bool = False) -> StreamWriter:
+        pq = _import_pyarrow("parquet")
+        if not (append and _has_rows(path)):
+
+            def open_writer(schema):
+                return pq.ParquetWriter(
+                    path, schema, compression=self.compression or "none"
+                )
+
+            return _ArrowStreamWriter(open_writer, self.row_group_size)
+
+        # As in ``append``: the old row groups are copied into a new file,
+        # which replaces ``path`` when the stream is closed
+        tmp_path = Path(f"{path}.tmp")
+        with pq.ParquetFile(path) as f:
+            schema = f.schema_arrow
+
+        def copy_writer(schema):
+            writer = pq.ParquetWriter(
+                tmp_path, schema, compression=self.compression or "none"
+            )
+            with pq.ParquetFile(path) as f:
+                for i in range(f.num_row_groups):
+                    writer.write_table(f.read_row_group(i))
+            return writer
+
+        return _ArrowStreamWriter(
+            copy_writer,
+            self.row_group_size,
+            schema=schema,
+            on_close=lambda: os.replace(tmp_path, path),
+        )
+
+    def read_tail(self, path: Path, rows: int) -> pd.DataFrame:
+        pq = _import_pyarrow("parquet")
+        with pq.ParquetFile(path) as f:
+            # Only the trailing row groups that hold the last ``rows`` rows
+            groups, count = [], 0
+            for i in reversed(range(f.num_row_groups)):
+                if count >= rows:
+                    break
+                groups.insert(0, i)
+                count += f.metadata.row_group(i).num_rows
+            table = f.read_row_groups(groups)
+        return _last_rows(_from_arrow_table(table), rows)
+
+    def append(self, df: pd.DataFrame, path: Path) -> None:
+        # Parquet files cannot grow in place; copy the row groups one at a time
+        # into a new file and swap it in, so memory stays at one row group
+        pq = _import_pyarrow("parquet")
+        tmp_path = Path(f"{path}.tmp")
+        with pq.ParquetFile(path) as f:
+            schema = f.schema_arrow
+            with pq.ParquetWriter(
+                tmp_path, schema, compression=self.compression or "none"
+            ) as writer:
+                for i in range(f.num_row_groups):
+                    writer.write_table(f.read_row_group(i))
+                writer.write_table(
+                    _to_arrow_table(df, schema), row_group_size=self.row_group_size
+                )
+        os.replace(tmp_path, path)
+
+
+class FeatherExporter(BarExporter):
+    """
+    Arrow IPC (Feather v2) file, which can be memory-mapped by readers.
+    Uncompressed files map with zero copies; lz4/zstd trade that for size.
+    """
+
+    extension = ".feather"
+
+    def __init__(self, compression: Optional[str] = None):
+        """
+        Args:
+            compression: 'lz4', 'zstd' or None (uncompressed, mmap friendly).
+        """
+        self.compression = compression
+
+    def write(self, df: pd.DataFrame, path: Path) -> None:
+        feather = _import_pyarrow("feather")
+        table = _to_arrow_table(df)
+        feather.write_feather(
+            table, path, compression=self.compression or "uncompressed"
+        )
+
+    def open_stream(self, path: Path, append: bool = False) -> StreamWriter:
+        pa = _import_pyarrow()
+        options = pa.ipc.IpcWriteOptions(compression=self.compression)
+        if not (append and _has_rows(path)):
+
+            def open_writer(schema):
+                return pa.ipc.new_file(str(path), schema, options=options)
+
+            return _ArrowStreamWriter(open_writer, row_group_size=65_536)
+
+        # Copied batch by batch into a new file that replaces ``path`` on close
+        tmp_path = f"{path}.tmp"
+        with pa.memory_map(str(path)) as source:
+            schema = pa.ipc.open_file(source).schema
+
+        def copy_writer(schema):
+            writer = pa.ipc.new_file(tmp_path, schema, options=options)
+            with pa.memory_map(str(path)) as source:
+                reader = pa.ipc.open_file(source)
+                for i in range(reader.num_record_batches):
+                    writer.write_batch(reader.get_batch(i))
+            return writer
+
+        return _ArrowStreamWriter(
+            copy_writer,
+            row_group_size=65_536,
+            schema=schema,
+            on_close=lambda: os.replace(tmp_path, path),
+        )
+
+    def read_tail(self, path: Path, rows: int) -> pd.DataFrame:
+        pa = _import_pyarrow()
+        with pa.memory_map(str(path)) as source:
+            reader = pa.ipc.open_file(source)
+            batches, count = [], 0
+            for i in reversed(range(reader.num_record_batches)):
+                if count >= rows:
+                    break
+                batches.insert(0, reader.get_batch(i))
+                count += batches[0].num_rows
+            table = pa.Table.from_batches(batches, schema=reader.schema)
+            return _last_rows(_from_arrow_table(table), rows)
+
+    def append(self, df: pd.DataFrame, path: Path) -> None:
+        # Like Parquet, the IPC file is rewritten batch by batch (the old
+        # batches are memory-mapped, not loaded)
+        pa = _import_pyarrow()
+        tmp_path = f"{path}.tmp"
+        with pa.memory_map(str(path)) as source:
+            reader = pa.ipc.open_file(source)
+            options = pa.ipc.IpcWriteOptions(compression=self.compression)
+            with pa.ipc.new_file(tmp_path, reader.schema, options=options) as writer:
+                for i in range(reader.num_record_batches):
+                    writer.write_batch(reader.get_batch(i))
+                writer.write_table(_to_arrow_table(df, reader.schema))
+        os.replace(tmp_path, path)
+
+
+EXPORTERS: Dict[str, Type[BarExporter]] = {
+    "csv": CsvExporter,
+    "parquet": ParquetExporter,
+    "feather": FeatherExporter,
+}
+
+
+def get_exporter(name: str, **options) -> BarExporter:
+    """
+    Instantiates the exporter for a format name ('csv', 'parquet', 'feather').
+
+    Args:
+        name: Format name (case-insensitive).
+        **options: Format specific options (e.g. compression).
+    """
+    key = name.lower()
+    if key not in EXPORTERS:
+        raise ValueError(
+            f"Unknown output format '{name}'. Choose from: {', '.join(EXPORTERS)}"
+        )
+    return EXPORTERS[key](**options)
+
+
+class _CsvStreamWriter(StreamWriter):
+    def __init__(self, path: Path, append: bool = False):
+        append = append and _has_rows(path)
+        if append:
+            _drop_torn_line(path)
+        self._file = open(path, "a" if append else "w", newline="")
+        self._header = not append
+
+    def write(self, df: pd.DataFrame) -> None:
+        _format_dates(df).to_csv(self._file, index=False, header=self._header)
+        self._header = False
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class _ArrowStreamWriter(StreamWriter):
+    """
+    Buffers chunks until ``row_group_size`` rows are pending, then writes them
+    as one batch, so small pages do not turn into tiny row groups.
+    """
+
+    def __init__(
+        self,
+        open_writer,
+        row_group_size: int,
+        schema=None,
+        on_close: Optional[Callable[[], None]] = None,
+    ):
+        """
+        Args:
+            open_writer: Opens the underlying writer for the first chunk's
+                         schema.
+            row_group_size: Rows buffered per written batch.
+            schema: Schema the chunks are cast to (default: the first
+                    chunk's).
+            on_close: Called after the writer is closed (not if nothing was
+                      written).
+        """
+        self._open_writer = open_writer
+        self._row_group_size = row_group_size
+        self._on_close = on_close
+        self._writer = None
+        self._schema = schema
+        self._pending = []
+        self._pending_rows = 0
+
+    def write(self, df: pd.DataFrame) -> None:
+        table = _to_arrow_table(df, self._schema)
+        if self._writer is None:
+            self._schema = table.schema
+            self._writer = self._open_writer(self._schema)
+
+        self._pending.append(table)
+        self._pending_rows += table.num_rows
+        if self._pending_rows >= self._row_group_size:
+            self._flush()
+
+    def close(self) -> None:
+        if self._writer is None:
+            return
+        self._flush()
+        self._writer.close()
+        if self._on_close is not None:
+            self._on_close()
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        pa = _import_pyarrow()
+        self._writer.write_table(pa.concat_tables(self._pending))
+        self._pending = []
+        self._pending_rows = 0
+
+
+def _to_arrow_table(df: pd.DataFrame, schema=None):
+    """Converts the export frame to Arrow with a real UTC datetime index."""
+    pa = _import_pyarrow()
+    frame = df.copy(deep=False)
+    if "date" in frame.columns:
+        frame["date"] = parse_timestamps(frame["date"])
+        frame = frame.set_index("date")
+    return pa.Table.from_pandas(frame, schema=schema, preserve_index=True)
+
+
+def _from_arrow_table(table) -> pd.DataFrame:
+    """Inverse of ``_to_arrow_table``: the date index back to a column."""
+    frame = table.to_pandas()
+    if frame.index.name == "date":
+        frame = frame.reset_index()
+    return frame
+
+
+def _has_rows(path: Path) -> bool:
+    """Whether ``path`` is an existing, non-empty file."""
+    return os.path.exists(path) and os.path.getsize(path) > 0
+
+
+def _drop_torn_line(path: Path) -> None:
+    """
+    Truncates a CSV file after its last newline, removing the partial row an
+    interrupted append leaves behind, so the next rows start on a line of
+    their own.
+    """
+    with open(path, "r+b") as f:
+        pos = end = f.seek(0, os.SEEK_END)
+        while pos > 0:
+            size = min(64 * 1024, pos)
+            pos -= size
+            f.seek(pos)
+            newline = f.read(size).rfind(b"\n")
+            if newline >= 0:
+                if pos + newline + 1 < end:
+                    f.truncate(pos + newline + 1)
+                return
+
+
+def _format_dates(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Shallow copy of ``df`` with a datetime date column rendered as fixed
+    RFC 3339 strings, so text formats do not fall back to per-row
+    ``strftime``. The caller's frame is left untouched.
+    """
+    if "date" not in df.columns or df["date"].dtype.kind != "M":
+        return df
+    frame = df.copy(deep=False)
+    frame["date"] = format_timestamps(frame["date"])
+    return frame
+
+
+def _last_rows(frame: pd.DataFrame, rows: int) -> pd.DataFrame:
+    return frame.iloc[max(len(frame) - rows, 0) :].reset_index(drop=True)
+
+
+def _import_pyarrow(submodule: Optional[str] = None):
+    """Imports pyarrow (optional dependency) with a helpful error message."""
+    try:
+        import pyarrow
+        import pyarrow.feather
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError(
+            "Parquet/Feather export requires the optional pyarrow package. "
+            "Install it with `poetry install --extras columnar`."
+        ) from e
+
+    if submodule == "parquet":
+        return pyarrow.parquet
+    if submodule == "feather":
+        return pyarrow.feather
+    return pyarrow
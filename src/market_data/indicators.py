@@ -1,20 +1,292 @@
 import logging
-from typing import List
+import re
+from typing import Callable, Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 import talib
 from talib import abstract
 
+from market_data.metrics import NULL_METRICS, Metrics
+
 logger = logging.getLogger("rich")
 
+# Columns the plan can feed to TA-Lib functions
+OHLCV_COLUMNS = ("open", "high", "low", "close", "volume")
+
+# NAME, NAME_<timeperiod> or NAME(arg, key=value, ...)
+_SPEC_PATTERN = re.compile(r"^([A-Za-z0-9_]+)\s*(?:\((.*)\))?$")
+
+# Relative error (of an output's largest value) within which an indicator
+# recomputed from a tail of recent bars counts as equal to its value over
+# the whole history
+CONVERGENCE_TOLERANCE = 1e-10
+
+# Daily volatilities of the random walks convergence is measured on
+_PROBE_VOLATILITIES = (0.005, 0.01, 0.02, 0.04)
+
+# Longest probe series when measuring how far back an indicator depends on
+# its inputs
+_MAX_PROBE_BARS = 65536
+
+
+class IndicatorSpec:
+    """
+    One indicator of a compiled plan, resolved against TA-Lib.
+
+    Holds the TA-Lib function handle, the OHLCV columns it consumes (in call
+    order), its parameters, the output column names it produces and its
+    lookback (bars consumed before the first valid output).
+    """
+
+    __slots__ = (
+        "spec",
+        "name",
+        "function",
+        "inputs",
+        "params",
+        "columns",
+        "lookback",
+        "_convergence",
+    )
+
+    def __init__(
+        self,
+        spec: str,
+        name: str,
+        function: Callable,
+        inputs: Tuple[str, ...],
+        params: Dict[str, float],
+        columns: Tuple[str, ...],
+        lookback: int = 0,
+    ):
+        self.spec = spec
+        self.name = name
+        self.function = function
+        self.inputs = inputs
+        self.params = params
+        self.columns = columns
+        self.lookback = lookback
+        self._convergence: Optional[Tuple[Optional[int], bool]] = None
+
+    @property
+    def convergence(self) -> Tuple[Optional[int], bool]:
+        """
+        How far back the output depends on the input: ``(bars, offset)``.
+
+        Recomputing the indicator over only the last ``bars`` bars before a
+        row reproduces its full-history value there (within
+        ``CONVERGENCE_TOLERANCE``). For window indicators that is the
+        lookback; recursive ones (EMA, RSI, MACD, ADX, ...) need far more,
+        since their state only decays. ``offset`` is True for running totals
+        and positions (OBV, AD, MAXINDEX), whose recomputation is off by a
+        constant instead. ``bars`` is None if neither holds.
+
+        Measured once, on a synthetic random walk, by comparing the output
+        over a whole series with the output over its suffix.
+        """
+        if self._convergence is None:
+            self._convergence = _measure_convergence(self)
+        return self._convergence
+
+    def __repr__(self) -> str:
+        return f"IndicatorSpec({self.spec!r} -> {self.name}{self.params})"
+
+
+class IndicatorPlan:
+    """
+    A parsed, validated indicator list that can be applied to many frames.
+
+    Build one with ``IndicatorCalculator.compile``; applying it does no string
+    parsing or TA-Lib lookups, only the calculations themselves.
+    """
+
+    def __init__(self, specs: List[IndicatorSpec], invalid: List[str]):
+        self.specs = specs
+        # Specs that could not be resolved (reported once at compile time)
+        self.invalid = invalid
+        self.inputs = tuple(
+            c for c in OHLCV_COLUMNS if any(c in s.inputs for s in specs)
+        )
+
+    def __len__(self) -> int:
+        return len(self.specs)
+
+    @property
+    def columns(self) -> List[str]:
+        """All output column names, in the order they are appended."""
+        return [c for spec in self.specs for c in spec.columns]
+
+    @property
+    def lookback(self) -> int:
+        """
+        Warm-up bars needed before every indicator produces a value, taken
+        from TA-Lib's own lookback (including any unstable period configured
+        with ``talib.set_unstable_period``).
+        """
+        return max((spec.lookback for spec in self.specs), default=0)
+
+    @property
+    def convergence_bars(self) -> int:
+        """
+        Trailing bars a chunked recomputation (streaming, append) has to
+        carry so every indicator matches a computation over the whole
+        series; see ``IndicatorSpec.convergence``. Offset indicators need
+        one more row, the overlap their shift is measured on. Indicators
+        that never converge are logged and count with the longest probe
+        length.
+        """
+        bars = 0
+        for spec in self.specs:
+            convergence, offset = spec.convergence
+            if convergence is None:
+                logger.warning(
+                    f"{spec.spec} depends on the whole history; recomputing it "
+                    "from a tail of recent bars can differ from a full rewrite"
+                )
+                convergence = _MAX_PROBE_BARS
+            bars = max(bars, convergence + offset, spec.lookback)
+        return bars
+
+    @property
+    def offset_columns(self) -> List[str]:
+        """
+        Output columns that a recomputation from a tail reproduces up to a
+        constant (running totals like OBV), to be shifted by the difference
+        on an overlapping row.
+        """
+        return [c for spec in self.specs if spec.convergence[1] for c in spec.columns]
+
+    def compute(
+        self, inputs: Dict[str, np.ndarray], metrics: Metrics = NULL_METRICS
+    ) -> Dict[str, np.ndarray]:
+        """
+        Runs the plan on raw arrays.
+
+        Args:
+            inputs: float64 arrays keyed by lower-case OHLCV name; must contain
+                    every column in ``self.inputs``.
+            metrics: Recorder for the compute time of each indicator.
+
+        Returns:
+            Output arrays keyed by column name. Indicators that fail are
+            logged and left out.
+        """
+        results = {}
+        for spec in self.specs:
+            try:
+                with metrics.timer("indicator_seconds", indicator=spec.name):
+                    result = spec.function(
+                        *(inputs[c] for c in spec.inputs), **spec.params
+                    )
+            except Exception as e:
+                logger.error(f"Failed to calculate {spec.spec}: {e}")
+                continue
+
+            # Result can be a single array or tuple of arrays (like MACD)
+            if isinstance(result, (tuple, list)):
+                results.update(zip(spec.columns, result))
+            else:
+                results[spec.columns[0]] = result
+        return results
+
+    def apply(
+        self,
+        data: pd.DataFrame,
+        report: Optional["AllocationReport"] = None,
+        metrics: Metrics = NULL_METRICS,
+    ) -> pd.DataFrame:
+        """
+        Returns ``data`` with the plan's indicator columns appended.
+
+        The caller's frame is not modified. Inputs that are already
+        contiguous float64 are handed to TA-Lib as views; only other dtypes
+        (e.g. integer volume) are converted. All outputs are joined in a
+        single concat instead of one column insert per indicator.
+
+        Args:
+            data: OHLCV DataFrame; column names are case-insensitive.
+            report: Optional AllocationReport filled with the bytes this call
+                    allocated.
+            metrics: Recorder for the compute time of each indicator.
+
+        Returns:
+            DataFrame with new indicator columns.
+        """
+        if not self.specs:
+            return data
+
+        # Map lower-case names to the frame's own labels instead of copying
+        # the frame just to rename its columns
+        # TA-Lib expects: 'open', 'high', 'low', 'close', 'volume'
+        lowered = {str(c).lower(): c for c in data.columns}
+
+        inputs = {}
+        input_bytes = 0
+        for column in self.inputs:
+            values = data[lowered[column]].to_numpy()
+            inputs[column] = np.ascontiguousarray(values, dtype=np.float64)
+            if not np.shares_memory(inputs[column], values):
+                input_bytes += inputs[column].nbytes
+
+        results = self.compute(inputs, metrics)
+        if report is not None:
+            report.input_bytes = input_bytes
+            report.output_bytes = sum(r.nbytes for r in results.values())
+        if not results:
+            return data
+
+        block = pd.DataFrame(results, index=data.index, copy=False)
+        # Recomputed columns replace earlier ones rather than duplicating them
+        existing = [c for c in block.columns if c in data.columns]
+        if existing:
+            data = data.drop(columns=existing)
+        return pd.concat([data, block], axis=1, copy=False)
+
+
+class AllocationReport:
+    """
+    Bytes allocated by one ``IndicatorPlan.apply`` call.
+
+    ``input_bytes`` counts OHLCV columns that had to be converted to float64
+    (zero when every input was already contiguous float64); ``output_bytes``
+    counts the arrays TA-Lib returned.
+    """
+
+    __slots__ = ("input_bytes", "output_bytes")
+
+    def __init__(self):
+        self.input_bytes = 0
+        self.output_bytes = 0
+
+    @property
+    def total_bytes(self) -> int:
+        return self.input_bytes + self.output_bytes
+
+    def __repr__(self) -> str:
+        return (
+            f"AllocationReport(input_bytes={self.input_bytes}, "
+            f"output_bytes={self.output_bytes})"
+        )
+
 
 class IndicatorCalculator:
     """
     Calculates technical indicators using TA-Lib.
     """
 
-    def __init__(self):
+    def __init__(self, metrics: Optional[Metrics] = None):
+        """
+        Args:
+            metrics: Recorder for per-indicator compute time (disabled by
+                     default).
+        """
+        self.metrics = metrics or NULL_METRICS
         self._supported_indicators = self._discover_indicators()
+        # Set for O(1) validation; the list keeps TA-Lib's ordering
+        self._supported_set = frozenset(self._supported_indicators)
+        self._plan_cache: Dict[Tuple[str, ...], IndicatorPlan] = {}
+        self._info_cache: Dict[str, dict] = {}
 
     def _discover_indicators(self) -> List[str]:
         """
@@ -32,7 +304,40 @@ class IndicatorCalculator:
         """Returns a list of all supported indicator names."""
         return self._supported_indicators
 
-    def add_indicators(self, data: pd.DataFrame, indicators: List[str]) -> pd.DataFrame:
+    def compile(self, indicators: List[str]) -> IndicatorPlan:
+        """
+        Parses and validates an indicator list once into a reusable plan.
+
+        Plans are cached per indicator list, so repeated calls (e.g. one per
+        ticker) are a dictionary lookup.
+
+        Args:
+            indicators: List of strings (e.g., ['SMA_50', 'RSI', 'HT_SINE']).
+
+        Returns:
+            The compiled IndicatorPlan. Unknown or unusable indicators are
+            logged once and listed in ``plan.invalid``.
+        """
+        key = tuple(indicators)
+        plan = self._plan_cache.get(key)
+        if plan is None:
+            specs, invalid = [], []
+            for ind_name in indicators:
+                spec = self._resolve(ind_name)
+                if spec is None:
+                    invalid.append(ind_name)
+                else:
+                    specs.append(spec)
+            plan = IndicatorPlan(specs, invalid)
+            self._plan_cache[key] = plan
+        return plan
+
+    def add_indicators(
+        self,
+        data: pd.DataFrame,
+        indicators: List[str],
+        report: Optional[AllocationReport] = None,
+    ) -> pd.DataFrame:
         """
         Appends technical indicators to the dataframe.
 
@@ -40,84 +345,286 @@ class IndicatorCalculator:
             data: OHLCV DataFrame with columns ['open', 'high', 'low',
                   'close', 'volume'].
                   Column names are case-insensitive.
-            indicators: List of strings (e.g., ['SMA', 'RSI']).
-                        Can also specify parameters if we implement parsing logic later,
-                        but for now assumes default parameters or simple names.
+            indicators: List of strings (e.g., ['SMA', 'RSI_14']). A numeric
+                        suffix sets the time period; names are resolved through
+                        a cached IndicatorPlan (see ``compile``).
+            report: Optional AllocationReport filled with the bytes allocated
+                    by this call.
 
         Returns:
             DataFrame with new indicator columns.
         """
         if not indicators:
             return data
+        return self.compile(indicators).apply(data, report, self.metrics)
 
-        # Ensure column names are lower case for TA-Lib abstract API
-        # TA-Lib expects: 'open', 'high', 'low', 'close', 'volume'
-        working_data = data.copy()
-        working_data.columns = [c.lower() for c in working_data.columns]
-
-        # We need to map back to original index if we are careful,
-        # but here we just return the modified dataframe copies.
-        # Actually, let's keep the original data columns as they were,
-        # and append new ones.
-
-        # Prepare inputs for abstract API
-        # Abstract API expects a dict of numpy arrays or a dataframe with
-        # lowercase columns
-        inputs = {
-            "open": working_data["open"].values.astype(float),
-            "high": working_data["high"].values.astype(float),
-            "low": working_data["low"].values.astype(float),
-            "close": working_data["close"].values.astype(float),
-            "volume": working_data["volume"].values.astype(float),
-        }
-
-        for ind_name in indicators:
-            ind_name_upper = ind_name.upper()
-
-            # Parse parameters first to get the base function name
-            parts = ind_name_upper.split("_")
-            func_name = parts[0]
-
-            # Basic validation
-            if func_name not in self._supported_indicators:
-                logger.warning(
-                    f"Indicator '{func_name}' (from '{ind_name}') "
-                    "not found in TA-Lib. Skipping."
-                )
-                continue
+    def _resolve(self, ind_name: str) -> Optional[IndicatorSpec]:
+        """Resolves one indicator string to an IndicatorSpec, or None."""
+        try:
+            func_name, args, kwargs = parse_indicator(ind_name)
+        except ValueError as e:
+            logger.warning(f"Indicator '{ind_name}': {e}. Skipping.")
+            return None
 
-            try:
-                # Dynamic function call
-                params = {}
+        if func_name not in self._supported_set and not args and not kwargs:
+            # Simple heuristic for single-parameter indicators (SMA_50); the
+            # whole name is tried first so underscored functions (HT_SINE)
+            # resolve
+            base, _, period = func_name.rpartition("_")
+            if base in self._supported_set and period.isdigit():
+                func_name, kwargs = base, {"timeperiod": int(period)}
 
-                if func_name not in self._supported_indicators:
-                    logger.warning(
-                        f"Indicator function '{func_name}' not found. Skipping."
-                    )
-                    continue
-
-                # Simple heuristic for single-parameter indicators (usually timeperiod)
-                if len(parts) > 1 and parts[1].isdigit():
-                    params["timeperiod"] = int(parts[1])
-
-                func = abstract.Function(func_name)
-
-                # Calculate
-                result = func(inputs, **params)
-
-                # Result can be a single array or tuple of arrays (like MACD)
-                if isinstance(result, tuple):
-                    # For multi-output indicators, we might need specific naming
-                    # e.g. MACD returns (macd, macdsignal, macdhist)
-                    # We can use the output names from the function info if available
-                    # or just append default suffixes.
-                    for i, res_array in enumerate(result):
-                        col_name = f"{ind_name}_{i}"
-                        data[col_name] = res_array
-                else:
-                    data[ind_name] = result
+        # Basic validation
+        if func_name not in self._supported_set:
+            logger.warning(
+                f"Indicator '{func_name}' (from '{ind_name}') "
+                "not found in TA-Lib. Skipping."
+            )
+            return None
+
+        info = self._function_info(func_name)
+        try:
+            params = _bind_parameters(func_name, info["parameters"], args, kwargs)
+        except ValueError as e:
+            logger.warning(f"Indicator '{ind_name}': {e}. Skipping.")
+            return None
+
+        inputs = []
+        for value in info["input_names"].values():
+            inputs.extend([value] if isinstance(value, str) else value)
+        missing = [c for c in inputs if c not in OHLCV_COLUMNS]
+        if missing:
+            logger.warning(
+                f"Indicator '{ind_name}' needs non-OHLCV input(s) "
+                f"{', '.join(missing)}. Skipping."
+            )
+            return None
+
+        # TA-Lib reports out-of-range parameters as a negative lookback
+        lookback = abstract.Function(func_name, **params).lookback
+        if lookback < 0:
+            logger.warning(
+                f"Indicator '{ind_name}': parameters {params} are out of range "
+                f"for {func_name}. Skipping."
+            )
+            return None
+
+        outputs = info["output_names"]
+        if len(outputs) == 1:
+            columns = (ind_name,)
+        else:
+            # Multi-output indicators get positional suffixes (MACD_0, MACD_1, ..)
+            columns = tuple(f"{ind_name}_{i}" for i in range(len(outputs)))
+
+        return IndicatorSpec(
+            spec=ind_name,
+            name=func_name,
+            function=getattr(talib, func_name),
+            inputs=tuple(inputs),
+            params=params,
+            columns=columns,
+            lookback=lookback,
+        )
+
+    def _function_info(self, func_name: str) -> dict:
+        """TA-Lib metadata for a function, looked up once per calculator."""
+        info = self._info_cache.get(func_name)
+        if info is None:
+            info = abstract.Function(func_name).info
+            self._info_cache[func_name] = info
+        return info
+
+
+def _measure_convergence(spec: IndicatorSpec) -> Tuple[Optional[int], bool]:
+    """
+    Probes ``spec`` on random walks of several volatilities; how fast the
+    state of adaptive indicators (KAMA, SAR) washes out depends on the data,
+    so the longest measurement counts, and the part beyond the lookback is
+    doubled as a safety margin.
+    """
+    measured, offset = spec.lookback, False
+    for seed, volatility in enumerate(_PROBE_VOLATILITIES):
+        bars, shifted = _probe(spec, seed, volatility)
+        if bars is None:
+            return None, False
+        measured, offset = max(measured, bars), offset or shifted
+    return spec.lookback + 2 * (measured - spec.lookback), offset
+
+
+def _probe(spec: IndicatorSpec, seed: int, volatility: float):
+    """
+    Runs ``spec`` over a random walk and over the same walk without its
+    first quarter, and finds the first bar from which both agree exactly
+    (within ``CONVERGENCE_TOLERANCE``) or up to a constant. The walk grows
+    until the agreement point lies well inside it.
+    """
+    size = 4096
+    while size <= _MAX_PROBE_BARS:
+        inputs = _probe_inputs(size, seed, volatility)
+        cut = size // 4
+        try:
+            full = spec.function(*(inputs[c] for c in spec.inputs), **spec.params)
+            part = spec.function(*(inputs[c][cut:] for c in spec.inputs), **spec.params)
+        except Exception as e:
+            logger.debug(f"Cannot probe {spec.spec}: {e}")
+            return spec.lookback, False
+        if not isinstance(full, (tuple, list)):
+            full, part = (full,), (part,)
+
+        exact, shifted = 0, 0
+        for whole, suffix in zip(full, part):
+            whole = np.asarray(whole, dtype=np.float64)[cut:]
+            suffix = np.asarray(suffix, dtype=np.float64)
+            finite = np.isfinite(whole)
+            scale = np.abs(whole[finite]).max() if finite.any() else 1.0
+            tolerance = CONVERGENCE_TOLERANCE * max(scale, 1e-300)
+            exact = max(exact, _settled(whole, suffix, tolerance))
+            both = np.flatnonzero(finite & np.isfinite(suffix))
+            offset = whole[both[-1]] - suffix[both[-1]] if len(both) else 0.0
+            shifted = max(shifted, _settled(whole, suffix + offset, tolerance))
+
+        # Agreement over the second half of the suffix at least
+        limit = (size - cut) // 2
+        if exact < limit:
+            return exact, False
+        if shifted < limit:
+            return shifted, True
+        size *= 4
+    return None, False
+
+
+def _settled(whole: np.ndarray, suffix: np.ndarray, tolerance: float) -> int:
+    """Index from which both outputs agree within ``tolerance`` (NaN = NaN)."""
+    with np.errstate(invalid="ignore"):
+        apart = np.abs(whole - suffix) > tolerance
+    apart |= np.isnan(whole) != np.isnan(suffix)
+    positions = np.flatnonzero(apart)
+    return int(positions[-1]) + 1 if len(positions) else 0
+
+
+def _probe_inputs(size: int, seed: int, volatility: float) -> Dict[str, np.ndarray]:
+    """Deterministic, consistent OHLCV random walk for convergence probes."""
+    rng = np.random.default_rng(seed)
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0.0, volatility, size)))
+    open_ = close * (1.0 + rng.normal(0.0, 0.002, size))
+    high = np.maximum(open_, close) * (1.0 + rng.uniform(0.0, 0.01, size))
+    low = np.minimum(open_, close) * (1.0 - rng.uniform(0.0, 0.01, size))
+    volume = rng.integers(100, 10_000, size).astype(np.float64)
+    return {"open": open_, "high": high, "low": low, "close": close, "volume": volume}
+
+
+def parse_indicator(spec: str) -> Tuple[str, List[float], Dict[str, float]]:
+    """
+    Parses one indicator spec into (upper-case name, positional args, keyword
+    args). Parameter names are not validated here.
+
+    Example: 'MACD(12, 26, signal=9)' -> ('MACD', [12, 26], {'signal': 9}).
+
+    Raises:
+        ValueError: If the spec is malformed.
+    """
+    match = _SPEC_PATTERN.match(spec.strip())
+    if not match:
+        raise ValueError(f"cannot parse '{spec}'")
+
+    name, arg_text = match.group(1).upper(), match.group(2)
+    args: List[float] = []
+    kwargs: Dict[str, float] = {}
+    if arg_text is None or not arg_text.strip():
+        return name, args, kwargs
+
+    for part in arg_text.split(","):
+        key, sep, value = part.partition("=")
+        if not sep:
+            key, value = "", key
+        key, value = key.strip().lower(), _parse_number(value.strip())
+        if not key:
+            if kwargs:
+                raise ValueError("positional argument after keyword argument")
+            args.append(value)
+        elif key in kwargs:
+            raise ValueError(f"parameter '{key}' given twice")
+        else:
+            kwargs[key] = value
+    return name, args, kwargs
+
+
+def split_indicators(text: str) -> List[str]:
+    """
+    Splits a comma-separated indicator list, keeping commas inside
+    parentheses: 'SMA_50,MACD(12,26,9)' -> ['SMA_50', 'MACD(12,26,9)'].
+    """
+    specs, current, depth = [], [], 0
+    for char in text:
+        if char == "," and depth == 0:
+            specs.append("".join(current))
+            current = []
+            continue
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth = max(0, depth - 1)
+        current.append(char)
+    specs.append("".join(current))
+    return [s.strip() for s in specs if s.strip()]
+
+
+def _bind_parameters(
+    func_name: str,
+    defaults: Dict[str, float],
+    args: List[float],
+    kwargs: Dict[str, float],
+) -> Dict[str, float]:
+    """
+    Maps positional and keyword arguments onto a TA-Lib function's parameters.
+
+    Keywords may be abbreviated to an unambiguous prefix, ignoring
+    underscores ('fast' -> 'fastperiod', 'fastk' -> 'fastk_period').
+    """
+    names = list(defaults)
+    if len(args) > len(names):
+        raise ValueError(
+            f"{func_name} takes at most {len(names)} parameter(s), got {len(args)}"
+        )
+
+    params = dict(zip(names, args))
+    for key, value in kwargs.items():
+        name = _match_parameter(func_name, names, key)
+        if name in params:
+            raise ValueError(f"parameter '{name}' given twice")
+        params[name] = value
+
+    # TA-Lib wants ints for periods/MA types and floats for the rest
+    for name, value in params.items():
+        if isinstance(defaults[name], int):
+            if value != int(value):
+                raise ValueError(f"{name} must be an integer, got {value}")
+            params[name] = int(value)
+        else:
+            params[name] = float(value)
+    return params
+
+
+def _match_parameter(func_name: str, names: List[str], key: str) -> str:
+    if key in names:
+        return key
+    wanted = key.replace("_", "")
+    candidates = [n for n in names if n.replace("_", "").startswith(wanted)]
+    if len(candidates) == 1:
+        return candidates[0]
+    if candidates:
+        raise ValueError(
+            f"'{key}' is ambiguous for {func_name} ({', '.join(candidates)})"
+        )
+    raise ValueError(f"{func_name} has no parameter '{key}'")
 
-            except Exception as e:
-                logger.error(f"Failed to calculate {ind_name}: {e}")
 
-        return data
+def _parse_number(value: str) -> float:
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"'{value}' is not a number") from None
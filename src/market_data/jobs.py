@@ -0,0 +1,393 @@
+import json
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from market_data.buffers import BarBuffer
+from market_data.cache import ns_to_timestamps, timestamps_to_ns
+
+logger = logging.getLogger("rich")
+
+# Ticker states in the manifest
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# Spooled page entry holding the page's next_page_token
+TOKEN_KEY = "_next_page_token"
+
+
+class JobManifest:
+    """
+    Persistent record of a multi-ticker run: the run's parameters and, per
+    ticker, its state, output file, last error, attempt count and the page
+    token to resume its download from.
+
+    Every state change is written straight to disk (temp file, then
+    rename), so the manifest survives a crash at any point and is never
+    half-written. Page tokens are only written along with the next state
+    change; the page spool (see ``PageCheckpoint``) is their durable copy.
+    """
+
+    def __init__(self, path: str, params: Dict[str, Any]):
+        """
+        Args:
+            path: Manifest file (JSON). An existing manifest is resumed.
+            params: Parameters of the run (timeframe, dates, indicators, ...).
+                    Resuming with different parameters raises ValueError,
+                    since the finished files would not match the new run.
+        """
+        self.path = Path(path)
+        self.params = params
+        self.tickers: Dict[str, Dict[str, Any]] = {}
+
+        if self.path.exists():
+            with open(self.path) as f:
+                data = json.load(f)
+            if data["params"] != params:
+                raise ValueError(
+                    f"{self.path} belongs to a run with different parameters "
+                    f"({data['params']}); use another manifest file"
+                )
+            self.tickers = data["tickers"]
+
+    def add(self, tickers: List[str]) -> None:
+        """Registers tickers that are not in the manifest yet as pending."""
+        for ticker in tickers:
+            self.tickers.setdefault(
+                ticker,
+                {
+                    "status": PENDING,
+                    "path": None,
+                    "error": None,
+                    "attempts": 0,
+                    "page_token": None,
+                },
+            )
+        self.save()
+
+    def status(self, ticker: str) -> str:
+        return self.tickers[ticker]["status"]
+
+    def todo(self, tickers: List[str], only_failed: bool = False) -> List[str]:
+        """
+        The tickers still to process, in input order: everything not done
+        (pending, interrupted while running, failed), or only the failed
+        ones.
+        """
+        if only_failed:
+            return [t for t in tickers if self.status(t) == FAILED]
+        return [t for t in tickers if self.status(t) != DONE]
+
+    def outputs(self) -> Dict[str, str]:
+        """Files produced by finished tickers."""
+        return {
+            ticker: entry["path"]
+            for ticker, entry in self.tickers.items()
+            if entry["status"] == DONE and entry["path"]
+        }
+
+    def failed(self) -> Dict[str, str]:
+        """Failed tickers and their last error."""
+        return {
+            ticker: entry["error"]
+            for ticker, entry in self.tickers.items()
+            if entry["status"] == FAILED
+        }
+
+    def start(self, ticker: str) -> None:
+        entry = self.tickers[ticker]
+        entry.update(status=RUNNING, attempts=entry["attempts"] + 1)
+        self.save()
+
+    def finish(self, ticker: str, path: Optional[Path]) -> None:
+        self.tickers[ticker].update(
+            status=DONE,
+            path=str(path) if path else None,
+            error=None,
+            page_token=None,
+        )
+        self.save()
+
+    def fail(self, ticker: str, error: Exception) -> None:
+        self.tickers[ticker].update(
+            status=FAILED, error=f"{type(error).__name__}: {error}"
+        )
+        self.save()
+
+    def set_page_token(self, ticker: str, token: Optional[str]) -> None:
+        # Not saved per page: a manifest rewrite for every page would cost
+        # more than the page itself on long downloads
+        self.tickers[ticker]["page_token"] = token
+
+    def save(self) -> None:
+        payload = {
+            "updated": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "params": self.params,
+            "tickers": self.tickers,
+        }
+        tmp_path = Path(f"{self.path}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(payload, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+
+class PageCheckpoint:
+    """
+    Resume point of one ticker's download.
+
+    Every fetched page is spooled to ``<directory>/<n>.npz`` together with
+    its ``next_page_token``, in one atomic write, so a restarted run reloads
+    the spooled pages and continues from the token instead of downloading
+    the ticker again from its first page. The token is mirrored into the
+    manifest for inspection. The spool directory is only listed once; the
+    page count and last token are then kept in memory.
+    """
+
+    def __init__(self, manifest: JobManifest, ticker: str, directory: Path):
+        self.manifest = manifest
+        self.ticker = ticker
+        self.directory = Path(directory)
+        self._count: Optional[int] = None
+        self._token: Optional[str] = None
+
+    @property
+    def token(self) -> Optional[str]:
+        """Page token to continue from (None: start from the first page)."""
+        self._scan()
+        return self._token
+
+    @property
+    def complete(self) -> bool:
+        """True when the last page was spooled (nothing left to download)."""
+        self._scan()
+        return self._count > 0 and self._token is None
+
+    def load(self) -> Dict[str, BarBuffer]:
+        """Bars of the pages spooled so far, per symbol."""
+        buffers: Dict[str, BarBuffer] = {}
+        for page in self._pages():
+            with np.load(page) as npz:
+                columns = {f: npz[f] for f in npz.files if f != TOKEN_KEY}
+            if not columns:
+                continue
+            columns["t"] = ns_to_timestamps(columns["t"])
+            chunk = BarBuffer.from_columns(columns)
+            if self.ticker in buffers:
+                buffers[self.ticker].extend_buffer(chunk)
+            else:
+                buffers[self.ticker] = chunk
+        return buffers
+
+    def save_page(
+        self, bars: Dict[str, BarBuffer], next_page_token: Optional[str]
+    ) -> None:
+        """Spools one page of this ticker's bars and its next page token."""
+        columns = {}
+        chunk = bars.get(self.ticker)
+        if chunk:
+            columns = {f: chunk.column(f) for f in chunk.fields}
+            columns["t"] = timestamps_to_ns(columns["t"])
+
+        self._scan()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{self._count:06d}.npz"
+        tmp_path = path.with_suffix(".tmp.npz")
+        np.savez(tmp_path, **{TOKEN_KEY: np.array(next_page_token or "")}, **columns)
+        os.replace(tmp_path, path)
+        self._count += 1
+        self._token = next_page_token or None
+        self.manifest.set_page_token(self.ticker, next_page_token)
+
+    def clear(self) -> None:
+        """Drops the spooled pages once the ticker is finished."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self._count, self._token = 0, None
+
+    def _scan(self) -> None:
+        """Reads the page count and last token from the spool, once."""
+        if self._count is not None:
+            return
+        pages = self._pages()
+        self._count, self._token = len(pages), None
+        if pages:
+            with np.load(pages[-1]) as npz:
+                self._token = str(npz[TOKEN_KEY]) or None
+
+    def _pages(self) -> List[Path]:
+        if not self.directory.exists():
+            return []
+        return sorted(p for p in self.directory.glob("*.npz") if ".tmp" not in p.name)
+
+
+class JobRunner:
+    """
+    Runs a ticker list through ``StockDataPipeline`` and records progress in
+    a ``JobManifest``, so an interrupted run (crash, outage, Ctrl-C) resumes
+    where it stopped: finished tickers are skipped, and with one ticker per
+    batch the ticker that was downloading continues from its last page
+    token. Larger batches (and ``arun``'s concurrent batches) are
+    checkpointed per ticker as their results arrive, and an interrupted
+    batch is fetched again for its unfinished tickers.
+    """
+
+    def __init__(self, pipeline, manifest: JobManifest):
+        """
+        Args:
+            pipeline: ``StockDataPipeline`` doing the work.
+            manifest: Progress record; page spools live next to it in
+                      ``<manifest>.pages/``.
+        """
+        self.pipeline = pipeline
+        self.manifest = manifest
+        self.spool_dir = Path(f"{manifest.path}.pages")
+
+    def run(
+        self,
+        tickers: List[str],
+        timeframe: str,
+        start_date: str,
+        end_date: Optional[str] = None,
+        indicators: Optional[List[str]] = None,
+        only_failed: bool = False,
+        append: bool = False,
+        batch_size: int = 1,
+    ) -> Iterator[Tuple[str, Optional[Path], Optional[Exception]]]:
+        """
+        Processes every ticker that is not done yet.
+
+        Args:
+            tickers: Stock symbols of the run.
+            timeframe: Alpaca timeframe string (e.g. '1Day', '15Min').
+            start_date: ISO start date string (YYYY-MM-DD).
+            end_date: ISO end date string.
+            indicators: List of indicator strings (e.g. 'SMA_50').
+            only_failed: Only rerun the tickers that failed before.
+            append: Passed to ``process_ticker``; appends run one ticker at a
+                    time.
+            batch_size: Symbols per request chain (``process_tickers``). With
+                        1, every ticker's download is checkpointed page by
+                        page.
+
+        Yields:
+            (ticker, path, error) for every ticker processed in this run.
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+
+        todo = self._todo(tickers, only_failed)
+        if batch_size == 1 or append:
+            for ticker in todo:
+                yield self._run_ticker(
+                    ticker, timeframe, start_date, end_date, indicators, append
+                )
+            return
+
+        for i in range(0, len(todo), batch_size):
+            batch = todo[i : i + batch_size]
+            for ticker in batch:
+                self.manifest.start(ticker)
+            for ticker, path, error in self.pipeline.process_tickers(
+                batch, timeframe, start_date, end_date, indicators, len(batch)
+            ):
+                yield self._record(ticker, path, error)
+
+    async def arun(
+        self,
+        tickers: List[str],
+        timeframe: str,
+        start_date: str,
+        end_date: Optional[str] = None,
+        indicators: Optional[List[str]] = None,
+        only_failed: bool = False,
+        batch_size: int = 1,
+        max_concurrency: int = 8,
+        per_host_limit: Optional[int] = None,
+    ) -> AsyncIterator[Tuple[str, Optional[Path], Optional[Exception]]]:
+        """
+        Concurrent variant of ``run``, through ``aprocess_tickers``.
+
+        Args:
+            tickers: Stock symbols of the run.
+            timeframe: Alpaca timeframe string (e.g. '1Day', '15Min').
+            start_date: ISO start date string (YYYY-MM-DD).
+            end_date: ISO end date string.
+            indicators: List of indicator strings (e.g. 'SMA_50').
+            only_failed: Only rerun the tickers that failed before.
+            batch_size: Number of symbols per request chain.
+            max_concurrency: Maximum number of requests in flight.
+            per_host_limit: Maximum number of requests in flight per host.
+
+        Yields:
+            (ticker, path, error) for every ticker processed in this run, in
+            completion order.
+        """
+        todo = self._todo(tickers, only_failed)
+        for ticker in todo:
+            self.manifest.start(ticker)
+        async for ticker, path, error in self.pipeline.aprocess_tickers(
+            todo,
+            timeframe,
+            start_date,
+            end_date,
+            indicators,
+            batch_size=batch_size,
+            max_concurrency=max_concurrency,
+            per_host_limit=per_host_limit,
+        ):
+            yield self._record(ticker, path, error)
+
+    def _todo(self, tickers: List[str], only_failed: bool) -> List[str]:
+        """Registers the tickers and returns the ones this run has to do."""
+        self.manifest.add(tickers)
+        todo = self.manifest.todo(tickers, only_failed)
+        if len(todo) < len(tickers):
+            logger.info(
+                f"Resuming {self.manifest.path}: {len(tickers) - len(todo)} "
+                f"tickers skipped, {len(todo)} to go"
+            )
+        return todo
+
+    def _run_ticker(
+        self,
+        ticker: str,
+        timeframe: str,
+        start_date: str,
+        end_date: Optional[str],
+        indicators: Optional[List[str]],
+        append: bool,
+    ) -> Tuple[str, Optional[Path], Optional[Exception]]:
+        """Processes one ticker with its download checkpointed per page."""
+        checkpoint = PageCheckpoint(self.manifest, ticker, self.spool_dir / ticker)
+        self.manifest.start(ticker)
+        try:
+            path = self.pipeline.process_ticker(
+                ticker,
+                timeframe,
+                start_date,
+                end_date,
+                indicators,
+                append=append,
+                checkpoint=checkpoint,
+            )
+        except Exception as e:
+            return self._record(ticker, None, e)
+        checkpoint.clear()
+        return self._record(ticker, path, None)
+
+    def _record(
+        self, ticker: str, path: Optional[Path], error: Optional[Exception]
+    ) -> Tuple[str, Optional[Path], Optional[Exception]]:
+        """Stores one ticker's outcome in the manifest."""
+        if error is not None:
+            logger.error(f"Failed to process {ticker}: {error}")
+            self.manifest.fail(ticker, error)
+        else:
+            self.manifest.finish(ticker, path)
+        return ticker, path, error
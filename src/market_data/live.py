@@ -0,0 +1,435 @@
+import asyncio
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+from market_data import ratelimit
+from market_data.buffers import BAR_FIELDS, BarBuffer
+from market_data.exporters import BarExporter, StreamWriter, get_exporter
+
+logger = logging.getLogger("rich")
+
+STREAM_URL = "wss://stream.data.alpaca.markets/v2/{feed}"
+
+# Trade message field -> (column dtype, fill value)
+TRADE_FIELDS = {
+    "t": (object, None),
+    "p": (np.float64, np.nan),
+    "s": (np.int64, 0),
+}
+TRADE_COLUMN_NAMES = {"t": "date", "p": "price", "s": "size"}
+
+# Stream message type -> channel name used in subscriptions and file names
+CHANNELS = {"b": "bars", "t": "trades"}
+
+# Error codes that retrying will not fix (auth failed / not authorised)
+_FATAL_ERRORS = {401, 402, 404, 409}
+
+# Largest stream message accepted; Alpaca's batches are a few KB, so a
+# bigger one is a broken or hostile peer rather than market data
+MAX_MESSAGE_SIZE = 1024 * 1024
+
+
+class StreamAuthError(Exception):
+    """The stream rejected the credentials or subscription (not retried)."""
+
+
+class StreamError(Exception):
+    """The stream reported a recoverable error (the ingestor reconnects)."""
+
+
+class RingBuffer:
+    """
+    Fixed-capacity columnar ring of stream messages for one symbol.
+
+    Messages are written straight into per-field NumPy arrays; ``drain``
+    hands the buffered rows over in arrival order and empties the ring.
+    """
+
+    def __init__(self, fields: Dict[str, tuple], capacity: int):
+        self.fields = fields
+        self.capacity = capacity
+        self._columns = {
+            f: np.full(capacity, fill, dtype=dtype)
+            for f, (dtype, fill) in fields.items()
+        }
+        self._head = 0
+        self._size = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def full(self) -> bool:
+        return self._size == self.capacity
+
+    def append(self, message: Mapping) -> None:
+        """
+        Stores one message, overwriting the oldest one when full.
+
+        Raises:
+            ValueError, TypeError: If a field does not convert to its
+                                   column's dtype (nothing is stored).
+        """
+        # Converted before writing, so a bad field can't leave a half-written
+        # row over the oldest one
+        row = [
+            values.dtype.type(message.get(field, self.fields[field][1]))
+            for field, values in self._columns.items()
+        ]
+        index = (self._head + self._size) % self.capacity
+        for values, value in zip(self._columns.values(), row):
+            values[index] = value
+        if self._size < self.capacity:
+            self._size += 1
+        else:
+            self._head = (self._head + 1) % self.capacity
+            self.dropped += 1
+
+    def drain(self) -> Dict[str, np.ndarray]:
+        """Returns (copies of) the buffered rows, oldest first, and empties."""
+        order = (self._head + np.arange(self._size)) % self.capacity
+        rows = {f: values[order] for f, values in self._columns.items()}
+        self._head = 0
+        self._size = 0
+        return rows
+
+
+class LiveIngestor:
+    """
+    Subscribes to Alpaca's real-time bars/trades stream and writes the
+    messages to the pipeline's output formats in micro-batches.
+
+    Incoming messages go into per-symbol ring buffers; a flusher drains them
+    every ``flush_interval`` seconds (or as soon as a ring fills up) and
+    appends the batch to ``<SYMBOL>_<channel>_live<ext>`` on a writer thread.
+    With ``overflow="block"`` the reader stops reading the socket while a
+    full ring is flushed, so a slow disk pushes back on the server instead of
+    losing data; ``overflow="drop_oldest"`` keeps reading and overwrites.
+    Dropped connections are re-established with jittered backoff.
+    """
+
+    def __init__(
+        self,
+        symbols: List[str],
+        output_dir: str = "data",
+        output_format: str = "csv",
+        exporter: Optional[BarExporter] = None,
+        channels: Tuple[str, ...] = ("bars",),
+        url: Optional[str] = None,
+        feed: str = "iex",
+        flush_interval: float = 1.0,
+        capacity: int = 10_000,
+        overflow: str = "block",
+        max_reconnects: Optional[int] = None,
+        idle_timeout: Optional[float] = None,
+        max_message_size: int = MAX_MESSAGE_SIZE,
+    ):
+        """
+        Args:
+            symbols: Symbols to subscribe to.
+            output_dir: Directory for the live output files.
+            output_format: Output format name ('csv', 'parquet', 'feather').
+            exporter: Explicit exporter instance (overrides output_format).
+            channels: Stream channels to subscribe to ('bars', 'trades').
+            url: Stream URL (defaults to Alpaca's endpoint for ``feed``).
+            feed: Market data feed ("iex" or "sip").
+            flush_interval: Seconds between flushes of the ring buffers.
+            capacity: Messages buffered per symbol and channel.
+            overflow: "block" (backpressure) or "drop_oldest".
+            max_reconnects: Give up after this many consecutive failed
+                            connections (None retries forever).
+            idle_timeout: Reconnect when no message arrives for this many
+                          seconds (None waits forever).
+            max_message_size: Largest stream message in bytes; a bigger one
+                              drops the connection.
+        """
+        if overflow not in ("block", "drop_oldest"):
+            raise ValueError("overflow must be 'block' or 'drop_oldest'")
+        unknown = set(channels) - set(CHANNELS.values())
+        if unknown:
+            raise ValueError(f"Unknown channel(s): {', '.join(sorted(unknown))}")
+
+        load_dotenv()
+        self.api_key = os.getenv("APCA_API_KEY_ID")
+        self.secret_key = os.getenv("APCA_API_SECRET_KEY")
+        if not self.api_key or not self.secret_key:
+            raise ValueError(
+                "Missing Alpaca API credentials. Please set APCA_API_KEY_ID "
+                "and APCA_API_SECRET_KEY."
+            )
+
+        self.symbols = symbols
+        self.channels = channels
+        self.url = url or STREAM_URL.format(feed=feed)
+        self.exporter = exporter or get_exporter(output_format)
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = flush_interval
+        self.capacity = capacity
+        self.overflow = overflow
+        self.max_reconnects = max_reconnects
+        self.idle_timeout = idle_timeout
+        self.max_message_size = max_message_size
+        self._websockets = _import_websockets()
+
+        self.stats = dict.fromkeys(
+            [
+                "messages",
+                "bars",
+                "trades",
+                "dropped",
+                "invalid",
+                "flushes",
+                "reconnects",
+            ],
+            0,
+        )
+        self._rings: Dict[Tuple[str, str], RingBuffer] = {}
+        self._writers: Dict[Tuple[str, str], StreamWriter] = {}
+        self._stop: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        # One writer thread keeps file appends ordered and off the event loop
+        self._write_pool = ThreadPoolExecutor(max_workers=1)
+
+    def stop(self) -> None:
+        """Asks a running ``run`` to flush and return."""
+        if self._stop is not None:
+            self._stop.set()
+
+    async def run(self, duration: Optional[float] = None) -> Dict[str, int]:
+        """
+        Ingests until ``stop()`` is called or ``duration`` seconds pass.
+
+        Returns:
+            Counters: messages, bars, trades, dropped, invalid (malformed
+            messages skipped), flushes, reconnects.
+        """
+        self._stop = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        consumer = asyncio.create_task(self._consume())
+        flusher = asyncio.create_task(self._flush_periodically())
+        stopper = asyncio.create_task(self._stop.wait())
+        try:
+            await asyncio.wait(
+                {consumer, stopper},
+                timeout=duration,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+        finally:
+            for task in (consumer, flusher, stopper):
+                task.cancel()
+            outcomes = await asyncio.gather(
+                consumer, flusher, stopper, return_exceptions=True
+            )
+            await self.flush()
+            await asyncio.get_running_loop().run_in_executor(
+                self._write_pool, self._close_writers
+            )
+
+        # Surface fatal consumer errors (e.g. rejected credentials)
+        if isinstance(outcomes[0], Exception):
+            raise outcomes[0]
+        return dict(self.stats)
+
+    async def flush(self) -> None:
+        """Drains every ring buffer and appends the rows to the output files."""
+        async with self._flush_lock:
+            batches = {
+                key: ring.drain() for key, ring in self._rings.items() if len(ring)
+            }
+            if not batches:
+                return
+            await asyncio.get_running_loop().run_in_executor(
+                self._write_pool, self._write_batches, batches
+            )
+            self.stats["flushes"] += 1
+
+    async def _consume(self) -> None:
+        websockets = self._websockets
+        retryable = (
+            OSError,
+            asyncio.TimeoutError,
+            websockets.exceptions.WebSocketException,
+            StreamError,
+        )
+        failures = 0
+        while True:
+            try:
+                ws = await websockets.asyncio.client.connect(
+                    self.url, max_size=self.max_message_size
+                )
+            except retryable as e:
+                failures = await self._backoff(failures, e)
+                continue
+
+            try:
+                await self._subscribe(ws)
+                failures = 0
+                while True:
+                    # Raw bytes: a frame of invalid UTF-8 is then one rejected
+                    # message rather than a failed connection
+                    raw = await asyncio.wait_for(
+                        ws.recv(decode=False), self.idle_timeout
+                    )
+                    await self._handle(raw)
+            except retryable as e:
+                failures = await self._backoff(failures, e)
+            finally:
+                await ws.close()
+
+    async def _subscribe(self, ws) -> None:
+        await self._expect(ws, "connected")
+        await ws.send(
+            json.dumps(
+                {"action": "auth", "key": self.api_key, "secret": self.secret_key}
+            )
+        )
+        await self._expect(ws, "authenticated")
+        request = {"action": "subscribe"}
+        request.update({channel: self.symbols for channel in self.channels})
+        await ws.send(json.dumps(request))
+        logger.info(f"Subscribed to {', '.join(self.channels)} for {self.symbols}")
+
+    async def _expect(self, ws, msg: str) -> None:
+        """Reads control messages until a success message ``msg`` arrives."""
+        while True:
+            for message in self._decode(await ws.recv(decode=False)):
+                if not isinstance(message, dict):
+                    self._reject(message, TypeError("expected a JSON object"))
+                    continue
+                if message.get("T") == "error":
+                    code = message.get("code")
+                    error = f"Stream error {code}: {message.get('msg')}"
+                    if code in _FATAL_ERRORS:
+                        raise StreamAuthError(error)
+                    raise StreamError(error)
+                if message.get("T") == "success" and message.get("msg") == msg:
+                    return
+
+    async def _handle(self, raw: Union[str, bytes]) -> None:
+        """Decodes one websocket message (a JSON array) and dispatches it."""
+        await self._dispatch(self._decode(raw))
+
+    def _decode(self, raw: Union[str, bytes]) -> List:
+        """
+        Parses one websocket message as a JSON array.
+
+        Returns:
+            The array's items, or an empty list (after ``_reject``) when the
+            message is not valid UTF-8, not JSON or not an array.
+        """
+        try:
+            messages = json.loads(raw)
+        except ValueError as e:
+            # Includes UnicodeDecodeError for invalid UTF-8 bytes
+            self._reject(raw, e)
+            return []
+        if not isinstance(messages, list):
+            self._reject(raw, TypeError("expected a JSON array"))
+            return []
+        return messages
+
+    async def _dispatch(self, messages: List[dict]) -> None:
+        stats = self.stats
+        for message in messages:
+            try:
+                channel = CHANNELS.get(message.get("T"))
+                if channel is None:
+                    if message.get("T") == "error":
+                        logger.error(f"Stream error: {message}")
+                    continue
+                key = (message["S"], channel)
+            except (AttributeError, KeyError, TypeError) as e:
+                self._reject(message, e)
+                continue
+
+            ring = self._rings.get(key)
+            if ring is None:
+                fields = BAR_FIELDS if channel == "bars" else TRADE_FIELDS
+                ring = self._rings[key] = RingBuffer(fields, self.capacity)
+            overwrite = ring.full()
+            if overwrite and self.overflow == "block":
+                # Backpressure: stop reading the socket until flushed
+                await self.flush()
+                overwrite = False
+            try:
+                ring.append(message)
+            except (TypeError, ValueError) as e:
+                self._reject(message, e)
+                continue
+            stats["dropped"] += overwrite
+            stats["messages"] += 1
+            stats[channel] += 1
+
+    def _reject(self, message, error: Exception) -> None:
+        """Logs and counts a malformed message instead of dropping the stream."""
+        self.stats["invalid"] += 1
+        logger.warning(
+            f"Skipping malformed stream message ({type(error).__name__}: "
+            f"{error}): {str(message)[:200]}"
+        )
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def _backoff(self, failures: int, error: Exception) -> int:
+        failures += 1
+        self.stats["reconnects"] += 1
+        if self.max_reconnects is not None and failures > self.max_reconnects:
+            raise ConnectionError(
+                f"Giving up after {failures} failed connections"
+            ) from error
+        delay = ratelimit.backoff_delay(failures, base=0.5, cap=30.0)
+        logger.warning(f"Stream disconnected ({error}); reconnecting in {delay:.1f}s")
+        await asyncio.sleep(delay)
+        return failures
+
+    def _write_batches(
+        self, batches: Dict[Tuple[str, str], Dict[str, np.ndarray]]
+    ) -> None:
+        for (symbol, channel), rows in batches.items():
+            if channel == "bars":
+                frame = BarBuffer.from_columns(rows).to_frame()
+            else:
+                frame = pd.DataFrame(rows).rename(columns=TRADE_COLUMN_NAMES)
+
+            writer = self._writers.get((symbol, channel))
+            if writer is None:
+                path = self.output_dir / (
+                    f"{symbol}_{channel}_live{self.exporter.extension}"
+                )
+                # Appending keeps the rows of an earlier run of the ingestor
+                writer = self._writers[(symbol, channel)] = self.exporter.open_stream(
+                    path, append=True
+                )
+            writer.write(frame)
+
+    def _close_writers(self) -> None:
+        for writer in self._writers.values():
+            writer.close()
+        self._writers = {}
+
+
+def _import_websockets():
+    """Imports websockets (optional dependency) with a helpful error message."""
+    try:
+        import websockets
+        import websockets.asyncio.client
+        import websockets.asyncio.server
+        import websockets.exceptions
+    except ImportError as e:
+        raise ImportError(
+            "Live ingestion requires the optional websockets package. "
+            "Install it with `poetry install --extras live`."
+        ) from e
+    return websockets
@@ -0,0 +1,250 @@
+import math
+from datetime import date, time, timedelta
+from functools import lru_cache
+from typing import Dict, FrozenSet, Tuple
+
+import pandas as pd
+
+from market_data.timeframes import parse_timeframe
+
+EXCHANGE_TZ = "America/New_York"
+
+REGULAR_OPEN = time(9, 30)
+REGULAR_CLOSE = time(16, 0)
+EARLY_CLOSE = time(13, 0)
+# Alpaca intraday bars also cover the pre/post market
+EXTENDED_OPEN = time(4, 0)
+EXTENDED_CLOSE = time(20, 0)
+EXTENDED_EARLY_CLOSE = time(17, 0)
+
+# One-off closures that no rule predicts (weather, national days of mourning)
+SPECIAL_CLOSURES: FrozenSet[date] = frozenset(
+    [
+        date(2001, 9, 11),
+        date(2001, 9, 12),
+        date(2001, 9, 13),
+        date(2001, 9, 14),
+        date(2004, 6, 11),
+        date(2007, 1, 2),
+        date(2012, 10, 29),
+        date(2012, 10, 30),
+        date(2018, 12, 5),
+        date(2025, 1, 9),
+    ]
+)
+
+# Session bounds as UTC epoch nanoseconds
+Session = Tuple[int, int]
+
+
+class TradingCalendar:
+    """
+    Offline NYSE trading calendar.
+
+    Holidays and 1 p.m. early closes are derived from the exchange's rules
+    (observed-date shifts, Good Friday, Juneteenth from 2022) plus a bundled
+    list of special closures, so no network access or extra package is
+    needed. Used to turn "N bars before start" into a fetch start timestamp.
+    """
+
+    def __init__(self, extended_hours: bool = False):
+        """
+        Args:
+            extended_hours: Count pre/post-market (4:00-20:00 ET) bar slots
+                            instead of the regular session only. Counting the
+                            regular session is the safe choice for warm-up:
+                            extended-hours bars come on top of it.
+        """
+        self.extended_hours = extended_hours
+
+    def is_session(self, day: date) -> bool:
+        """True if the exchange trades on ``day``."""
+        return (
+            day.weekday() < 5
+            and day not in nyse_holidays(day.year)
+            and day not in SPECIAL_CLOSURES
+        )
+
+    def previous_session(self, day: date) -> date:
+        """The last trading day strictly before ``day``."""
+        day -= timedelta(days=1)
+        while not self.is_session(day):
+            day -= timedelta(days=1)
+        return day
+
+    def session_bounds(self, day: date) -> Session:
+        """Open and close of a trading day as UTC epoch nanoseconds."""
+        early = day in nyse_early_closes(day.year)
+        if self.extended_hours:
+            open_ = EXTENDED_OPEN
+            close = EXTENDED_EARLY_CLOSE if early else EXTENDED_CLOSE
+        else:
+            open_ = REGULAR_OPEN
+            close = EARLY_CLOSE if early else REGULAR_CLOSE
+
+        bounds = [
+            pd.Timestamp.combine(day, t).tz_localize(EXCHANGE_TZ).value
+            for t in (open_, close)
+        ]
+        return int(bounds[0]), int(bounds[1])
+
+    def warmup_start(
+        self, start: pd.Timestamp, bars: int, timeframe: str
+    ) -> pd.Timestamp:
+        """
+        Returns the timestamp of the ``bars``-th bar before ``start``.
+
+        Fetching from the returned value yields exactly ``bars`` bars ahead
+        of ``start`` when every slot in the session has a bar (illiquid
+        symbols can have gaps in intraday data).
+
+        Args:
+            start: First requested timestamp (naive values are UTC).
+            bars: Number of warm-up bars.
+            timeframe: Alpaca timeframe string (e.g. '5Min', '1Hour', '1Day').
+
+        Returns:
+            A UTC ``pd.Timestamp``; for Day/Week/Month timeframes it is
+            midnight of the first warm-up bar's date.
+        """
+        start = pd.Timestamp(start)
+        if start.tzinfo is None:
+            start = start.tz_localize("UTC")
+        if bars <= 0:
+            return start
+
+        amount, unit = parse_timeframe(timeframe)
+        if unit in ("Min", "Hour"):
+            minutes = amount * (60 if unit == "Hour" else 1)
+            size = minutes * 60 * 10**9
+            return pd.Timestamp(self._intraday_start(start.value, bars, size), tz="UTC")
+
+        # Daily and longer bars are stamped at midnight ET; find the first one
+        # at or after start
+        local = start.tz_convert(EXCHANGE_TZ)
+        first_day = local.date()
+        if local != local.normalize():
+            first_day += timedelta(days=1)
+        if unit == "Day":
+            day = first_day
+            for _ in range(bars * amount):
+                day = self.previous_session(day)
+        elif unit == "Week":
+            day = first_day - timedelta(days=first_day.weekday(), weeks=bars * amount)
+        else:
+            months = first_day.year * 12 + first_day.month - 1 - bars * amount
+            day = date(months // 12, months % 12 + 1, 1)
+        return pd.Timestamp(day, tz="UTC")
+
+    def _intraday_start(self, start: int, bars: int, size: int) -> int:
+        """
+        Walks sessions backwards from ``start`` counting bar slots of
+        ``size`` ns. Slots are aligned to UTC midnight like Alpaca's bars; a
+        slot counts if it overlaps the session.
+        """
+        remaining = bars
+        day = pd.Timestamp(start, tz="UTC").tz_convert(EXCHANGE_TZ).date()
+        if not self.is_session(day):
+            day = self.previous_session(day)
+
+        while True:
+            open_, close = self.session_bounds(day)
+            end = min(close, start)
+            if end > open_:
+                last = math.ceil(end / size)
+                count = last - open_ // size
+                if count >= remaining:
+                    return (last - remaining) * size
+                remaining -= count
+            day = self.previous_session(day)
+
+
+def nyse_holidays(year: int) -> Dict[date, str]:
+    """Full-day NYSE holidays of ``year`` (observed dates)."""
+    return dict(_holidays(year))
+
+
+def nyse_early_closes(year: int) -> FrozenSet[date]:
+    """Days of ``year`` on which the NYSE closes at 1 p.m. ET."""
+    return _early_closes(year)
+
+
+@lru_cache(maxsize=None)
+def _holidays(year: int) -> Tuple[Tuple[date, str], ...]:
+    holidays = []
+
+    # New Year's Day moves to Monday from a Sunday, but is not observed on
+    # the preceding Friday when it falls on a Saturday
+    new_year = date(year, 1, 1)
+    if new_year.weekday() == 6:
+        new_year += timedelta(days=1)
+    if new_year.weekday() < 5:
+        holidays.append((new_year, "New Year's Day"))
+
+    if year >= 1998:
+        holidays.append((_nth_weekday(year, 1, 0, 3), "Martin Luther King Jr. Day"))
+    holidays.append((_nth_weekday(year, 2, 0, 3), "Washington's Birthday"))
+    holidays.append((_easter(year) - timedelta(days=2), "Good Friday"))
+    holidays.append((_nth_weekday(year, 5, 0, -1), "Memorial Day"))
+    if year >= 2022:
+        holidays.append((_observed(date(year, 6, 19)), "Juneteenth"))
+    holidays.append((_observed(date(year, 7, 4)), "Independence Day"))
+    holidays.append((_nth_weekday(year, 9, 0, 1), "Labor Day"))
+    holidays.append((_nth_weekday(year, 11, 3, 4), "Thanksgiving Day"))
+    holidays.append((_observed(date(year, 12, 25)), "Christmas Day"))
+    return tuple(sorted(holidays))
+
+
+@lru_cache(maxsize=None)
+def _early_closes(year: int) -> FrozenSet[date]:
+    days = [
+        # Eve of Independence Day (when that is a weekday other than the
+        # observed holiday itself)
+        date(year, 7, 3),
+        # Day after Thanksgiving
+        _nth_weekday(year, 11, 3, 4) + timedelta(days=1),
+        # Christmas Eve
+        date(year, 12, 24),
+    ]
+    holidays = dict(_holidays(year))
+    return frozenset(
+        day
+        for day in days
+        if day.weekday() < 5 and day not in holidays and day not in SPECIAL_CLOSURES
+    )
+
+
+def _observed(day: date) -> date:
+    """Saturday holidays move to Friday, Sunday holidays to Monday."""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """The ``n``-th ``weekday`` (0 = Monday) of a month; ``n=-1`` is the last."""
+    if n > 0:
+        first = date(year, month, 1)
+        offset = (weekday - first.weekday()) % 7
+        return first + timedelta(days=offset + 7 * (n - 1))
+
+    next_month = date(year + month // 12, month % 12 + 1, 1)
+    last = next_month - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _easter(year: int) -> date:
+    """Gregorian Easter Sunday (anonymous Gregorian algorithm)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    ell = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * ell) // 451
+    month, day = divmod(h + ell - 7 * m + 114, 31)
+    return date(year, month, day + 1)
@@ -0,0 +1,214 @@
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# (metric name, sorted label pairs)
+Key = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+PROMETHEUS_PREFIX = "market_data_"
+
+
+class Metrics:
+    """
+    Thread-safe in-process recorder for counters and timings.
+
+    Components take a ``metrics`` argument and record into it (request
+    counts, bytes, stage durations, per-indicator compute time); sinks
+    export a snapshot on ``flush``. The default everywhere is
+    ``NULL_METRICS``, whose methods do nothing, so instrumentation costs a
+    no-op call when metrics are disabled.
+    """
+
+    enabled = True
+
+    def __init__(self, sinks: Optional[List["MetricsSink"]] = None):
+        """
+        Args:
+            sinks: Destinations written on ``flush`` (e.g. ``JsonLinesSink``,
+                   ``PrometheusTextSink``).
+        """
+        self.sinks = list(sinks or [])
+        self._lock = threading.Lock()
+        self._counters: Dict[Key, float] = {}
+        # Key -> [count, total seconds, max seconds]
+        self._timers: Dict[Key, List[float]] = {}
+
+    def increment(self, name: str, value: float = 1, **labels: str) -> None:
+        """Adds ``value`` to a counter (e.g. 'http_requests_total')."""
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels: str) -> None:
+        """Records one duration of a timing (e.g. 'stage_seconds')."""
+        key = _key(name, labels)
+        with self._lock:
+            timing = self._timers.get(key)
+            if timing is None:
+                self._timers[key] = [1, seconds, seconds]
+            else:
+                timing[0] += 1
+                timing[1] += seconds
+                timing[2] = max(timing[2], seconds)
+
+    def timer(self, name: str, **labels: str) -> "_Timer":
+        """Context manager that ``observe``s the duration of its block."""
+        return _Timer(self, name, labels)
+
+    def counters(self) -> Dict[Key, float]:
+        with self._lock:
+            return dict(self._counters)
+
+    def timings(self) -> Dict[Key, Tuple[int, float, float]]:
+        """(count, total seconds, max seconds) per timing."""
+        with self._lock:
+            return {k: (int(v[0]), v[1], v[2]) for k, v in self._timers.items()}
+
+    def flush(self) -> None:
+        """Writes the current totals to every sink."""
+        counters, timings = self.counters(), self.timings()
+        for sink in self.sinks:
+            sink.emit(counters, timings)
+
+
+class NullMetrics(Metrics):
+    """Disabled metrics: every call is a no-op."""
+
+    enabled = False
+
+    def __init__(self):
+        super().__init__()
+
+    def increment(self, name: str, value: float = 1, **labels: str) -> None:
+        pass
+
+    def observe(self, name: str, seconds: float, **labels: str) -> None:
+        pass
+
+    def timer(self, name: str, **labels: str) -> "_NullTimer":
+        return _NULL_TIMER
+
+    def flush(self) -> None:
+        pass
+
+
+NULL_METRICS = NullMetrics()
+
+
+class MetricsSink(ABC):
+    """Exports a snapshot of the metrics; subclasses implement ``emit``."""
+
+    @abstractmethod
+    def emit(
+        self,
+        counters: Dict[Key, float],
+        timings: Dict[Key, Tuple[int, float, float]],
+    ) -> None:
+        """Writes the counters and (count, total, max) timings."""
+
+
+class JsonLinesSink(MetricsSink):
+    """Appends one JSON object per series and flush to a ``.jsonl`` file."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+
+    def emit(self, counters, timings) -> None:
+        now = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        with open(self.path, "a") as f:
+            for (name, labels), value in sorted(counters.items()):
+                record = {"time": now, "name": name, "type": "counter"}
+                record.update(labels=dict(labels), value=value)
+                f.write(json.dumps(record) + "\n")
+            for (name, labels), (count, total, peak) in sorted(timings.items()):
+                record = {"time": now, "name": name, "type": "timer"}
+                record.update(labels=dict(labels), count=count, sum=total, max=peak)
+                f.write(json.dumps(record) + "\n")
+
+
+class PrometheusTextSink(MetricsSink):
+    """
+    Prometheus text exposition format, e.g. for node_exporter's textfile
+    collector. The file is replaced atomically so scrapes never see a
+    partial write; timings become summaries (``_count``/``_sum``).
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+
+    def emit(self, counters, timings) -> None:
+        lines = []
+        for name, samples in _group(counters).items():
+            metric = PROMETHEUS_PREFIX + name
+            lines.append(f"# TYPE {metric} counter")
+            for labels, value in samples:
+                lines.append(f"{metric}{_labels(labels)} {_number(value)}")
+        for name, samples in _group(timings).items():
+            metric = PROMETHEUS_PREFIX + name
+            lines.append(f"# TYPE {metric} summary")
+            for labels, (count, total, _) in samples:
+                lines.append(f"{metric}_count{_labels(labels)} {count}")
+                lines.append(f"{metric}_sum{_labels(labels)} {_number(total)}")
+
+        tmp_path = Path(f"{self.path}.tmp")
+        tmp_path.write_text("\n".join(lines) + "\n")
+        os.replace(tmp_path, self.path)
+
+
+class _Timer:
+    __slots__ = ("metrics", "name", "labels", "started")
+
+    def __init__(self, metrics: Metrics, name: str, labels: Dict[str, str]):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self) -> "_Timer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        elapsed = time.perf_counter() - self.started
+        self.metrics.observe(self.name, elapsed, **self.labels)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullTimer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def _key(name: str, labels: Dict[str, str]) -> Key:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _group(series: dict) -> Dict[str, list]:
+    grouped: Dict[str, list] = {}
+    for (name, labels), value in sorted(series.items()):
+        grouped.setdefault(name, []).append((labels, value))
+    return grouped
+
+
+def _labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in labels
+    )
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
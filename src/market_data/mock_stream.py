@@ -0,0 +1,161 @@
+import json
+import logging
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+import pandas as pd
+
+from market_data.live import _import_websockets
+
+logger = logging.getLogger("rich")
+
+
+class MockAlpacaStream:
+    """
+    Local stand-in for Alpaca's market data websocket, for offline tests.
+
+    Speaks the same protocol as ``wss://stream.data.alpaca.markets/v2/<feed>``
+    (connected -> auth -> subscribe -> batched JSON arrays of messages) and
+    replays the given messages to subscribers. One iterator is shared by all
+    connections, so after a dropped connection the stream resumes where it
+    stopped, like a live feed would.
+    """
+
+    def __init__(
+        self,
+        messages: Iterable[dict],
+        key: Optional[str] = None,
+        secret: Optional[str] = None,
+        batch_size: int = 100,
+        disconnect_after: Optional[int] = None,
+    ):
+        """
+        Args:
+            messages: Stream messages (e.g. from ``synthetic_bars``) to send.
+            key: Accepted API key (None accepts any credentials).
+            secret: Accepted API secret.
+            batch_size: Messages per websocket frame (Alpaca batches too).
+            disconnect_after: Drop the first connection abruptly after this
+                              many messages, to exercise reconnection.
+        """
+        self._messages: Iterator[dict] = iter(messages)
+        self.key = key
+        self.secret = secret
+        self.batch_size = batch_size
+        self.disconnect_after = disconnect_after
+        self.connections = 0
+        self.sent = 0
+        self._websockets = _import_websockets()
+        self._server = None
+        self._pending: List[dict] = []
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Starts listening and returns the ``ws://`` URL to connect to."""
+        self._server = await self._websockets.asyncio.server.serve(
+            self._handle, host, port
+        )
+        bound_port = self._server.sockets[0].getsockname()[1]
+        return f"ws://{host}:{bound_port}/v2/iex"
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, ws) -> None:
+        self.connections += 1
+        connection = self.connections
+        try:
+            await ws.send(json.dumps([{"T": "success", "msg": "connected"}]))
+            auth = json.loads(await ws.recv())
+            if auth.get("action") != "auth" or (
+                self.key is not None
+                and (auth.get("key"), auth.get("secret")) != (self.key, self.secret)
+            ):
+                await ws.send(
+                    json.dumps([{"T": "error", "code": 402, "msg": "auth failed"}])
+                )
+                await ws.close()
+                return
+            await ws.send(json.dumps([{"T": "success", "msg": "authenticated"}]))
+
+            request = json.loads(await ws.recv())
+            channels = {
+                "b": set(request.get("bars", [])),
+                "t": set(request.get("trades", [])),
+            }
+            await ws.send(
+                json.dumps(
+                    [
+                        {
+                            "T": "subscription",
+                            "bars": sorted(channels["b"]),
+                            "trades": sorted(channels["t"]),
+                        }
+                    ]
+                )
+            )
+            await self._stream(ws, channels, drop=connection == 1)
+        except self._websockets.exceptions.ConnectionClosed:
+            pass
+
+    async def _stream(self, ws, channels: Dict[str, Set[str]], drop: bool) -> None:
+        sent_here = 0
+        while True:
+            batch = self._next_batch(channels)
+            if not batch:
+                # Feed exhausted: stay connected, like a quiet market
+                await ws.recv()
+                continue
+
+            if drop and self.disconnect_after is not None:
+                room = self.disconnect_after - sent_here
+                if room <= 0:
+                    # Undelivered messages go to the next connection
+                    self._pending = batch + self._pending
+                    ws.transport.abort()
+                    return
+                self._pending = batch[room:] + self._pending
+                batch = batch[:room]
+
+            await ws.send(json.dumps(batch))
+            sent_here += len(batch)
+            self.sent += len(batch)
+
+    def _next_batch(self, channels: Dict[str, Set[str]]) -> List[dict]:
+        batch = []
+        while len(batch) < self.batch_size:
+            if self._pending:
+                message = self._pending.pop(0)
+            else:
+                message = next(self._messages, None)
+                if message is None:
+                    break
+            if message.get("S") in channels.get(message.get("T"), ()):
+                batch.append(message)
+        return batch
+
+
+def synthetic_bars(
+    symbols: List[str], count: int, start: str = "2024-01-02T14:30:00Z"
+) -> Iterator[dict]:
+    """
+    Yields ``count`` minute bars per symbol in stream format ({"T": "b", ...}),
+    interleaved by time like a live feed.
+    """
+    minutes = pd.date_range(start, periods=count, freq="min")
+    for i, ts in enumerate(minutes):
+        stamp = ts.strftime("%Y-%m-%dT%H:%M:%SZ")
+        for j, symbol in enumerate(symbols):
+            price = 100.0 + j + (i % 50) * 0.01
+            yield {
+                "T": "b",
+                "S": symbol,
+                "o": price,
+                "h": price + 0.05,
+                "l": price - 0.05,
+                "c": price + 0.01,
+                "v": 100 + i,
+                "t": stamp,
+                "n": 10,
+                "vw": price,
+            }
@@ -0,0 +1,392 @@
+import logging
+import math
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Dict, List, Mapping, Optional, Tuple, Type, Union
+
+import pandas as pd
+
+from market_data.buffers import COLUMN_NAMES
+from market_data.indicators import IndicatorCalculator, IndicatorSpec
+
+logger = logging.getLogger("rich")
+
+NAN = float("nan")
+
+# TA-Lib treats |x| < 1e-14 as zero when guarding divisions
+_EPSILON = 1e-14
+
+Output = Union[float, Tuple[float, ...]]
+
+
+class OnlineIndicator(ABC):
+    """
+    Incrementally updated indicator: ``update`` consumes one bar and returns
+    the latest value (NaN until warmed up), reproducing TA-Lib's batch
+    output for the same series.
+
+    State is O(1) or O(window); subclasses implement ``update``.
+    """
+
+    @abstractmethod
+    def update(
+        self, open_: float, high: float, low: float, close: float, volume: float
+    ) -> Output:
+        """Consumes one bar and returns the indicator's latest value(s)."""
+
+
+class _Sum:
+    """Fixed-window running sum, updated in the same order as TA-Lib."""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.window: deque = deque()
+        self.total = 0.0
+
+    def push(self, value: float) -> Optional[float]:
+        """Adds ``value``; returns the window sum once the window is full."""
+        self.window.append(value)
+        self.total += value
+        if len(self.window) < self.period:
+            return None
+        total = self.total
+        self.total -= self.window.popleft()
+        return total
+
+
+class _Ema:
+    """TA-Lib EMA: seeded with the SMA of the first ``period`` values."""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.k = 2.0 / (period + 1)
+        self.seed: List[float] = []
+        self.value = NAN
+
+    def push(self, value: float) -> float:
+        if len(self.seed) < self.period:
+            self.seed.append(value)
+            if len(self.seed) == self.period:
+                self.value = sum(self.seed) / self.period
+            return self.value
+        self.value = (value - self.value) * self.k + self.value
+        return self.value
+
+
+class OnlineSMA(OnlineIndicator):
+    def __init__(self, timeperiod: int = 30):
+        self._sum = _Sum(timeperiod)
+
+    def update(self, open_, high, low, close, volume):
+        total = self._sum.push(close)
+        return NAN if total is None else total / self._sum.period
+
+
+class OnlineEMA(OnlineIndicator):
+    def __init__(self, timeperiod: int = 30):
+        self._ema = _Ema(timeperiod)
+
+    def update(self, open_, high, low, close, volume):
+        return self._ema.push(close)
+
+
+class OnlineRSI(OnlineIndicator):
+    """Wilder's RSI, seeded with the mean gain/loss of the first period."""
+
+    def __init__(self, timeperiod: int = 14):
+        self.period = timeperiod
+        self.prev_close: Optional[float] = None
+        self.count = 0
+        self.gain = 0.0
+        self.loss = 0.0
+
+    def update(self, open_, high, low, close, volume):
+        prev, self.prev_close = self.prev_close, close
+        if prev is None:
+            return NAN
+
+        change = close - prev
+        gain, loss = (change, 0.0) if change >= 0 else (0.0, -change)
+        self.count += 1
+        if self.count < self.period:
+            self.gain += gain
+            self.loss += loss
+            return NAN
+        if self.count == self.period:
+            self.gain = (self.gain + gain) / self.period
+            self.loss = (self.loss + loss) / self.period
+        else:
+            self.gain = (self.gain * (self.period - 1) + gain) / self.period
+            self.loss = (self.loss * (self.period - 1) + loss) / self.period
+
+        total = self.gain + self.loss
+        return 0.0 if abs(total) < _EPSILON else 100.0 * (self.gain / total)
+
+
+class OnlineMACD(OnlineIndicator):
+    """
+    MACD line, signal and histogram. Like TA-Lib, both EMAs are seeded on the
+    bar where the slow EMA has a full window, the fast one with the SMA of
+    its own (shorter) trailing window.
+    """
+
+    def __init__(
+        self, fastperiod: int = 12, slowperiod: int = 26, signalperiod: int = 9
+    ):
+        if slowperiod < fastperiod:
+            fastperiod, slowperiod = slowperiod, fastperiod
+        self.fast = _Ema(fastperiod)
+        self.slow = _Ema(slowperiod)
+        self.signal = _Ema(signalperiod)
+        self.window: deque = deque(maxlen=slowperiod)
+
+    def update(self, open_, high, low, close, volume):
+        if len(self.window) < self.window.maxlen:
+            self.window.append(close)
+            if len(self.window) < self.window.maxlen:
+                return NAN, NAN, NAN
+            for value in list(self.window)[-self.fast.period :]:
+                self.fast.push(value)
+            for value in self.window:
+                self.slow.push(value)
+        else:
+            self.fast.push(close)
+            self.slow.push(close)
+
+        macd = self.fast.value - self.slow.value
+        signal = self.signal.push(macd)
+        if math.isnan(signal):
+            return NAN, NAN, NAN
+        return macd, signal, macd - signal
+
+
+class OnlineBBANDS(OnlineIndicator):
+    """Bollinger Bands over a simple moving average (matype 0)."""
+
+    def __init__(
+        self,
+        timeperiod: int = 5,
+        nbdevup: float = 2.0,
+        nbdevdn: float = 2.0,
+        matype: int = 0,
+    ):
+        if matype != 0:
+            raise ValueError("only matype=0 (SMA) is supported online")
+        self.period = timeperiod
+        self.nbdevup = nbdevup
+        self.nbdevdn = nbdevdn
+        self._sum = _Sum(timeperiod)
+        self._squares = _Sum(timeperiod)
+
+    def update(self, open_, high, low, close, volume):
+        total = self._sum.push(close)
+        squares = self._squares.push(close * close)
+        if total is None:
+            return NAN, NAN, NAN
+
+        mean = total / self.period
+        variance = squares / self.period - mean * mean
+        stddev = math.sqrt(variance) if variance >= _EPSILON else 0.0
+        return mean + self.nbdevup * stddev, mean, mean - self.nbdevdn * stddev
+
+
+class OnlineATR(OnlineIndicator):
+    """Wilder's average true range, seeded with the mean of the first period."""
+
+    def __init__(self, timeperiod: int = 14):
+        self.period = timeperiod
+        self.prev_close: Optional[float] = None
+        self.count = 0
+        self.value = 0.0
+
+    def update(self, open_, high, low, close, volume):
+        prev, self.prev_close = self.prev_close, close
+        if prev is None:
+            return NAN
+
+        true_range = max(high, prev) - min(low, prev)
+        self.count += 1
+        if self.period == 1:
+            return true_range
+        if self.count < self.period:
+            self.value += true_range
+            return NAN
+        if self.count == self.period:
+            self.value = (self.value + true_range) / self.period
+        else:
+            self.value = (self.value * (self.period - 1) + true_range) / self.period
+        return self.value
+
+
+class _OnlineExtreme(OnlineIndicator):
+    """Rolling max/min with a monotonic deque (amortised O(1) per bar)."""
+
+    sign = 1.0
+
+    def __init__(self, timeperiod: int = 30):
+        self.period = timeperiod
+        self.index = 0
+        self.candidates: deque = deque()
+
+    def update(self, open_, high, low, close, volume):
+        key = close * self.sign
+        while self.candidates and self.candidates[-1][1] * self.sign <= key:
+            self.candidates.pop()
+        self.candidates.append((self.index, close))
+        if self.candidates[0][0] <= self.index - self.period:
+            self.candidates.popleft()
+        self.index += 1
+        return self.candidates[0][1] if self.index >= self.period else NAN
+
+
+class OnlineMAX(_OnlineExtreme):
+    sign = 1.0
+
+
+class OnlineMIN(_OnlineExtreme):
+    sign = -1.0
+
+
+class OnlineOBV(OnlineIndicator):
+    def __init__(self):
+        self.prev_close: Optional[float] = None
+        self.value = 0.0
+
+    def update(self, open_, high, low, close, volume):
+        if self.prev_close is None:
+            self.value = volume
+        elif close > self.prev_close:
+            self.value += volume
+        elif close < self.prev_close:
+            self.value -= volume
+        self.prev_close = close
+        return self.value
+
+
+# TA-Lib function name -> online implementation
+ONLINE_INDICATORS: Dict[str, Type[OnlineIndicator]] = {
+    "SMA": OnlineSMA,
+    "EMA": OnlineEMA,
+    "RSI": OnlineRSI,
+    "MACD": OnlineMACD,
+    "BBANDS": OnlineBBANDS,
+    "ATR": OnlineATR,
+    "MAX": OnlineMAX,
+    "MIN": OnlineMIN,
+    "OBV": OnlineOBV,
+}
+
+
+class OnlineIndicatorEngine:
+    """
+    Keeps one symbol's indicators current, one bar at a time.
+
+    Accepts the same indicator specs as ``IndicatorCalculator`` (and produces
+    the same column names); only functions in ``ONLINE_INDICATORS`` can run
+    online, others are logged and listed in ``unsupported``.
+    """
+
+    def __init__(
+        self, indicators: List[str], calculator: Optional[IndicatorCalculator] = None
+    ):
+        """
+        Args:
+            indicators: List of indicator strings (e.g. 'SMA_50',
+                        'MACD(fast=12,slow=26,signal=9)').
+            calculator: Calculator used to parse/validate the specs.
+        """
+        plan = (calculator or IndicatorCalculator()).compile(indicators)
+        self.unsupported = list(plan.invalid)
+        self._specs: List[Tuple[IndicatorSpec, OnlineIndicator]] = []
+        for spec in plan.specs:
+            online = ONLINE_INDICATORS.get(spec.name)
+            try:
+                if online is None:
+                    raise ValueError("no online implementation")
+                self._specs.append((spec, online(**spec.params)))
+            except ValueError as e:
+                logger.warning(f"Indicator '{spec.spec}' cannot run online: {e}")
+                self.unsupported.append(spec.spec)
+
+        self.columns = [c for spec, _ in self._specs for c in spec.columns]
+        self.values: Dict[str, float] = dict.fromkeys(self.columns, NAN)
+
+    def update(self, bar: Mapping[str, float]) -> Dict[str, float]:
+        """
+        Consumes one bar and returns the updated indicator values.
+
+        Args:
+            bar: OHLCV values keyed by pipeline column names ('open', ...,
+                 'volume') or Alpaca's short keys ('o', ..., 'v').
+
+        Returns:
+            Latest value of every column (NaN while warming up). The same
+            dict is updated in place on every call.
+        """
+        if "close" not in bar:
+            bar = {COLUMN_NAMES.get(k, k): v for k, v in bar.items()}
+        return self._push(
+            float(bar.get("open", NAN)),
+            float(bar.get("high", NAN)),
+            float(bar.get("low", NAN)),
+            float(bar["close"]),
+            float(bar.get("volume", 0.0)),
+        )
+
+    def seed(self, history: pd.DataFrame) -> Dict[str, float]:
+        """
+        Replays historical bars (e.g. a frame exported by
+        ``StockDataPipeline``) so the state continues from its last row.
+        Recursive indicators (EMA, RSI, ...) match the batch values best when
+        the history is long relative to their period.
+
+        Returns:
+            The values after the last historical bar.
+        """
+        lowered = {str(c).lower(): c for c in history.columns}
+        columns = [
+            (
+                history[lowered[name]].to_numpy(dtype=float)
+                if name in lowered
+                else [NAN] * len(history)
+            )
+            for name in ("open", "high", "low", "close", "volume")
+        ]
+        for row in zip(*columns):
+            self._push(*row)
+        return self.values
+
+    def _push(
+        self, open_: float, high: float, low: float, close: float, volume: float
+    ) -> Dict[str, float]:
+        values = self.values
+        for spec, online in self._specs:
+            result = online.update(open_, high, low, close, volume)
+            if len(spec.columns) == 1:
+                values[spec.columns[0]] = result
+            else:
+                values.update(zip(spec.columns, result))
+        return values
+
+
+class OnlineIndicatorBook:
+    """Online engines for many symbols sharing one parsed indicator list."""
+
+    def __init__(self, indicators: List[str]):
+        self.indicators = indicators
+        self.calculator = IndicatorCalculator()
+        self.engines: Dict[str, OnlineIndicatorEngine] = {}
+
+    def engine(self, symbol: str) -> OnlineIndicatorEngine:
+        """Returns the symbol's engine, creating it on first use."""
+        engine = self.engines.get(symbol)
+        if engine is None:
+            engine = OnlineIndicatorEngine(self.indicators, self.calculator)
+            self.engines[symbol] = engine
+        return engine
+
+    def seed(self, symbol: str, history: pd.DataFrame) -> Dict[str, float]:
+        return self.engine(symbol).seed(history)
+
+    def update(self, symbol: str, bar: Mapping[str, float]) -> Dict[str, float]:
+        return self.engine(symbol).update(bar)
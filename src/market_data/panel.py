@@ -0,0 +1,583 @@
+import logging
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import talib
+
+from market_data.buffers import COLUMN_NAMES, parse_timestamps
+from market_data.indicators import IndicatorCalculator, IndicatorPlan
+from market_data.metrics import NULL_METRICS, Metrics
+
+logger = logging.getLogger("rich")
+
+# TA-Lib treats |x| < 1e-14 as zero when guarding divisions
+_EPSILON = 1e-14
+
+Output = Union[np.ndarray, Tuple[np.ndarray, ...]]
+
+# Pipeline bar columns, matched case-insensitively in from_frames
+_BAR_COLUMNS = frozenset(COLUMN_NAMES.values())
+
+# Longest rows the vectorized kernels are used for. On longer rows one
+# TA-Lib call per symbol is faster: the C loop makes a single pass over a
+# contiguous row, while the kernels make several over the whole block.
+KERNEL_MAX_BARS = 128
+
+
+class Panel:
+    """
+    Bars of many symbols on one shared time axis.
+
+    Every column (open, high, low, close, volume, indicators, ...) is a
+    ``(symbols x time)`` float64 array; a symbol without a bar at some time
+    has NaN there. Indicators are computed for all symbols at once
+    (``add_indicators``), and cross-sectional features compare the symbols
+    at each time (``add_cross_sectional``), so screening a whole universe is
+    a few array operations instead of one DataFrame per symbol.
+    """
+
+    def __init__(
+        self,
+        symbols: List[str],
+        dates: pd.DatetimeIndex,
+        columns: Dict[str, np.ndarray],
+    ):
+        """
+        Args:
+            symbols: Row labels.
+            dates: Column labels (tz-aware UTC, sorted).
+            columns: ``(len(symbols), len(dates))`` arrays keyed by name.
+        """
+        shape = (len(symbols), len(dates))
+        for name, values in columns.items():
+            if values.shape != shape:
+                raise ValueError(f"Column {name} has shape {values.shape}, not {shape}")
+        self.symbols = list(symbols)
+        self.dates = dates
+        self.columns = columns
+
+    @classmethod
+    def from_frames(
+        cls,
+        frames: Dict[str, pd.DataFrame],
+        columns: Optional[Sequence[str]] = None,
+    ) -> "Panel":
+        """
+        Aligns per-symbol frames (e.g. pipeline output) on the union of their
+        timestamps.
+
+        Args:
+            frames: DataFrames keyed by symbol, with a ``date`` column or a
+                    DatetimeIndex. Bar column names (open, ..., vwap) are
+                    case-insensitive.
+            columns: Columns to take (default: every numeric column); ones
+                     no frame has are left out.
+        """
+        symbols = list(frames)
+        stamps = [_dates(frame) for frame in frames.values()]
+        dates = stamps[0] if stamps else pd.DatetimeIndex([], tz="UTC")
+        if any(not s.equals(dates) for s in stamps[1:]):
+            dates = dates.append(stamps[1:]).unique().sort_values()
+
+        panel: Dict[str, np.ndarray] = {}
+        for row, (frame, stamp) in enumerate(zip(frames.values(), stamps)):
+            # Row positions on the shared axis (all of it in the common case)
+            positions = slice(None) if stamp.equals(dates) else dates.get_indexer(stamp)
+            for label in frame.columns:
+                name = _column_name(label)
+                if name == "date" or (columns is not None and name not in columns):
+                    continue
+                values = frame[label].to_numpy()
+                if values.dtype.kind not in "biuf":
+                    continue
+                if name not in panel:
+                    panel[name] = np.full((len(symbols), len(dates)), np.nan)
+                panel[name][row, positions] = values
+
+        if columns is not None:
+            panel = {name: panel[name] for name in columns if name in panel}
+        return cls(symbols, dates, panel)
+
+    @classmethod
+    def from_store(
+        cls,
+        store,
+        symbols: List[str],
+        timeframe: str,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> "Panel":
+        """
+        Loads a time slice of several series from a ``BarStore``. Symbols
+        that are not in the store are skipped with a warning.
+        """
+        frames = {}
+        for symbol in symbols:
+            try:
+                frames[symbol] = store.read(symbol, timeframe, start, end)
+            except KeyError as e:
+                logger.warning(f"Skipping {symbol}: {e}")
+        return cls.from_frames(frames, columns)
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.columns[column]
+
+    def __contains__(self, column: str) -> bool:
+        return column in self.columns
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        """(symbols, times)"""
+        return len(self.symbols), len(self.dates)
+
+    def add_indicators(
+        self,
+        indicators: List[str],
+        calculator: Optional[IndicatorCalculator] = None,
+        metrics: Metrics = NULL_METRICS,
+    ) -> "Panel":
+        """
+        Computes indicators for every symbol, with the same specs and column
+        names as ``IndicatorCalculator.add_indicators``.
+
+        Args:
+            indicators: List of indicator strings (e.g. 'SMA_50', 'RSI_14').
+            calculator: Calculator used to parse/validate the specs.
+            metrics: Recorder for the compute time of each indicator.
+
+        Returns:
+            A new Panel with the indicator columns added (the existing
+            arrays are shared, not copied).
+        """
+        plan = (calculator or IndicatorCalculator()).compile(indicators)
+        missing = [c for c in plan.inputs if c not in self.columns]
+        if missing:
+            raise ValueError(f"The panel has no {', '.join(missing)} column")
+        results = compute_panel(plan, self.columns, metrics)
+        return Panel(self.symbols, self.dates, {**self.columns, **results})
+
+    def add_cross_sectional(
+        self, columns: List[str], features: Sequence[str] = ("rank", "zscore")
+    ) -> "Panel":
+        """
+        Adds cross-sectional features of columns as ``<column>_<feature>``
+        (e.g. ``RSI_14_rank``): at every time, each symbol is compared with
+        the other symbols that have a value then.
+
+        Args:
+            columns: Columns to transform (price or indicator columns).
+            features: Names from ``CROSS_SECTIONAL_FEATURES``.
+        """
+        unknown = [f for f in features if f not in CROSS_SECTIONAL_FEATURES]
+        if unknown:
+            raise ValueError(
+                f"Unknown cross-sectional feature(s) {', '.join(unknown)}. "
+                f"Choose from: {', '.join(CROSS_SECTIONAL_FEATURES)}"
+            )
+        added = {
+            f"{column}_{feature}": CROSS_SECTIONAL_FEATURES[feature](self[column])
+            for column in columns
+            for feature in features
+        }
+        return Panel(self.symbols, self.dates, {**self.columns, **added})
+
+    def frame(self, symbol: str) -> pd.DataFrame:
+        """One symbol's rows as a pipeline-style frame (``date`` + columns)."""
+        row = self.symbols.index(symbol)
+        data = {"date": self.dates}
+        data.update((name, values[row]) for name, values in self.columns.items())
+        return pd.DataFrame(data)
+
+    def snapshot(self, date: Optional[str] = None) -> pd.DataFrame:
+        """
+        Every column at one time, one row per symbol: the screening view.
+
+        Args:
+            date: Time to take (default: the last one); the latest time at
+                  or before it is used.
+        """
+        if date is None:
+            position = len(self.dates) - 1
+        else:
+            stamp = parse_timestamps([date])[0]
+            position = int(self.dates.searchsorted(stamp, side="right")) - 1
+        if position < 0:
+            raise KeyError(f"No bars at or before {date}")
+        return pd.DataFrame(
+            {name: values[:, position] for name, values in self.columns.items()},
+            index=pd.Index(self.symbols, name="symbol"),
+        )
+
+
+def compute_panel(
+    plan: IndicatorPlan,
+    inputs: Dict[str, np.ndarray],
+    metrics: Metrics = NULL_METRICS,
+    kernel_max_bars: int = KERNEL_MAX_BARS,
+) -> Dict[str, np.ndarray]:
+    """
+    Runs a plan on ``(symbols x time)`` arrays.
+
+    On short rows (a screening window), indicators in ``PANEL_KERNELS`` run
+    as one vectorized pass over all symbols; everything else calls TA-Lib
+    once per row of the block. Rows with a gap after their first bar also
+    run through TA-Lib, whose handling of a NaN inside the series (SMA and
+    EMA stay NaN from there on, MAX skips it) the kernels don't reproduce.
+    Either way each row matches TA-Lib's output for that symbol's series.
+
+    Args:
+        inputs: float64 arrays keyed by lower-case OHLCV name.
+        metrics: Recorder for the compute time of each indicator.
+        kernel_max_bars: Longest rows to use the kernels for.
+
+    Returns:
+        Output arrays keyed by column name. Indicators that fail are logged
+        and left out.
+    """
+    results = {}
+    for spec in plan.specs:
+        arrays = [inputs[c] for c in spec.inputs]
+        kernel = PANEL_KERNELS.get(spec.name)
+        if arrays[0].shape[1] > kernel_max_bars or _unstable(spec.name):
+            kernel = None
+        try:
+            with metrics.timer("indicator_seconds", indicator=spec.name):
+                result = None
+                if kernel is not None:
+                    try:
+                        result = kernel(*_common_start(arrays), **spec.params)
+                    except ValueError as e:
+                        logger.debug(f"{spec.spec} runs per symbol: {e}")
+                if result is None:
+                    result = _per_symbol(
+                        spec.function, arrays, spec.params, len(spec.columns)
+                    )
+                else:
+                    gaps = _interior_gaps(arrays)
+                    if gaps.any():
+                        _replace_rows(
+                            result,
+                            gaps,
+                            _per_symbol(
+                                spec.function,
+                                [a[gaps] for a in arrays],
+                                spec.params,
+                                len(spec.columns),
+                            ),
+                        )
+        except Exception as e:
+            logger.error(f"Failed to calculate {spec.spec}: {e}")
+            continue
+
+        if isinstance(result, (tuple, list)):
+            results.update(zip(spec.columns, result))
+        else:
+            results[spec.columns[0]] = result
+    return results
+
+
+def cross_sectional_rank(values: np.ndarray) -> np.ndarray:
+    """
+    Percentile rank in (0, 1] of each symbol among the symbols with a value
+    at the same time (ties share their average rank; NaN stays NaN).
+    """
+    return pd.DataFrame(values).rank(axis=0, pct=True).to_numpy()
+
+
+def cross_sectional_zscore(values: np.ndarray) -> np.ndarray:
+    """
+    (value - mean) / standard deviation across the symbols at each time,
+    ignoring NaN. Times where all values are equal give NaN.
+    """
+    valid = ~np.isnan(values)
+    count = valid.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(valid, values, 0.0).sum(axis=0) / count
+        centered = values - mean
+        std = np.sqrt(np.where(valid, centered * centered, 0.0).sum(axis=0) / count)
+        # Rounding leaves a tiny non-zero spread when every value is equal
+        std[std <= _EPSILON * np.maximum(np.abs(mean), 1.0)] = np.nan
+        return centered / std
+
+
+# Feature name -> (symbols x time) -> (symbols x time) transform
+CROSS_SECTIONAL_FEATURES: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    "rank": cross_sectional_rank,
+    "zscore": cross_sectional_zscore,
+}
+
+
+def _per_symbol(
+    function: Callable, arrays: List[np.ndarray], params: Dict[str, float], outputs: int
+) -> Output:
+    """Calls a TA-Lib function once per row, writing into the output blocks."""
+    shape = arrays[0].shape
+    blocks = [np.empty(shape) for _ in range(outputs)]
+    for i in range(shape[0]):
+        result = function(
+            *(np.ascontiguousarray(a[i], dtype=np.float64) for a in arrays), **params
+        )
+        if not isinstance(result, (tuple, list)):
+            result = (result,)
+        for block, values in zip(blocks, result):
+            block[i] = values
+    return blocks[0] if outputs == 1 else tuple(blocks)
+
+
+def _replace_rows(result: Output, rows: np.ndarray, values: Output) -> None:
+    """Overwrites the selected rows of each output block."""
+    if not isinstance(result, (tuple, list)):
+        result, values = (result,), (values,)
+    for block, replacement in zip(result, values):
+        block[rows] = replacement
+
+
+def _unstable(name: str) -> bool:
+    """True if an unstable period is set for the function (kernels skip it)."""
+    try:
+        return talib.get_unstable_period(name) > 0
+    except KeyError:
+        # Functions without an unstable period
+        return False
+
+
+# Vectorized kernels. Each takes (symbols x time) arrays and the TA-Lib
+# parameters, and reproduces TA-Lib per row: leading NaNs (symbols listed
+# later) shift the row's warm-up like TA-Lib's own NaN skipping, and the
+# recursive ones (EMA, RSI, ATR) step through time with one vector
+# operation over all symbols per bar.
+
+
+def _sma(close: np.ndarray, timeperiod: int = 30) -> np.ndarray:
+    return _rolling_mean(close, timeperiod)
+
+
+def _ema(close: np.ndarray, timeperiod: int = 30) -> np.ndarray:
+    k = 2.0 / (timeperiod + 1)
+
+    def step(prev, value, out):
+        # (value - prev) * k + prev, in TA-Lib's order
+        np.subtract(value, prev, out=out)
+        out *= k
+        out += prev
+
+    return _recurrence(close, timeperiod, step)
+
+
+def _rsi(close: np.ndarray, timeperiod: int = 14) -> np.ndarray:
+    change = np.full(close.shape, np.nan)
+    np.subtract(close[:, 1:], close[:, :-1], out=change[:, 1:])
+    # np.maximum keeps NaN, so rows still start after their leading NaNs
+    gain = _wilder(np.maximum(change, 0.0), timeperiod)
+    loss = _wilder(np.maximum(-change, 0.0), timeperiod)
+    total = gain + loss
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rsi = 100.0 * (gain / total)
+    rsi[np.abs(total) < _EPSILON] = 0.0
+    return rsi
+
+
+def _atr(
+    high: np.ndarray, low: np.ndarray, close: np.ndarray, timeperiod: int = 14
+) -> np.ndarray:
+    prev = np.full(close.shape, np.nan)
+    prev[:, 1:] = close[:, :-1]
+    true_range = np.maximum(high, prev) - np.minimum(low, prev)
+    if timeperiod == 1:
+        return true_range
+    return _wilder(true_range, timeperiod)
+
+
+def _bbands(
+    close: np.ndarray,
+    timeperiod: int = 5,
+    nbdevup: float = 2.0,
+    nbdevdn: float = 2.0,
+    matype: int = 0,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    if matype != 0:
+        raise ValueError("only matype=0 (SMA) is vectorized")
+    # Variance from the first value of the row on, which keeps the sum of
+    # squares small
+    offset = _row_offset(close)
+    centered = close - offset
+    mean = _rolling_mean(centered, timeperiod, center=False)
+    variance = _rolling_mean(centered * centered, timeperiod, center=False)
+    variance -= mean * mean
+    with np.errstate(invalid="ignore"):
+        stddev = np.sqrt(np.where(variance >= _EPSILON, variance, 0.0))
+    stddev[np.isnan(variance)] = np.nan
+    middle = mean + offset
+    return middle + nbdevup * stddev, middle, middle - nbdevdn * stddev
+
+
+def _max(close: np.ndarray, timeperiod: int = 30) -> np.ndarray:
+    return _rolling_extreme(close, timeperiod, np.maximum)
+
+
+def _min(close: np.ndarray, timeperiod: int = 30) -> np.ndarray:
+    return _rolling_extreme(close, timeperiod, np.minimum)
+
+
+# TA-Lib function name -> vectorized panel kernel
+PANEL_KERNELS: Dict[str, Callable[..., Output]] = {
+    "SMA": _sma,
+    "EMA": _ema,
+    "RSI": _rsi,
+    "ATR": _atr,
+    "BBANDS": _bbands,
+    "MAX": _max,
+    "MIN": _min,
+}
+
+
+def _common_start(arrays: List[np.ndarray]) -> List[np.ndarray]:
+    """
+    Blanks every input of a row before the row's first bar where all inputs
+    are valid, which is where TA-Lib starts a multi-input series.
+    """
+    if len(arrays) < 2:
+        return arrays
+    valid = np.logical_and.reduce([~np.isnan(a) for a in arrays])
+    first = _first_valid(valid)
+    before = np.arange(valid.shape[1]) < first[:, None]
+    if not any((before & ~np.isnan(a)).any() for a in arrays):
+        return arrays
+    return [np.where(before, np.nan, a) for a in arrays]
+
+
+def _interior_gaps(arrays: List[np.ndarray]) -> np.ndarray:
+    """Rows with a bar missing any input after their first complete bar."""
+    valid = np.logical_and.reduce([~np.isnan(a) for a in arrays])
+    started = np.logical_or.accumulate(valid, axis=1)
+    return (started & ~valid).any(axis=1)
+
+
+def _first_valid(valid: np.ndarray) -> np.ndarray:
+    """Index of each row's first True (the row length for none)."""
+    return np.where(valid.any(axis=1), valid.argmax(axis=1), valid.shape[1])
+
+
+def _row_offset(values: np.ndarray) -> np.ndarray:
+    """First valid value of each row (0 for empty rows), as a column."""
+    first = _first_valid(~np.isnan(values))
+    offset = np.zeros(values.shape[0])
+    has_values = first < values.shape[1]
+    offset[has_values] = values[has_values, first[has_values]]
+    return offset[:, None]
+
+
+def _rolling_mean(values: np.ndarray, period: int, center: bool = True) -> np.ndarray:
+    """
+    Mean of each trailing ``period`` window along time, NaN for windows with
+    a NaN. Uses cumulative sums; ``center`` subtracts each row's first value
+    beforehand so long rows don't lose precision.
+    """
+    rows, size = values.shape
+    mean = np.full(values.shape, np.nan)
+    if period > size:
+        return mean
+
+    offset = _row_offset(values) if center else 0.0
+    missing = np.isnan(values)
+    gaps = missing.any()
+    shifted = values - offset
+    if gaps:
+        shifted[missing] = 0.0
+    sums = np.cumsum(shifted, axis=1)
+
+    window = mean[:, period - 1 :]
+    window[:, 0] = sums[:, period - 1]
+    np.subtract(sums[:, period:], sums[:, :-period], out=window[:, 1:])
+    window /= period
+    window += offset
+    if gaps:
+        counts = np.zeros((rows, size + 1), dtype=np.int32)
+        np.cumsum(missing, axis=1, out=counts[:, 1:])
+        window[counts[:, period:] != counts[:, :-period]] = np.nan
+    return mean
+
+
+def _rolling_extreme(values: np.ndarray, period: int, combine) -> np.ndarray:
+    """
+    Trailing ``period`` max/min (van Herk/Gil-Werman): running extremes
+    forwards and backwards within blocks of ``period`` bars, so every
+    window is the combination of one suffix and one prefix. Windows with a
+    NaN give NaN.
+    """
+    rows, size = values.shape
+    if period > size:
+        return np.full(values.shape, np.nan)
+    blocks = -(-size // period)
+    padded = np.full((rows, blocks * period), np.nan)
+    padded[:, :size] = values
+    shaped = padded.reshape(rows, blocks, period)
+    prefix = combine.accumulate(shaped, axis=2).reshape(rows, -1)
+    suffix = combine.accumulate(shaped[:, :, ::-1], axis=2)[:, :, ::-1]
+    suffix = suffix.reshape(rows, -1)
+
+    extreme = np.full(values.shape, np.nan)
+    extreme[:, period - 1 :] = combine(
+        suffix[:, : size - period + 1], prefix[:, period - 1 : size]
+    )
+    return extreme
+
+
+def _wilder(values: np.ndarray, period: int) -> np.ndarray:
+    """Wilder's smoothing, (prev * (period - 1) + value) / period."""
+
+    def step(prev, value, out):
+        np.multiply(prev, period - 1, out=out)
+        out += value
+        out /= period
+
+    return _recurrence(values, period, step)
+
+
+def _recurrence(values: np.ndarray, period: int, step) -> np.ndarray:
+    """
+    ``step(out[t - 1], values[t], out=out[t])`` along time. Like TA-Lib,
+    each row is seeded with the mean of its first ``period`` values (from
+    its first non-NaN one) and is NaN before.
+
+    Runs one vector operation over all symbols per time step, on time-major
+    arrays so every step reads contiguous memory.
+    """
+    rows, size = values.shape
+    first = _first_valid(~np.isnan(values))
+    seeded_at = first + period - 1
+    live = np.flatnonzero(seeded_at < size)
+    out = np.full((size, rows), np.nan)
+    if len(live) == 0:
+        return out.T.copy()
+
+    seeds = values[live[:, None], first[live, None] + np.arange(period)].mean(axis=1)
+    # Rows seeded at time t: order[bounds[t]:bounds[t + 1]]
+    order = np.argsort(seeded_at[live], kind="stable")
+    bounds = np.searchsorted(seeded_at[live][order], np.arange(size + 1))
+    rows_at, seeds_at = live[order], seeds[order]
+
+    series = np.ascontiguousarray(values.T)
+    start = int(seeded_at[live].min())
+    with np.errstate(invalid="ignore"):
+        for t in range(start, size):
+            if t > start:
+                step(out[t - 1], series[t], out[t])
+            lo, hi = bounds[t], bounds[t + 1]
+            out[t, rows_at[lo:hi]] = seeds_at[lo:hi]
+    return np.ascontiguousarray(out.T)
+
+
+def _column_name(label) -> str:
+    """Lower-cases the pipeline's bar columns; other labels are kept."""
+    name = str(label)
+    return name.lower() if name.lower() in _BAR_COLUMNS else name
+
+
+def _dates(frame: pd.DataFrame) -> pd.DatetimeIndex:
+    lowered = {str(c).lower(): c for c in frame.columns}
+    if "date" in lowered:
+        return parse_timestamps(frame[lowered["date"]])
+    return parse_timestamps(pd.Series(frame.index))
@@ -0,0 +1,225 @@
+import logging
+import math
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from market_data.indicators import IndicatorCalculator, IndicatorPlan
+
+logger = logging.getLogger("rich")
+
+# (ticker, start, stop) row range of one ticker inside the packed blocks
+RowRange = Tuple[str, int, int]
+
+# Per-process calculator, created once by the pool initializer
+_worker_calculator: Optional[IndicatorCalculator] = None
+
+
+class ParallelIndicatorEngine:
+    """
+    Computes an indicator plan for many tickers on a process pool.
+
+    The OHLCV inputs of all tickers are packed into one shared-memory block
+    (one row per input column, tickers laid out back to back) and workers
+    write their results into a second shared block. Only row offsets and the
+    indicator list cross the process boundary, never DataFrames.
+    """
+
+    def __init__(self, workers: int, calculator: Optional[IndicatorCalculator] = None):
+        """
+        Args:
+            workers: Number of worker processes.
+            calculator: Calculator used to compile/validate plans in the parent.
+        """
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+
+        self.workers = workers
+        self.calculator = calculator or IndicatorCalculator()
+        self._pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+
+    def __enter__(self) -> "ParallelIndicatorEngine":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Shuts the worker processes down."""
+        self._pool.shutdown()
+
+    def add_indicators(
+        self, frames: Dict[str, pd.DataFrame], indicators: List[str]
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Appends indicator columns to every frame, computing them in parallel.
+
+        Args:
+            frames: OHLCV DataFrames keyed by ticker (column names are
+                    case-insensitive).
+            indicators: List of indicator strings (e.g. 'SMA_50').
+
+        Returns:
+            New frames (same keys) with the indicator columns appended.
+        """
+        plan = self.calculator.compile(indicators)
+        if not plan.specs or not frames:
+            return frames
+
+        ranges: List[RowRange] = []
+        offset = 0
+        for ticker, frame in frames.items():
+            ranges.append((ticker, offset, offset + len(frame)))
+            offset += len(frame)
+
+        in_shape = (len(plan.inputs), offset)
+        out_shape = (len(plan.columns), offset)
+        in_shm = _create_block(in_shape)
+        out_shm = _create_block(out_shape)
+        try:
+            return self._run(plan, frames, indicators, ranges, in_shm, out_shm)
+        finally:
+            _release_block(in_shm, unlink=True)
+            _release_block(out_shm, unlink=True)
+
+    def _run(
+        self,
+        plan: IndicatorPlan,
+        frames: Dict[str, pd.DataFrame],
+        indicators: List[str],
+        ranges: List[RowRange],
+        in_shm: shared_memory.SharedMemory,
+        out_shm: shared_memory.SharedMemory,
+    ) -> Dict[str, pd.DataFrame]:
+        """Packs the inputs, fans the ranges out to the pool and unpacks."""
+        in_shape = (len(plan.inputs), ranges[-1][2])
+        out_shape = (len(plan.columns), ranges[-1][2])
+        in_block = np.ndarray(in_shape, dtype=np.float64, buffer=in_shm.buf)
+        out_block = np.ndarray(out_shape, dtype=np.float64, buffer=out_shm.buf)
+        out_block.fill(np.nan)
+
+        for ticker, start, stop in ranges:
+            lowered = {c.lower(): c for c in frames[ticker].columns}
+            for row, column in enumerate(plan.inputs):
+                in_block[row, start:stop] = frames[ticker][lowered[column]]
+
+        futures = [
+            self._pool.submit(
+                _compute_ranges,
+                in_shm.name,
+                in_shape,
+                out_shm.name,
+                out_shape,
+                indicators,
+                chunk,
+            )
+            for chunk in self._split(ranges)
+        ]
+        dtypes: Dict[str, str] = {}
+        for future in futures:
+            dtypes.update(future.result())
+
+        # Indicators that failed in every worker are left out, as in
+        # IndicatorPlan.apply, rather than merged as all-NaN columns
+        rows = [row for row, column in enumerate(plan.columns) if column in dtypes]
+        columns = [plan.columns[row] for row in rows]
+
+        results = {}
+        for ticker, start, stop in ranges:
+            # Fancy indexing copies out of shared memory before it is released
+            block = pd.DataFrame(
+                out_block[rows, start:stop].T,
+                columns=columns,
+                index=frames[ticker].index,
+            )
+            for column, dtype in dtypes.items():
+                if dtype != block[column].dtype.str:
+                    block[column] = block[column].astype(dtype)
+            results[ticker] = pd.concat([frames[ticker], block], axis=1)
+        return results
+
+    def _split(self, ranges: List[RowRange]) -> List[List[RowRange]]:
+        """Groups tickers into roughly equal-row tasks, a few per worker."""
+        total = sum(stop - start for _, start, stop in ranges)
+        target = max(1, math.ceil(total / (self.workers * 4)))
+
+        chunks, current, rows = [], [], 0
+        for row_range in ranges:
+            current.append(row_range)
+            rows += row_range[2] - row_range[1]
+            if rows >= target:
+                chunks.append(current)
+                current, rows = [], 0
+        if current:
+            chunks.append(current)
+        return chunks
+
+
+def _create_block(shape: Tuple[int, int]) -> shared_memory.SharedMemory:
+    size = max(1, shape[0] * shape[1] * np.dtype(np.float64).itemsize)
+    return shared_memory.SharedMemory(create=True, size=size)
+
+
+def _release_block(shm: shared_memory.SharedMemory, unlink: bool = False) -> None:
+    try:
+        shm.close()
+    except BufferError:
+        # A view is still referenced (e.g. by an in-flight traceback); the
+        # mapping goes away with the process, unlinking still frees the block
+        pass
+    if unlink:
+        shm.unlink()
+
+
+def _init_worker() -> None:
+    global _worker_calculator
+    _worker_calculator = IndicatorCalculator()
+
+
+def _compute_ranges(
+    in_name: str,
+    in_shape: Tuple[int, int],
+    out_name: str,
+    out_shape: Tuple[int, int],
+    indicators: List[str],
+    ranges: List[RowRange],
+) -> Dict[str, str]:
+    """
+    Worker task: runs the plan over the given tickers' rows of the shared
+    input block and writes into the shared output block.
+
+    Returns:
+        The native dtype of every computed column, so the parent can restore
+        integer outputs (e.g. candlestick patterns).
+    """
+    calculator = _worker_calculator or IndicatorCalculator()
+    plan = calculator.compile(indicators)
+
+    # Pool workers share the parent's resource tracker, so attaching here does
+    # not take ownership; the parent unlinks the blocks when it is done.
+    in_shm = shared_memory.SharedMemory(name=in_name)
+    out_shm = shared_memory.SharedMemory(name=out_name)
+    try:
+        in_block = np.ndarray(in_shape, dtype=np.float64, buffer=in_shm.buf)
+        out_block = np.ndarray(out_shape, dtype=np.float64, buffer=out_shm.buf)
+
+        dtypes = {}
+        for _, start, stop in ranges:
+            inputs = {
+                column: in_block[row, start:stop]
+                for row, column in enumerate(plan.inputs)
+            }
+            results = plan.compute(inputs)
+            for row, column in enumerate(plan.columns):
+                if column in results:
+                    out_block[row, start:stop] = results[column]
+                    dtypes[column] = results[column].dtype.str
+            del inputs
+        del in_block, out_block
+        return dtypes
+    finally:
+        _release_block(in_shm)
+        _release_block(out_shm)
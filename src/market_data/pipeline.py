@@ -1,12 +1,26 @@
+import asyncio
 import logging
-from datetime import datetime
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Optional
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
+from market_data.async_client import AsyncAlpacaClient
+from market_data.buffers import BarBuffer
+from market_data.cache import ns_to_iso, to_ns
 from market_data.client import AlpacaClient
+from market_data.exporters import BarExporter, get_exporter
 from market_data.indicators import IndicatorCalculator
+from market_data.jobs import PageCheckpoint
+from market_data.market_calendar import TradingCalendar
+from market_data.metrics import NULL_METRICS, Metrics
+from market_data.parallel import ParallelIndicatorEngine
+from market_data.resample import resample_bars
+from market_data.store import BarStore
+from market_data.timeframes import parse_timeframe, timeframe_to_timedelta
 
 logger = logging.getLogger("rich")
 
@@ -17,33 +31,54 @@ class StockDataPipeline:
     Handles 'warm-up' periods for technical indicators to ensure data accuracy.
     """
 
-    def __init__(self, output_dir: str = "data"):
-        self.client = AlpacaClient()
-        self.calculator = IndicatorCalculator()
+    def __init__(
+        self,
+        output_dir: str = "data",
+        client: Optional[AlpacaClient] = None,
+        output_format: str = "csv",
+        exporter: Optional[BarExporter] = None,
+        workers: int = 1,
+        metrics: Optional[Metrics] = None,
+        shard_period: Optional[str] = None,
+        shard_concurrency: int = 8,
+        store: Optional[BarStore] = None,
+    ):
+        # Per-stage durations and row counts; a no-op unless a recorder is
+        # given (pass the same one to the client for request metrics)
+        self.metrics = metrics or NULL_METRICS
+        # One client (and so one pooled HTTP session) serves every ticker
+        self.client = client or AlpacaClient(metrics=self.metrics)
+        self.calculator = IndicatorCalculator(metrics=self.metrics)
+        self.calendar = TradingCalendar()
+        self.exporter = exporter or get_exporter(output_format)
+        # Indicators of batched runs go to a process pool when workers > 1
+        self.parallel = (
+            ParallelIndicatorEngine(workers, self.calculator) if workers > 1 else None
+        )
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        # Single-ticker fetches split the date range into shards of this
+        # size ('month', ...) fetched concurrently; None keeps one chain
+        self.shard_period = shard_period
+        self.shard_concurrency = shard_concurrency
+        # Every exported frame is also kept in this memory-mapped store, for
+        # fast time-slice reads (replacing the symbol's previous series)
+        self.store = store
+
+    def close(self) -> None:
+        """Releases the worker pool (if any) and the client's HTTP session."""
+        if self.parallel is not None:
+            self.parallel.close()
+        self.client.close()
 
     def _calculate_lookback_bars(self, indicators: List[str]) -> int:
         """
-        Determines the number of warm-up bars needed based on the requested indicators.
-        Default heuristic: max_period * 2.
-        """
-        max_period = 0
-        for ind in indicators:
-            parts = ind.split("_")
-            # Look for explicit period in name (e.g., SMA_50)
-            if len(parts) > 1 and parts[1].isdigit():
-                period = int(parts[1])
-                max_period = max(max_period, period)
-
-        # Default fallback if no periods found or period is 0
-        # (e.g. just "SMA" uses default 30)
-        if max_period == 0 and indicators:
-            max_period = (
-                30  # TA-Lib default 30 for some, 14 for others. 30 is safe-ish.
-            )
-
-        return max_period * 2 if max_period > 0 else 0
+        Number of warm-up bars the indicators need before their first valid
+        value, from TA-Lib's lookback for the exact parameters requested.
+        """
+        if not indicators:
+            return 0
+        return self.calculator.compile(indicators).lookback
 
     def process_ticker(
         self,
@@ -52,9 +87,11 @@ class StockDataPipeline:
         start_date: str,
         end_date: Optional[str] = None,
         indicators: Optional[List[str]] = None,
+        append: bool = False,
+        checkpoint: Optional[PageCheckpoint] = None,
     ) -> Path:
         """
-        Fetches data, calculates indicators, and writes to CSV.
+        Fetches data, calculates indicators, and writes the output file.
 
         Args:
             ticker: Stock symbol.
@@ -62,74 +99,557 @@ class StockDataPipeline:
             start_date: ISO start date string (YYYY-MM-DD).
             end_date: ISO end date string.
             indicators: List of indicator strings (e.g. 'SMA_50').
+            append: If the output file already exists, only fetch the bars
+                    after its last row and append them (see
+                    ``append_ticker``). Otherwise the file is written in full.
+            checkpoint: Resume point of the download (see ``jobs.JobRunner``).
 
         Returns:
-            Path to the generated CSV file.
+            Path to the generated file (CSV unless another format was chosen).
         """
         indicators = indicators or []
 
-        # 1. Calculate Warm-up
-        # Note: Proper date math for "50 bars ago" is hard without a market calendar.
-        # Simple heuristic: Fetch more data than we think we need.
-        # For '1Day', 1 bar ~ 1 day. For '1Min', 1 bar ~ 1 min.
-        # We will iterate backwards? Or just ask Alpaca for 'limit' bars
-        # ending at start_date?
-        # Alpaca /bars endpoint supports 'start' and 'end'.
-
-        # Use a safe buffer.
-        # If we just fetch requested range, the first N rows are invalid.
-        # We need to fetch (Start - Buffer) to End.
-        # Since we don't have easy calendar math here, we'll use a simplification:
-        # We fetch the requested range + X bars PRIOR.
-        # But Alpaca pagination is forward.
-        # Alternative: We always fetch from (Start - Delta).
-        # Delta depends on timeframe.
-
-        # For this phase, let's implement a 'days' based buffer heuristic for
-        # daily data,
-        # and maybe just warn for intraday or assume user gives us a buffered start?
-        # Requirement said: "Calculate indicators on the combined dataset...
-        # then slice off".
-
-        # Let's adjust start_date.
-        # For now, simplistic 'days' subtraction for 1Day.
-        actual_start_date = start_date
-
-        if indicators and timeframe == "1Day":
-            lookback_bars = self._calculate_lookback_bars(indicators)
-            if lookback_bars > 0:
-                # Sub 2x lookback days (counting weekends/holidays, 2x is
-                # usually safe buffer)
-                # Actually 4x to be safe for weekends?
-                start_dt = datetime.fromisoformat(start_date)
-                # This is a naive subtraction, robust solution needs market calendar
-                # But sticking to Requirement "robust data processing",
-                # we'll do best effort with datetime
-                from datetime import timedelta
-
-                # 1.5 * lookback * (7/5) to account for invalid days?
-                # Let's just do lookback * 3 days.
-                delta = timedelta(days=lookback_bars * 3)
-                warmup_start_dt = start_dt - delta
-                actual_start_date = warmup_start_dt.date().isoformat()
-                logger.info(
-                    f"Warm-up: Fetching data from {actual_start_date} "
-                    f"(Requested: {start_date})"
+        if append:
+            filepath = self._output_path(ticker, timeframe, start_date, end_date)
+            if filepath.exists():
+                return self.append_ticker(
+                    ticker, filepath, timeframe, end_date, indicators, checkpoint
                 )
 
+        # 1. Calculate Warm-up
+        actual_start_date = self._warmup_start_date(start_date, timeframe, indicators)
+
         # 2. Fetch Data
-        # We likely need pagination loop here if range is huge.
-        # Fortunately AlpacaClient handles pagination but returns a List.
-        # Ideally we stream, but step 1 is functionality.
+        # AlpacaClient handles pagination and appends pages into column buffers.
         logger.info(f"Processing {ticker}...")
-        bars = self.client.get_stock_bars(
-            tickers=[ticker],
-            timeframe=timeframe,
-            limit=10000,  # Large limit to minimize pages
-            start=actual_start_date,
-            end=end_date,
+        with self.metrics.timer("stage_seconds", stage="fetch"):
+            bars = self._fetch_ticker(
+                ticker, timeframe, actual_start_date, end_date, checkpoint
+            )
+
+        return self._export_bars(
+            ticker,
+            bars,
+            timeframe,
+            start_date,
+            end_date,
+            indicators,
+            actual_start_date,
         )
 
+    def append_ticker(
+        self,
+        ticker: str,
+        filepath: Path,
+        timeframe: str,
+        end_date: Optional[str] = None,
+        indicators: Optional[List[str]] = None,
+        checkpoint: Optional[PageCheckpoint] = None,
+    ) -> Path:
+        """
+        Brings an existing output file up to date.
+
+        Reads just enough trailing rows of the file for the indicators to
+        converge (see ``IndicatorPlan.convergence_bars``), fetches the bars
+        after its last timestamp, computes the indicators over tail + new
+        bars and appends only the new rows, so the file matches a full
+        rewrite. Work scales with the number of new bars, not the file's
+        history; a file shorter than the tail is rewritten instead.
+
+        Args:
+            ticker: Stock symbol.
+            filepath: Existing file written by this pipeline's exporter with
+                      the same indicators.
+            timeframe: Alpaca timeframe string (e.g. '1Day', '15Min').
+            end_date: ISO end date string (None for the latest bars).
+            indicators: List of indicator strings (e.g. 'SMA_50').
+            checkpoint: Resume point of the download (see ``jobs.JobRunner``).
+                        The file only changes once the download is complete,
+                        so a resumed append fetches from the same bar.
+
+        Returns:
+            ``filepath``.
+        """
+        indicators = indicators or []
+        plan = self.calculator.compile(indicators)
+        # Enough rows for recursive indicators (EMA, RSI, ...) to converge to
+        # the values of a full rewrite, and at least one to know where the
+        # file ends
+        tail_bars = max(plan.convergence_bars, 1)
+        with self.metrics.timer("stage_seconds", stage="read_tail"):
+            tail = self.exporter.read_tail(filepath, tail_bars)
+        if tail.empty:
+            raise ValueError(f"{filepath} has no rows to append to")
+        if len(tail) < tail_bars and plan.specs:
+            # The whole file is shorter than the tail, so its first rows were
+            # computed from warm-up bars it does not hold: rewrite it
+            return self._rewrite_file(
+                ticker, filepath, timeframe, tail, end_date, indicators, checkpoint
+            )
+
+        last_date = tail["date"].iloc[-1]
+        logger.info(f"Appending {ticker} bars after {last_date}...")
+        with self.metrics.timer("stage_seconds", stage="fetch"):
+            buffers = self.client.get_stock_bars_columnar(
+                tickers=[ticker],
+                timeframe=timeframe,
+                limit=10000,
+                start=ns_to_iso(last_date.value),
+                end=end_date,
+                checkpoint=checkpoint,
+            )
+        bars = buffers.get(ticker)
+        new = bars.to_frame() if bars is not None else None
+        if new is not None:
+            # The fetch starts at the last stored bar, which is not re-appended
+            new = new.iloc[new["date"].searchsorted(last_date, side="right") :]
+        if new is None or new.empty:
+            logger.info(f"{filepath} is already up to date")
+            return filepath
+
+        base_cols = [c for c in new.columns if c in tail.columns]
+        combined = pd.concat([tail[base_cols], new[base_cols]], ignore_index=True)
+        with self.metrics.timer("stage_seconds", stage="indicators"):
+            result = self.calculator.add_indicators(combined, indicators)
+        if set(result.columns) != set(tail.columns):
+            raise ValueError(
+                f"Columns of {filepath} do not match the requested indicators; "
+                "rewrite it without append mode"
+            )
+        _continue_offsets(result, tail, plan.offset_columns)
+
+        # Same column order as the file, only the rows after the tail
+        appended = result[list(tail.columns)].iloc[len(tail) :]
+        if self.store is not None:
+            # Before the file: the store rejects mismatched columns without
+            # writing and skips rows it already holds, so a retry after a
+            # failed export does not duplicate them
+            with self.metrics.timer("stage_seconds", stage="store"):
+                self.store.append(ticker, timeframe, appended)
+        with self.metrics.timer("stage_seconds", stage="export"):
+            self.exporter.append(appended, filepath)
+        self.metrics.increment("rows_exported_total", len(new))
+        logger.info(f"Appended {len(new)} rows to {filepath}")
+        return filepath
+
+    def _rewrite_file(
+        self,
+        ticker: str,
+        filepath: Path,
+        timeframe: str,
+        rows: pd.DataFrame,
+        end_date: Optional[str],
+        indicators: List[str],
+        checkpoint: Optional[PageCheckpoint] = None,
+    ) -> Path:
+        """
+        Append fallback for a file shorter than the indicators' convergence:
+        refetches it from its first row (plus warm-up) and replaces it.
+        """
+        start_date = ns_to_iso(rows["date"].iloc[0].value)
+        logger.info(f"{filepath} is shorter than the indicators' tail; rewriting")
+        actual_start_date = self._warmup_start_date(start_date, timeframe, indicators)
+        with self.metrics.timer("stage_seconds", stage="fetch"):
+            buffers = self.client.get_stock_bars_columnar(
+                tickers=[ticker],
+                timeframe=timeframe,
+                limit=10000,
+                start=actual_start_date,
+                end=end_date,
+                checkpoint=checkpoint,
+            )
+        bars = buffers.get(ticker)
+        if not bars:
+            logger.warning(
+                f"No data found for {ticker} (Range: {actual_start_date} to "
+                f"{end_date}); leaving {filepath} unchanged"
+            )
+            return filepath
+        with self.metrics.timer("stage_seconds", stage="indicators"):
+            df = self.calculator.add_indicators(bars.to_frame(), indicators)
+        df = _slice_from(df, start_date)
+        if set(df.columns) != set(rows.columns):
+            raise ValueError(
+                f"Columns of {filepath} do not match the requested indicators; "
+                "rewrite it without append mode"
+            )
+
+        tmp_path = _tmp_path(filepath)
+        with self.metrics.timer("stage_seconds", stage="export"):
+            self.exporter.write(df[list(rows.columns)], tmp_path)
+            os.replace(tmp_path, filepath)
+        if self.store is not None:
+            with self.metrics.timer("stage_seconds", stage="store"):
+                self.store.write(ticker, timeframe, df[list(rows.columns)])
+        self.metrics.increment("rows_exported_total", len(df) - len(rows))
+        logger.info(f"Rewrote {filepath} with {len(df)} rows")
+        return filepath
+
+    def process_ticker_timeframes(
+        self,
+        ticker: str,
+        timeframes: List[str],
+        start_date: str,
+        end_date: Optional[str] = None,
+        indicators: Optional[List[str]] = None,
+        base_timeframe: str = "1Min",
+    ) -> Dict[str, Optional[Path]]:
+        """
+        Serves several timeframes from one download.
+
+        Fetches ``base_timeframe`` bars once, from the earliest warm-up start
+        any of the timeframes needs (through the bar cache when the client has
+        one), and derives every timeframe locally with ``resample_bars``
+        before computing indicators and writing one file per timeframe.
+
+        Args:
+            ticker: Stock symbol.
+            timeframes: Target timeframes (e.g. ['5Min', '1Hour', '1Day']),
+                        each a whole multiple of ``base_timeframe``.
+            start_date: ISO start date string (YYYY-MM-DD).
+            end_date: ISO end date string.
+            indicators: List of indicator strings (e.g. 'SMA_50').
+            base_timeframe: Intraday timeframe to download.
+
+        Returns:
+            Path per timeframe (None where nothing was exported).
+        """
+        indicators = indicators or []
+        base = timeframe_to_timedelta(base_timeframe)
+        if parse_timeframe(base_timeframe)[1] not in ("Min", "Hour"):
+            raise ValueError("base_timeframe must be an intraday timeframe")
+        for timeframe in timeframes:
+            intraday = parse_timeframe(timeframe)[1] in ("Min", "Hour")
+            if intraday and timeframe_to_timedelta(timeframe) % base:
+                raise ValueError(
+                    f"{timeframe} is not a multiple of {base_timeframe} bars"
+                )
+
+        # Warm-up of the longest timeframe covers all the others
+        starts = {
+            tf: self._warmup_start_date(start_date, tf, indicators) for tf in timeframes
+        }
+        actual_start_date = min(starts.values(), key=to_ns)
+
+        logger.info(
+            f"Processing {ticker} ({', '.join(timeframes)} from {base_timeframe})..."
+        )
+        with self.metrics.timer("stage_seconds", stage="fetch"):
+            bars = self._fetch_ticker(
+                ticker, base_timeframe, actual_start_date, end_date
+            )
+        if not bars:
+            logger.warning(
+                f"No data found for {ticker} (Range: {actual_start_date} to "
+                f"{end_date}). Check if ticker is valid or market was open."
+            )
+            return dict.fromkeys(timeframes)
+
+        with self.metrics.timer("stage_seconds", stage="frame"):
+            base_frame = bars.to_frame()
+        paths = {}
+        for timeframe in timeframes:
+            with self.metrics.timer("stage_seconds", stage="resample"):
+                df = resample_bars(base_frame, timeframe)
+            with self.metrics.timer("stage_seconds", stage="indicators"):
+                df = self.calculator.add_indicators(df, indicators)
+            paths[timeframe] = self._export_frame(
+                ticker, df, timeframe, start_date, end_date
+            )
+        return paths
+
+    def process_tickers(
+        self,
+        tickers: List[str],
+        timeframe: str,
+        start_date: str,
+        end_date: Optional[str] = None,
+        indicators: Optional[List[str]] = None,
+        batch_size: int = 100,
+    ) -> Iterator[Tuple[str, Optional[Path], Optional[Exception]]]:
+        """
+        Batched variant of ``process_ticker`` for large universes.
+
+        Tickers are fetched ``batch_size`` symbols per request chain, the pages
+        are demultiplexed per symbol, and indicators/export then run for each
+        ticker individually.
+
+        Args:
+            tickers: Stock symbols to process.
+            timeframe: Alpaca timeframe string (e.g. '1Day', '15Min').
+            start_date: ISO start date string (YYYY-MM-DD).
+            end_date: ISO end date string.
+            indicators: List of indicator strings (e.g. 'SMA_50').
+            batch_size: Number of symbols per request chain.
+
+        Yields:
+            (ticker, path, error) for every ticker, in input order. ``path`` is
+            None when nothing was exported; ``error`` is set when the batch
+            fetch or that ticker's processing failed.
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+
+        indicators = indicators or []
+        actual_start_date = self._warmup_start_date(start_date, timeframe, indicators)
+
+        for i in range(0, len(tickers), batch_size):
+            batch = tickers[i : i + batch_size]
+            logger.info(f"Processing batch of {len(batch)}: {batch[0]}..{batch[-1]}")
+            try:
+                with self.metrics.timer("stage_seconds", stage="fetch"):
+                    buffers = self.client.get_stock_bars_columnar(
+                        tickers=batch,
+                        timeframe=timeframe,
+                        limit=10000,
+                        start=actual_start_date,
+                        end=end_date,
+                    )
+            except Exception as e:
+                logger.error(f"Batch fetch failed for {len(batch)} tickers: {e}")
+                for ticker in batch:
+                    yield ticker, None, e
+                continue
+
+            if self.parallel is not None:
+                yield from self._export_batch_parallel(
+                    batch,
+                    buffers,
+                    timeframe,
+                    start_date,
+                    end_date,
+                    indicators,
+                    actual_start_date,
+                )
+                continue
+
+            for ticker in batch:
+                try:
+                    path = self._export_bars(
+                        ticker,
+                        buffers.pop(ticker, None),
+                        timeframe,
+                        start_date,
+                        end_date,
+                        indicators,
+                        actual_start_date,
+                    )
+                except Exception as e:
+                    logger.error(f"Failed to process {ticker}: {e}")
+                    yield ticker, None, e
+                    continue
+                yield ticker, path, None
+
+    def _export_batch_parallel(
+        self,
+        batch: List[str],
+        buffers: Dict[str, BarBuffer],
+        timeframe: str,
+        start_date: str,
+        end_date: Optional[str],
+        indicators: List[str],
+        actual_start_date: str,
+    ) -> Iterator[Tuple[str, Optional[Path], Optional[Exception]]]:
+        """
+        Computes one fetched batch's indicators on the process pool, then
+        slices and exports each ticker.
+        """
+        with self.metrics.timer("stage_seconds", stage="frame"):
+            frames = {t: buffers[t].to_frame() for t in batch if buffers.get(t)}
+        try:
+            with self.metrics.timer("stage_seconds", stage="indicators"):
+                frames = self.parallel.add_indicators(frames, indicators)
+        except Exception as e:
+            logger.error(f"Parallel indicator calculation failed: {e}")
+            for ticker in batch:
+                yield ticker, None, e
+            return
+
+        for ticker in batch:
+            if ticker not in frames:
+                logger.warning(
+                    f"No data found for {ticker} (Range: {actual_start_date} to "
+                    f"{end_date}). Check if ticker is valid or market was open."
+                )
+                yield ticker, None, None
+                continue
+            try:
+                path = self._export_frame(
+                    ticker, frames.pop(ticker), timeframe, start_date, end_date
+                )
+            except Exception as e:
+                logger.error(f"Failed to process {ticker}: {e}")
+                yield ticker, None, e
+                continue
+            yield ticker, path, None
+
+    async def aprocess_tickers(
+        self,
+        tickers: List[str],
+        timeframe: str,
+        start_date: str,
+        end_date: Optional[str] = None,
+        indicators: Optional[List[str]] = None,
+        batch_size: int = 1,
+        max_concurrency: int = 8,
+        per_host_limit: Optional[int] = None,
+    ) -> AsyncIterator[Tuple[str, Optional[Path], Optional[Exception]]]:
+        """
+        Concurrent variant of ``process_tickers``.
+
+        Every batch of ``batch_size`` symbols is fetched on its own pagination
+        chain, with up to ``max_concurrency`` requests in flight. Indicator
+        calculation and export run on a separate worker as soon as a batch
+        arrives, so they overlap with the network I/O of the other batches.
+
+        Args:
+            tickers: Stock symbols to process.
+            timeframe: Alpaca timeframe string (e.g. '1Day', '15Min').
+            start_date: ISO start date string (YYYY-MM-DD).
+            end_date: ISO end date string.
+            indicators: List of indicator strings (e.g. 'SMA_50').
+            batch_size: Number of symbols per request chain.
+            max_concurrency: Maximum number of requests in flight.
+            per_host_limit: Maximum number of requests in flight per host.
+
+        Yields:
+            (ticker, path, error) for every ticker, in completion order.
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+
+        indicators = indicators or []
+        actual_start_date = self._warmup_start_date(start_date, timeframe, indicators)
+        batches = [
+            tickers[i : i + batch_size] for i in range(0, len(tickers), batch_size)
+        ]
+
+        async def fetch(async_client, batch):
+            try:
+                # Batches overlap, so these durations add up to more than the
+                # wall time
+                with self.metrics.timer("stage_seconds", stage="fetch"):
+                    buffers = await async_client.get_stock_bars_columnar(
+                        batch, timeframe, 10000, actual_start_date, end_date
+                    )
+                return batch, buffers, None
+            except Exception as e:
+                logger.error(f"Batch fetch failed for {len(batch)} tickers: {e}")
+                return batch, None, e
+
+        loop = asyncio.get_running_loop()
+        async with AsyncAlpacaClient(
+            self.client, max_concurrency, per_host_limit
+        ) as async_client:
+            # A single export worker keeps file writes ordered and off the loop
+            with ThreadPoolExecutor(max_workers=1) as export_pool:
+                tasks = [
+                    asyncio.ensure_future(fetch(async_client, batch))
+                    for batch in batches
+                ]
+                try:
+                    for next_done in asyncio.as_completed(tasks):
+                        batch, buffers, error = await next_done
+                        for ticker in batch:
+                            if error is not None:
+                                yield ticker, None, error
+                                continue
+                            try:
+                                path = await loop.run_in_executor(
+                                    export_pool,
+                                    self._export_bars,
+                                    ticker,
+                                    buffers.pop(ticker, None),
+                                    timeframe,
+                                    start_date,
+                                    end_date,
+                                    indicators,
+                                    actual_start_date,
+                                )
+                            except Exception as e:
+                                logger.error(f"Failed to process {ticker}: {e}")
+                                yield ticker, None, e
+                                continue
+                            yield ticker, path, None
+                finally:
+                    for task in tasks:
+                        task.cancel()
+
+    def _fetch_ticker(
+        self,
+        ticker: str,
+        timeframe: str,
+        start: str,
+        end: Optional[str],
+        checkpoint: Optional[PageCheckpoint] = None,
+    ) -> Optional[BarBuffer]:
+        """
+        Fetches one ticker's bars, as concurrent date-range shards when
+        ``shard_period`` is set (bypassing the bar cache and ``checkpoint``)
+        and on one pagination chain otherwise.
+        """
+        if self.shard_period is None:
+            buffers = self.client.get_stock_bars_columnar(
+                tickers=[ticker],
+                timeframe=timeframe,
+                limit=10000,  # Large limit to minimize pages
+                start=start,
+                end=end,
+                checkpoint=checkpoint,
+            )
+            return buffers.get(ticker)
+
+        async def fetch_sharded():
+            async with AsyncAlpacaClient(
+                self.client, self.shard_concurrency
+            ) as async_client:
+                return await async_client.fetch_sharded(
+                    ticker, timeframe, start, end, self.shard_period
+                )
+
+        return asyncio.run(fetch_sharded())
+
+    def _warmup_start_date(
+        self, start_date: str, timeframe: str, indicators: List[str]
+    ) -> str:
+        """
+        Returns the start date to fetch from so that indicators are warmed up
+        by ``start_date``.
+        """
+        # Fetch (start - warm-up) to end, then slice the warm-up off on export.
+        # The trading calendar turns "lookback bars before start" into a
+        # timestamp for any timeframe, skipping nights, weekends and holidays.
+        actual_start_date = start_date
+
+        lookback_bars = self._calculate_lookback_bars(indicators)
+        if lookback_bars > 0:
+            start = pd.Timestamp(to_ns(start_date), tz="UTC")
+            warmup_start = self.calendar.warmup_start(start, lookback_bars, timeframe)
+            if parse_timeframe(timeframe)[1] in ("Min", "Hour"):
+                actual_start_date = ns_to_iso(warmup_start.value)
+            else:
+                actual_start_date = warmup_start.date().isoformat()
+            logger.info(
+                f"Warm-up: Fetching data from {actual_start_date} "
+                f"(Requested: {start_date})"
+            )
+
+        return actual_start_date
+
+    def _export_bars(
+        self,
+        ticker: str,
+        bars: Optional[BarBuffer],
+        timeframe: str,
+        start_date: str,
+        end_date: Optional[str],
+        indicators: List[str],
+        actual_start_date: str,
+    ) -> Optional[Path]:
+        """
+        Steps 3-6 of the pipeline: build the DataFrame, calculate indicators,
+        slice off the warm-up and write the output file.
+        """
         if not bars:
             logger.warning(
                 f"No data found for {ticker} (Range: {actual_start_date} to "
@@ -138,37 +658,33 @@ class StockDataPipeline:
             return None
 
         # 3. Convert to DataFrame
-        df = pd.DataFrame(bars)
-        # Rename columns to standard names for IndicatorCalculator
-        # Alpaca: t, o, h, l, c, v
-        df.rename(
-            columns={
-                "t": "date",
-                "o": "open",
-                "h": "high",
-                "l": "low",
-                "c": "close",
-                "v": "volume",
-            },
-            inplace=True,
-        )
+        # The buffer already uses the standard names for IndicatorCalculator
+        # (Alpaca: t, o, h, l, c, v, n, vw -> date, open, ..., trade_count, vwap)
+        with self.metrics.timer("stage_seconds", stage="frame"):
+            df = bars.to_frame()
         # Ensure date is index? Or keep as column?
         # Indicators usually don't care about index, just order.
 
         # 4. Calculate Indicators
-        df = self.calculator.add_indicators(df, indicators)
+        with self.metrics.timer("stage_seconds", stage="indicators"):
+            df = self.calculator.add_indicators(df, indicators)
 
-        # 5. Slice off Warm-up
-        # original start_date string comparison.
-        # Ensure 'date' column is datetime-like or consistent string.
-        # Alpaca returns 't' as ISO string usually.
-        # Let's assume string comparison works if strict ISO8601.
+        return self._export_frame(ticker, df, timeframe, start_date, end_date)
 
-        # Allow exact match or greater.
-        # "2023-01-01" vs "2023-01-01T09:30:00Z"
-        # Simple string comparison: row['date'] >= start_date
-        mask = df["date"] >= start_date
-        final_df = df.loc[mask].copy()
+    def _export_frame(
+        self,
+        ticker: str,
+        df: pd.DataFrame,
+        timeframe: str,
+        start_date: str,
+        end_date: Optional[str],
+    ) -> Optional[Path]:
+        """Steps 5-6: slice off the warm-up and write the output file."""
+        # 5. Slice off Warm-up
+        # Bars are sorted by time, so the first bar at or after start_date is
+        # found by binary search instead of comparing every row
+        with self.metrics.timer("stage_seconds", stage="slice"):
+            final_df = _slice_from(df, start_date)
 
         if final_df.empty:
             logger.warning(
@@ -177,50 +693,225 @@ class StockDataPipeline:
             )
             return None
 
-        # 6. Export to CSV
-        filename = f"{ticker}_{timeframe}_{start_date}_{end_date or 'latest'}.csv"
+        # 6. Export (CSV by default, or a columnar format)
+        filepath = self._output_path(ticker, timeframe, start_date, end_date)
+        final_df = self._order_columns(final_df)
+
+        # Written under a temporary name and renamed, so an interrupted run
+        # never leaves a truncated file that looks finished
+        tmp_path = _tmp_path(filepath)
+        with self.metrics.timer("stage_seconds", stage="export"):
+            self.exporter.write(final_df, tmp_path)
+            os.replace(tmp_path, filepath)
+        if self.store is not None:
+            with self.metrics.timer("stage_seconds", stage="store"):
+                self.store.write(ticker, timeframe, final_df)
+        self.metrics.increment("rows_exported_total", len(final_df))
+        logger.info(f"Exported {len(final_df)} rows to {filepath}")
+
+        return filepath
+
+    def process_ticker_streaming(
+        self,
+        ticker: str,
+        timeframe: str,
+        start_date: str,
+        end_date: Optional[str] = None,
+        indicators: Optional[List[str]] = None,
+    ) -> Optional[Path]:
+        """
+        Memory-bounded variant of ``process_ticker``.
+
+        Pages flow through a generator pipeline (parse -> indicators -> append
+        to the output file) instead of being materialised as one DataFrame, so
+        peak memory depends on the page size rather than the date range.
+        Indicators are computed over each page plus a carried-over tail of the
+        previous bars, long enough for recursive indicators (EMA, RSI, MACD)
+        to converge, so the output matches ``process_ticker``'s; running
+        totals (OBV, AD) are shifted to continue the previous chunk.
+
+        Args:
+            ticker: Stock symbol.
+            timeframe: Alpaca timeframe string (e.g. '1Day', '15Min').
+            start_date: ISO start date string (YYYY-MM-DD).
+            end_date: ISO end date string.
+            indicators: List of indicator strings (e.g. 'SMA_50').
+
+        Returns:
+            Path to the generated file, or None if nothing was exported.
+
+        Raises:
+            ValueError: If the pipeline fetches in shards (``shard_period``);
+                        pages are streamed from one pagination chain.
+        """
+        if self.shard_period is not None:
+            raise ValueError("Streaming does not support sharded fetches")
+        indicators = indicators or []
+        actual_start_date = self._warmup_start_date(start_date, timeframe, indicators)
+
+        logger.info(f"Streaming {ticker}...")
+        pages = self.client.iter_stock_bars_columnar(
+            tickers=[ticker],
+            timeframe=timeframe,
+            limit=10000,
+            start=actual_start_date,
+            end=end_date,
+        )
+        frames = (bars.to_frame() for symbol, bars in pages if symbol == ticker)
+        frames = self._stream_indicators(frames, indicators)
+        frames = (_slice_from(frame, start_date) for frame in frames)
+
+        filepath = self._output_path(ticker, timeframe, start_date, end_date)
+        if self.store is not None:
+            frames = self._stream_store(frames, ticker, timeframe)
+        rows = self._stream_export(frames, filepath)
+        if rows == 0:
+            logger.warning(
+                f"No data remaining after warm-up for {ticker} (Range: "
+                f"{actual_start_date} to {end_date})."
+            )
+            return None
+
+        self.metrics.increment("rows_exported_total", rows)
+        logger.info(f"Exported {rows} rows to {filepath}")
+        return filepath
+
+    def _stream_indicators(
+        self, frames: Iterator[pd.DataFrame], indicators: List[str]
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Computes indicators chunk by chunk, prepending the last
+        ``convergence_bars`` rows of the previous chunk as warm-up state.
+        """
+        plan = self.calculator.compile(indicators)
+        tail_bars = plan.convergence_bars
+        tail = None
+        for frame in frames:
+            if frame.empty:
+                continue
+
+            combined = frame
+            if tail is not None and len(tail):
+                base_cols = list(frame.columns)
+                combined = pd.concat([tail[base_cols], frame], ignore_index=True)
+
+            with self.metrics.timer("stage_seconds", stage="indicators"):
+                result = self.calculator.add_indicators(combined, indicators)
+            if tail is not None and len(tail):
+                _continue_offsets(result, tail, plan.offset_columns)
+            yield result.iloc[len(combined) - len(frame) :]
+
+            tail = result.iloc[-tail_bars:] if tail_bars else None
+
+    def _stream_store(
+        self, frames: Iterator[pd.DataFrame], ticker: str, timeframe: str
+    ) -> Iterator[pd.DataFrame]:
+        """Passes the chunks through, writing them to the bar store as well."""
+        first = True
+        for frame in frames:
+            if frame.empty:
+                continue
+            frame = self._order_columns(frame)
+            with self.metrics.timer("stage_seconds", stage="store"):
+                if first:
+                    self.store.write(ticker, timeframe, frame)
+                else:
+                    self.store.append(ticker, timeframe, frame)
+            first = False
+            yield frame
+
+    def _stream_export(self, frames: Iterator[pd.DataFrame], filepath: Path) -> int:
+        """
+        Appends every non-empty chunk to ``filepath``. The file is only created
+        once there is something to write, and only appears under its name
+        once complete. Returns the number of rows written.
+        """
+        rows = 0
+        writer = None
+        tmp_path = _tmp_path(filepath)
+        try:
+            for frame in frames:
+                if frame.empty:
+                    continue
+                with self.metrics.timer("stage_seconds", stage="export"):
+                    if writer is None:
+                        writer = self.exporter.open_stream(tmp_path)
+                    writer.write(self._order_columns(frame))
+                rows += len(frame)
+        except BaseException:
+            if writer is not None:
+                writer.close()
+                tmp_path.unlink(missing_ok=True)
+            raise
+        if writer is not None:
+            writer.close()
+            os.replace(tmp_path, filepath)
+        return rows
+
+    def _output_path(
+        self, ticker: str, timeframe: str, start_date: str, end_date: Optional[str]
+    ) -> Path:
+        filename = (
+            f"{ticker}_{timeframe}_{start_date}_{end_date or 'latest'}"
+            f"{self.exporter.extension}"
+        )
         # Sanitize filename?
         filename = filename.replace(":", "-")
-        filepath = self.output_dir / filename
-
-        # Reorder columns explicitly
-        # Desired: date, open, high, low, close, volume, trade_count, vwap, [indicators]
+        return self.output_dir / filename
 
+    def _order_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Reorder columns explicitly.
+        Desired: date, open, high, low, close, volume, trade_count, vwap,
+        [indicators]
+        """
         # Ensure we have all base columns
-        base_cols = ["date", "open", "high", "low", "close", "volume"]
-
-        # Alpaca extra fields 'n' (trade count) and 'vw' (vwap) usually exist.
-        # Check if they exist in df before adding to list.
-        # Note: We renamed t->date, o->open, etc. 'n' and 'vw' are likely
-        # still 'n' and 'vw'
-        # unless we want to rename them too. User asked "where n and vw came from".
-        # Let's rename them for clarity if present.
-
-        if "n" in final_df.columns:
-            final_df.rename(columns={"n": "trade_count"}, inplace=True)
-            base_cols.append("trade_count")
-        if "vw" in final_df.columns:
-            final_df.rename(columns={"vw": "vwap"}, inplace=True)
-            base_cols.append("vwap")
+        # Alpaca extra fields 'n' (trade count) and 'vw' (vwap) usually exist;
+        # the buffer already exported them as trade_count/vwap when present.
+        base_cols = [
+            "date",
+            "open",
+            "high",
+            "low",
+            "close",
+            "volume",
+            "trade_count",
+            "vwap",
+        ]
 
         # Get indicator columns (all cols that are NOT in base_cols/renamed)
-        # However, final_df might have other cols?
+        # Some indicators return multiple columns (MACD -> MACD_0, MACD_1, ...),
+        # so simplest way: Base cols first, then everything else.
+        existing_base_cols = [c for c in base_cols if c in df.columns]
+        other_cols = [c for c in df.columns if c not in existing_base_cols]
+
+        return df[existing_base_cols + other_cols]
 
-        # Actually, let's identify indicator columns by the 'indicators' list
-        # we calculated.
-        # BUT, some indicators return multiple columns
-        # (MACD -> MACD, MACD_signal, MACD_hist).
-        # Our calculator adds them to DF.
 
-        # Simplest way: Base cols first, then everything else.
-        existing_base_cols = [c for c in base_cols if c in final_df.columns]
-        other_cols = [c for c in final_df.columns if c not in existing_base_cols]
+def _continue_offsets(
+    result: pd.DataFrame, tail: pd.DataFrame, columns: List[str]
+) -> None:
+    """
+    Shifts running-total columns of ``result``, recomputed from the first row
+    of ``tail``, so that they continue ``tail``'s values: both hold the last
+    tail row, and the difference there is the total before the tail.
+    """
+    row = len(tail) - 1
+    for column in columns:
+        shift = tail[column].iloc[-1] - result[column].iloc[row]
+        if np.isfinite(shift):
+            result[column] += shift
 
-        ordered_cols = existing_base_cols + other_cols
 
-        final_df = final_df[ordered_cols]
+def _tmp_path(path: Path) -> Path:
+    """Temporary name an output file is written under before the rename."""
+    return Path(f"{path}.tmp")
 
-        final_df.to_csv(filepath, index=False)
-        logger.info(f"Exported {len(final_df)} rows to {filepath}")
 
-        return filepath
+def _slice_from(df: pd.DataFrame, start_date: str) -> pd.DataFrame:
+    """
+    Rows of a time-sorted frame at or after ``start_date`` (naive values are
+    UTC), located with a binary search on the parsed date column.
+    """
+    start = pd.Timestamp(to_ns(start_date), tz="UTC")
+    return df.iloc[df["date"].searchsorted(start) :]
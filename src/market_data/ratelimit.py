@@ -0,0 +1,207 @@
+import fcntl
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Iterator, Mapping, Optional
+
+logger = logging.getLogger("rich")
+
+# Alpaca's market data quota on the basic plan
+DEFAULT_RATE_LIMIT_PER_MINUTE = 200
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket that paces requests under a per-minute quota.
+
+    Besides steady pacing, the bucket can be paused for everyone sharing it
+    (e.g. after a 429 with ``Retry-After``) and synced with the server's
+    ``X-RateLimit-Remaining``/``X-RateLimit-Reset`` headers, so a pool of
+    workers backs off together instead of each one hammering the API.
+    """
+
+    def __init__(
+        self,
+        rate_per_minute: float = DEFAULT_RATE_LIMIT_PER_MINUTE,
+        burst: Optional[float] = None,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """
+        Args:
+            rate_per_minute: Sustained number of requests allowed per minute.
+            burst: Bucket capacity (defaults to one minute worth of requests).
+            clock: Wall-clock source in epoch seconds (injectable for tests).
+            sleep: Sleep function (injectable for tests).
+        """
+        if rate_per_minute <= 0:
+            raise ValueError("rate_per_minute must be positive")
+
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(burst or rate_per_minute)
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._state = {
+            "tokens": self.capacity,
+            "updated": clock(),
+            "blocked_until": 0.0,
+        }
+
+    def acquire(self) -> float:
+        """
+        Blocks until a request may be sent.
+
+        Returns:
+            Total seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            with self._locked_state() as state:
+                now = self._clock()
+                self._refill(state, now)
+                if state["blocked_until"] > now:
+                    wait = state["blocked_until"] - now
+                elif state["tokens"] >= 1:
+                    state["tokens"] -= 1
+                    return waited
+                else:
+                    wait = (1 - state["tokens"]) / self.rate
+
+            self._sleep(wait)
+            waited += wait
+
+    def pause_until(self, timestamp: float) -> None:
+        """Stops every holder of the bucket from sending until ``timestamp``."""
+        with self._locked_state() as state:
+            if timestamp > state["blocked_until"]:
+                state["blocked_until"] = timestamp
+                # Nothing accrues while the server is refusing us
+                state["tokens"] = 0.0
+                state["updated"] = max(state["updated"], timestamp)
+
+    def pause_for(self, seconds: float) -> None:
+        """Stops every holder of the bucket from sending for ``seconds``."""
+        self.pause_until(self._clock() + seconds)
+
+    def observe(self, headers: Mapping[str, str]) -> None:
+        """
+        Syncs the bucket with the server's view of the quota.
+
+        Args:
+            headers: Response headers carrying ``X-RateLimit-Remaining`` and
+                     ``X-RateLimit-Reset`` (epoch seconds).
+        """
+        remaining = _parse_float(headers.get("X-RateLimit-Remaining"))
+        if remaining is None:
+            return
+
+        reset = _parse_float(headers.get("X-RateLimit-Reset"))
+        if remaining <= 0 and reset is not None:
+            self.pause_until(reset)
+            return
+
+        with self._locked_state() as state:
+            self._refill(state, self._clock())
+            state["tokens"] = min(state["tokens"], remaining)
+
+    def _refill(self, state: Dict[str, float], now: float) -> None:
+        elapsed = now - state["updated"]
+        if elapsed > 0:
+            state["tokens"] = min(self.capacity, state["tokens"] + elapsed * self.rate)
+            state["updated"] = now
+
+    @contextmanager
+    def _locked_state(self) -> Iterator[Dict[str, float]]:
+        with self._lock:
+            yield self._state
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    Token bucket whose state lives in a small file guarded by ``flock``.
+
+    Every process (and thread) pointing at the same ``path`` draws from the
+    same bucket, so separate jobs or pool workers stay under one shared quota.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        rate_per_minute: float = DEFAULT_RATE_LIMIT_PER_MINUTE,
+        burst: Optional[float] = None,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """
+        Args:
+            path: State file shared by all participants (created if missing).
+            rate_per_minute: Sustained number of requests allowed per minute.
+            burst: Bucket capacity (defaults to one minute worth of requests).
+            clock: Wall-clock source in epoch seconds.
+            sleep: Sleep function.
+        """
+        super().__init__(rate_per_minute, burst, clock, sleep)
+        self.path = path
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        os.close(fd)
+
+    @contextmanager
+    def _locked_state(self) -> Iterator[Dict[str, float]]:
+        with self._lock, open(self.path, "r+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                raw = f.read()
+                state = json.loads(raw) if raw else dict(self._state)
+                yield state
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def retry_after_seconds(
+    headers: Mapping[str, str], now: Optional[float] = None
+) -> Optional[float]:
+    """
+    Seconds the server asked us to wait, from ``Retry-After`` (seconds or
+    HTTP date) or, failing that, ``X-RateLimit-Reset``.
+    """
+    now = time.time() if now is None else now
+
+    retry_after = headers.get("Retry-After")
+    if retry_after:
+        seconds = _parse_float(retry_after)
+        if seconds is None:
+            try:
+                seconds = parsedate_to_datetime(retry_after).timestamp() - now
+            except (TypeError, ValueError):
+                seconds = None
+        if seconds is not None:
+            return max(seconds, 0.0)
+
+    reset = _parse_float(headers.get("X-RateLimit-Reset"))
+    if reset is not None:
+        return max(reset - now, 0.0)
+    return None
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """Exponential backoff with full jitter: uniform(0, min(cap, base * 2^n))."""
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+def _parse_float(value: Optional[str]) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
@@ -0,0 +1,138 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from market_data.buffers import parse_timestamps
+from market_data.market_calendar import EXCHANGE_TZ, TradingCalendar
+from market_data.timeframes import parse_timeframe
+
+_MINUTE_NS = 60 * 10**9
+
+
+def resample_bars(
+    df: pd.DataFrame,
+    timeframe: str,
+    calendar: Optional[TradingCalendar] = None,
+) -> pd.DataFrame:
+    """
+    Aggregates fine bars (e.g. 1Min) into a coarser Alpaca timeframe.
+
+    Stamps follow Alpaca's bars: intraday buckets are aligned to UTC
+    midnight and stamped with their start; Day, Week and Month bars are
+    stamped at midnight ET of the trading day, the week's Monday or the
+    month's first day. Buckets never span two trading days (in ET), so an
+    intraday bucket that crosses midnight is split rather than mixing
+    sessions; the part after the day change is stamped at its midnight ET.
+    Empty buckets produce no bar, like the API.
+
+    Aggregation: first open, max high, min low, last close, summed volume
+    and trade_count, and vwap weighted by volume.
+
+    Args:
+        df: Time-sorted bars with a 'date' column and the pipeline's base
+            columns (open, high, low, close, volume, trade_count, vwap).
+        timeframe: Target Alpaca timeframe (e.g. '5Min', '1Hour', '1Day').
+        calendar: If given, bars outside its sessions (regular hours unless
+                  it was built with ``extended_hours=True``) are dropped
+                  first, e.g. to build regular-hours daily bars.
+
+    Returns:
+        A new frame with the same base columns, one row per bucket.
+    """
+    amount, unit = parse_timeframe(timeframe)
+    if unit in ("Day", "Week") and amount != 1:
+        raise ValueError(f"Unsupported timeframe '{timeframe}' (Alpaca: 1{unit})")
+
+    dates = parse_timestamps(df["date"])
+    if calendar is not None:
+        keep = _in_session(dates, calendar)
+        df, dates = df.loc[keep], dates[keep]
+    if len(df) == 0:
+        return df.iloc[:0].assign(date=dates[:0]).reset_index(drop=True)
+
+    local_days = _local_midnights(dates)
+    if unit in ("Min", "Hour"):
+        size = amount * _MINUTE_NS * (60 if unit == "Hour" else 1)
+        # A bucket never starts before the bar's trading day, so buckets
+        # stop at day changes
+        stamps = np.maximum(dates.asi8 // size * size, local_days)
+    elif unit == "Day":
+        stamps = local_days
+    else:
+        stamps = _period_starts(local_days, unit, amount)
+
+    # Bars are sorted, so each bucket is a run of equal stamps
+    starts = np.flatnonzero(np.r_[True, stamps[1:] != stamps[:-1]])
+    ends = np.append(starts[1:], len(df)) - 1
+
+    lowered = {str(c).lower(): c for c in df.columns}
+    out = {"date": pd.DatetimeIndex(stamps[starts], tz="UTC")}
+    if "open" in lowered:
+        out["open"] = df[lowered["open"]].to_numpy()[starts]
+    if "high" in lowered:
+        out["high"] = np.maximum.reduceat(df[lowered["high"]].to_numpy(), starts)
+    if "low" in lowered:
+        out["low"] = np.minimum.reduceat(df[lowered["low"]].to_numpy(), starts)
+    if "close" in lowered:
+        out["close"] = df[lowered["close"]].to_numpy()[ends]
+    if "volume" in lowered:
+        volume = df[lowered["volume"]].to_numpy()
+        out["volume"] = np.add.reduceat(volume, starts)
+    if "trade_count" in lowered:
+        out["trade_count"] = np.add.reduceat(
+            df[lowered["trade_count"]].to_numpy(), starts
+        )
+    if "vwap" in lowered and "volume" in lowered:
+        out["vwap"] = _weighted_vwap(
+            df[lowered["vwap"]].to_numpy(dtype=float), volume, starts
+        )
+    return pd.DataFrame(out)
+
+
+def _weighted_vwap(vwap: np.ndarray, volume: np.ndarray, starts: np.ndarray):
+    """
+    Volume-weighted mean of the bar vwaps per bucket. Bars without volume
+    (or vwap) carry no weight; buckets without any volume get NaN.
+    """
+    weights = np.where(np.isnan(vwap), 0.0, volume.astype(float))
+    notional = np.add.reduceat(np.where(weights > 0, vwap * weights, 0.0), starts)
+    total = np.add.reduceat(weights, starts)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(total > 0, notional / total, np.nan)
+
+
+def _local_midnights(dates: pd.DatetimeIndex) -> np.ndarray:
+    """Midnight ET of each bar's exchange date, as UTC epoch nanoseconds."""
+    return dates.tz_convert(EXCHANGE_TZ).normalize().asi8
+
+
+def _period_starts(local_days: np.ndarray, unit: str, amount: int) -> np.ndarray:
+    """Week (Monday) or month (first day, every ``amount`` months) starts."""
+    days = pd.DatetimeIndex(local_days, tz="UTC").tz_convert(EXCHANGE_TZ)
+    naive = days.tz_localize(None)
+    if unit == "Week":
+        starts = naive - pd.to_timedelta(naive.weekday, unit="D")
+    else:
+        months = naive.year * 12 + naive.month - 1
+        months = months - months % amount
+        starts = pd.to_datetime(
+            {"year": months // 12, "month": months % 12 + 1, "day": 1}
+        )
+    return pd.DatetimeIndex(starts).tz_localize(EXCHANGE_TZ).asi8
+
+
+def _in_session(dates: pd.DatetimeIndex, calendar: TradingCalendar) -> np.ndarray:
+    """Mask of the bars that start inside one of the calendar's sessions."""
+    ns = dates.asi8
+    days = dates.tz_convert(EXCHANGE_TZ).normalize()
+    unique_days, inverse = np.unique(days.asi8, return_inverse=True)
+    opens = np.empty(len(unique_days), dtype=np.int64)
+    closes = np.empty(len(unique_days), dtype=np.int64)
+    for i, day in enumerate(unique_days):
+        local = pd.Timestamp(day, tz="UTC").tz_convert(EXCHANGE_TZ).date()
+        if calendar.is_session(local):
+            opens[i], closes[i] = calendar.session_bounds(local)
+        else:
+            opens[i] = closes[i] = 0
+    return (ns >= opens[inverse]) & (ns < closes[inverse])
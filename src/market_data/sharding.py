@@ -0,0 +1,77 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from market_data.buffers import BarBuffer, parse_timestamps
+from market_data.cache import ns_to_iso, to_ns
+
+# Shard size name -> pandas offset alias of the shard boundaries
+SHARD_PERIODS = {
+    "week": "W-MON",
+    "month": "MS",
+    "quarter": "QS",
+    "year": "YS",
+}
+
+
+def shard_ranges(
+    start: str, end: Optional[str] = None, period: str = "month"
+) -> List[Tuple[str, str]]:
+    """
+    Splits [start, end] into consecutive sub-ranges at calendar boundaries,
+    so a deep backfill can run one pagination chain per shard.
+
+    Neighbouring shards share their boundary timestamp (the API's start and
+    end are both inclusive); ``stitch_shards`` drops the repeated bar.
+
+    Args:
+        start: Start date/time (naive values are UTC).
+        end: End date/time (default: now).
+        period: 'week', 'month', 'quarter', 'year' or a pandas offset alias.
+
+    Returns:
+        (start, end) pairs as RFC3339 strings, in time order.
+    """
+    start_ns = to_ns(start)
+    end_ns = to_ns(end) if end else int(pd.Timestamp.now(tz="UTC").value)
+    if end_ns <= start_ns:
+        return [(ns_to_iso(start_ns), ns_to_iso(end_ns))]
+
+    boundaries = pd.date_range(
+        pd.Timestamp(start_ns, tz="UTC"),
+        pd.Timestamp(end_ns, tz="UTC"),
+        freq=SHARD_PERIODS.get(period, period),
+        normalize=True,
+    ).asi8
+    edges = [start_ns]
+    edges.extend(int(b) for b in boundaries if start_ns < b < end_ns)
+    edges.append(end_ns)
+    return [(ns_to_iso(a), ns_to_iso(b)) for a, b in zip(edges[:-1], edges[1:])]
+
+
+def stitch_shards(shards: List[Optional[BarBuffer]]) -> Optional[BarBuffer]:
+    """
+    Concatenates per-shard buffers (in time order) into one, dropping every
+    bar that is not later than the bars before it, i.e. the bars repeated at
+    shard boundaries.
+
+    Returns:
+        The stitched buffer, or None when no shard returned bars.
+    """
+    shards = [shard for shard in shards if shard]
+    if not shards:
+        return None
+
+    stitched = BarBuffer(capacity=sum(len(shard) for shard in shards))
+    for shard in shards:
+        stitched.extend_buffer(shard)
+
+    ns = parse_timestamps(stitched.column("t")).asi8
+    keep = np.ones(len(ns), dtype=bool)
+    keep[1:] = ns[1:] > np.maximum.accumulate(ns)[:-1]
+    if keep.all():
+        return stitched
+    return BarBuffer.from_columns(
+        {field: stitched.column(field)[keep] for field in stitched.fields}
+    )
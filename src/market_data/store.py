@@ -0,0 +1,250 @@
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from market_data.buffers import parse_timestamps
+from market_data.cache import to_ns
+
+# Rows between two entries of the sparse time index
+INDEX_STRIDE = 4096
+
+
+class BarStore:
+    """
+    Local bar store with memory-mapped, fixed-width column files.
+
+    Each (symbol, timeframe) series is a directory holding one raw
+    little-endian file per column (``date`` as epoch nanoseconds, prices and
+    indicators as float64, counts as int64) and ``meta.json`` with the row
+    count, dtypes and a sparse time index of every ``index_stride``-th
+    timestamp. A time slice is located with two binary searches (sparse index,
+    then one block of the date column) and returned as views of the mapped
+    files, so loading "AAPL 1Min, 2021-03" reads only the pages of that
+    month. Read-only maps of the same files share the OS page cache across
+    processes.
+
+    ``meta.json`` is the commit point: it is replaced atomically after the
+    column files are written, and readers only map the rows it records.
+    ``write`` puts a new generation of column files next to the old one, so
+    readers (and a crash mid-write) never see a half-replaced series.
+
+    Layout: ``<root>/<timeframe>/<SYMBOL>/{<column>.<generation>.bin,
+    meta.json}``.
+    """
+
+    def __init__(self, root: str = "data/store", index_stride: int = INDEX_STRIDE):
+        """
+        Args:
+            root: Store directory.
+            index_stride: Rows per sparse index entry for new series.
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.index_stride = index_stride
+
+    def write(self, symbol: str, timeframe: str, df: pd.DataFrame) -> None:
+        """
+        Replaces a series with a time-sorted frame (a ``date`` column plus
+        numeric columns, e.g. the pipeline's bars + indicators).
+        """
+        columns = _to_columns(df)
+        directory = self._path(symbol, timeframe)
+        directory.mkdir(parents=True, exist_ok=True)
+        old = self._meta(symbol, timeframe)
+        generation = old["generation"] + 1 if old else 0
+
+        for name, values in columns.items():
+            values.tofile(directory / f"{name}.{generation}.bin")
+
+        meta = {
+            "generation": generation,
+            "rows": len(df),
+            "index_stride": self.index_stride,
+            "index": columns["date"][:: self.index_stride].tolist(),
+            "columns": {name: values.dtype.str for name, values in columns.items()},
+        }
+        _write_meta(directory, meta)
+
+        # Files of older generations (mapped readers keep their open inodes)
+        current = {f"{name}.{generation}.bin" for name in columns}
+        for path in directory.glob("*.bin"):
+            if path.name not in current:
+                path.unlink()
+
+    def append(self, symbol: str, timeframe: str, df: pd.DataFrame) -> int:
+        """
+        Appends the rows of ``df`` that are later than the last stored bar
+        (the whole frame when the series doesn't exist yet). The columns must
+        match the stored ones.
+
+        Returns:
+            Number of rows appended.
+        """
+        meta = self._meta(symbol, timeframe)
+        if meta is None:
+            self.write(symbol, timeframe, df)
+            return len(df)
+
+        directory = self._path(symbol, timeframe)
+        columns = _to_columns(df)
+        if set(columns) != set(meta["columns"]):
+            raise ValueError(
+                f"Columns of {symbol} {timeframe} do not match the store "
+                f"({', '.join(meta['columns'])})"
+            )
+
+        rows = meta["rows"]
+        if rows:
+            last = self._map(directory, "date", meta)[-1]
+            keep = np.searchsorted(columns["date"], last, side="right")
+            columns = {name: values[keep:] for name, values in columns.items()}
+        added = len(columns["date"])
+        if added == 0:
+            return 0
+
+        for name, dtype in meta["columns"].items():
+            values = columns[name].astype(dtype, copy=False)
+            path = directory / f"{name}.{meta['generation']}.bin"
+            with open(path, "r+b") as f:
+                # Drop bytes of an append that crashed before its commit
+                f.truncate(rows * values.itemsize)
+                f.seek(0, os.SEEK_END)
+                values.tofile(f)
+
+        meta["rows"] = rows + added
+        dates = self._map(directory, "date", meta)
+        meta["index"] = dates[:: meta["index_stride"]].tolist()
+        _write_meta(directory, meta)
+        return added
+
+    def slice(
+        self,
+        symbol: str,
+        timeframe: str,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        columns: Optional[List[str]] = None,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Columns of the bars with start <= date <= end, as read-only views of
+        the mapped files (no copy). ``date`` is epoch nanoseconds.
+
+        Args:
+            symbol: Stock symbol.
+            timeframe: Timeframe of the series (e.g. '1Min').
+            start: Inclusive start date/time (naive values are UTC).
+            end: Inclusive end date/time.
+            columns: Columns to map (default: all); ``date`` is always
+                     included.
+
+        Raises:
+            KeyError: If the series is not in the store.
+        """
+        meta = self._meta(symbol, timeframe)
+        if meta is None:
+            raise KeyError(f"{symbol} {timeframe} is not in the store")
+
+        directory = self._path(symbol, timeframe)
+        dates = self._map(directory, "date", meta)
+        index = np.asarray(meta["index"], dtype=np.int64)
+        stride = meta["index_stride"]
+        lo = _locate(dates, index, stride, to_ns(start), "left") if start else 0
+        hi = _locate(dates, index, stride, to_ns(end), "right") if end else len(dates)
+
+        names = list(meta["columns"]) if columns is None else ["date", *columns]
+        return {
+            name: self._map(directory, name, meta)[lo:hi]
+            for name in dict.fromkeys(names)
+        }
+
+    def read(
+        self,
+        symbol: str,
+        timeframe: str,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        columns: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        A time slice as a DataFrame like the pipeline's output, with a
+        tz-aware UTC ``date`` column. Value columns are views of the mapped
+        files; only the slice's dates are materialised (to attach the time
+        zone).
+        """
+        sliced = self.slice(symbol, timeframe, start, end, columns)
+        # Plain ndarray views of the maps (pandas keeps the memmap subclass)
+        frame = {name: np.asarray(values) for name, values in sliced.items()}
+        frame["date"] = parse_timestamps(sliced["date"])
+        return pd.DataFrame(frame, copy=False)
+
+    def symbols(self, timeframe: str) -> List[str]:
+        """Symbols stored for a timeframe."""
+        directory = self.root / timeframe
+        if not directory.exists():
+            return []
+        return sorted(p.name for p in directory.iterdir() if (p / "meta.json").exists())
+
+    def delete(self, symbol: str, timeframe: str) -> None:
+        shutil.rmtree(self._path(symbol, timeframe), ignore_errors=True)
+
+    def _path(self, symbol: str, timeframe: str) -> Path:
+        return self.root / timeframe / symbol
+
+    def _meta(self, symbol: str, timeframe: str) -> Optional[dict]:
+        path = self._path(symbol, timeframe) / "meta.json"
+        if not path.exists():
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def _map(self, directory: Path, name: str, meta: dict) -> np.ndarray:
+        rows = meta["rows"]
+        if rows == 0:
+            return np.empty(0, dtype=meta["columns"][name])
+        return np.memmap(
+            directory / f"{name}.{meta['generation']}.bin",
+            dtype=meta["columns"][name],
+            mode="r",
+            shape=(rows,),
+        )
+
+
+def _to_columns(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """Fixed-width column arrays of a frame; ``date`` as epoch nanoseconds."""
+    if "date" not in df.columns:
+        raise ValueError("The frame needs a date column")
+
+    columns = {"date": np.asarray(parse_timestamps(df["date"]).asi8, dtype="<i8")}
+    for name in df.columns:
+        if name == "date":
+            continue
+        values = df[name].to_numpy()
+        if values.dtype.kind not in "biuf":
+            raise ValueError(f"Column {name} is not numeric ({values.dtype})")
+        columns[name] = values.astype(values.dtype.newbyteorder("<"), copy=False)
+    return columns
+
+
+def _locate(
+    dates: np.ndarray, index: np.ndarray, stride: int, value: int, side: str
+) -> int:
+    """
+    ``np.searchsorted(dates, value, side)``, touching only the sparse index
+    and one ``stride``-row block of the mapped date column.
+    """
+    block = max(int(np.searchsorted(index, value, side=side)) - 1, 0)
+    lo = block * stride
+    return lo + int(np.searchsorted(dates[lo : lo + stride], value, side=side))
+
+
+def _write_meta(directory: Path, meta: dict) -> None:
+    path = directory / "meta.json"
+    tmp_path = Path(f"{path}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, path)
@@ -0,0 +1,47 @@
+import re
+from datetime import timedelta
+from typing import Tuple
+
+# Alpaca accepts both long ("15Min") and short ("15T") unit spellings
+_TIMEFRAME_PATTERN = re.compile(r"^(\d+)(Min|T|Hour|H|Day|D|Week|W|Month|M)$")
+_UNITS = {
+    "Min": "Min",
+    "T": "Min",
+    "Hour": "Hour",
+    "H": "Hour",
+    "Day": "Day",
+    "D": "Day",
+    "Week": "Week",
+    "W": "Week",
+    "Month": "Month",
+    "M": "Month",
+}
+
+
+def parse_timeframe(timeframe: str) -> Tuple[int, str]:
+    """
+    Splits an Alpaca timeframe string into amount and canonical unit.
+
+    Example: '15Min' -> (15, 'Min'), '1D' -> (1, 'Day').
+    """
+    match = _TIMEFRAME_PATTERN.match(timeframe.strip())
+    if not match or int(match.group(1)) < 1:
+        raise ValueError(f"Unsupported timeframe '{timeframe}'")
+    return int(match.group(1)), _UNITS[match.group(2)]
+
+
+def timeframe_to_timedelta(timeframe: str) -> timedelta:
+    """
+    Nominal duration of one bar. Months are approximated as 31 days, which
+    is an upper bound suitable for padding and settling decisions.
+    """
+    amount, unit = parse_timeframe(timeframe)
+    if unit == "Min":
+        return timedelta(minutes=amount)
+    if unit == "Hour":
+        return timedelta(hours=amount)
+    if unit == "Day":
+        return timedelta(days=amount)
+    if unit == "Week":
+        return timedelta(weeks=amount)
+    return timedelta(days=31 * amount)
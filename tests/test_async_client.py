@@ -0,0 +1,115 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from market_data.async_client import AsyncAlpacaClient
+from market_data.client import AlpacaClient
+
+
+class MockBarsHandler(BaseHTTPRequestHandler):
+    """Serves two pages of bars per request chain and tracks concurrency."""
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+
+        time.sleep(0.05)
+        query = parse_qs(urlparse(self.path).query)
+        symbols = query["symbols"][0].split(",")
+        second_page = query.get("page_token") == ["p2"]
+        day = "2023-01-02" if second_page else "2023-01-01"
+        payload = {
+            "bars": {s: [{"t": day, "o": 1, "h": 1, "l": 1, "c": 1}] for s in symbols},
+            "next_page_token": None if second_page else "p2",
+        }
+        body = json.dumps(payload).encode()
+
+        with server.lock:
+            server.in_flight -= 1
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def mock_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockBarsHandler)
+    server.lock = threading.Lock()
+    server.in_flight = 0
+    server.max_in_flight = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(mock_server):
+    os.environ["APCA_API_KEY_ID"] = "TEST_KEY"
+    os.environ["APCA_API_SECRET_KEY"] = "TEST_SECRET"
+    client = AlpacaClient(pool_size=4)
+    host, port = mock_server.server_address
+    client.BASE_URL = f"http://{host}:{port}/v2/stocks/bars"
+    yield client
+    client.close()
+
+
+def test_fetch_many_concurrently(client, mock_server):
+    async def run():
+        async with AsyncAlpacaClient(client, max_concurrency=4) as async_client:
+            return await async_client.fetch_many(
+                [["AAPL"], ["MSFT"], ["QQQ"], ["SPY"], ["IWM"], ["DIA"]], "1Day"
+            )
+
+    buffers = asyncio.run(run())
+
+    assert set(buffers) == {"AAPL", "MSFT", "QQQ", "SPY", "IWM", "DIA"}
+    assert buffers["QQQ"].column("t").tolist() == ["2023-01-01", "2023-01-02"]
+    assert 1 < mock_server.max_in_flight <= 4
+
+
+def test_per_host_limit(client, mock_server):
+    async def run():
+        async with AsyncAlpacaClient(
+            client, max_concurrency=4, per_host_limit=2
+        ) as async_client:
+            return await async_client.fetch_ranges(
+                "AAPL",
+                "1Day",
+                [("2023-01-01", "2023-01-02"), ("2023-02-01", "2023-02-02")] * 2,
+            )
+
+    shards = asyncio.run(run())
+
+    assert len(shards) == 4
+    assert all(len(shard) == 2 for shard in shards)
+    assert mock_server.max_in_flight <= 2
+
+
+def test_fetch_sharded_stitches_in_order(client, mock_server):
+    async def run():
+        async with AsyncAlpacaClient(client, max_concurrency=4) as async_client:
+            return await async_client.fetch_sharded(
+                "AAPL", "1Day", "2023-01-01", "2023-04-15", period="month"
+            )
+
+    bars = asyncio.run(run())
+
+    # Every shard returns the same two days; the repeats are dropped
+    assert bars.column("t").tolist() == ["2023-01-01", "2023-01-02"]
+    assert 1 < mock_server.max_in_flight <= 4
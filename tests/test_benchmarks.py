@@ -0,0 +1,50 @@
+import os
+
+from benchmarks import harness
+from benchmarks.replay import ReplayServer
+from market_data.client import AlpacaClient
+from market_data.ratelimit import TokenBucket
+
+os.environ["APCA_API_KEY_ID"] = "TEST_KEY"
+os.environ["APCA_API_SECRET_KEY"] = "TEST_SECRET"
+
+
+def test_replay_server_pages_like_the_api():
+    server = ReplayServer(["AAA", "BBB"], bars_per_symbol=25, page_size=10)
+    client = AlpacaClient(rate_limiter=TokenBucket(rate_per_minute=1e6))
+    client.BASE_URL = server.start()
+    try:
+        bars = client.get_stock_bars_columnar(["AAA", "BBB"], "1Min", limit=10)
+    finally:
+        server.close()
+        client.close()
+
+    assert server.requests == 5
+    assert {symbol: len(b) for symbol, b in bars.items()} == {"AAA": 25, "BBB": 25}
+
+
+def test_result_statistics():
+    result = harness.Result("case", 1000, [0.1, 0.2, 0.3, 0.4], 0, 0)
+
+    assert result.percentile(50) == 0.25
+    assert result.bars_per_second == 4000
+
+
+def test_compare_flags_slowdowns_and_memory_growth():
+    baseline = {
+        "fast": {"bars_per_s": 1000.0, "stage_rss_mb": 10.0},
+        "lean": {"bars_per_s": 1000.0, "stage_rss_mb": 10.0},
+    }
+    mib = 2**20
+    results = [
+        # Median 2 s for 1000 bars: 500 bars/s, half the baseline
+        harness.Result("fast", 1000, [2.0], 0, 10 * mib),
+        harness.Result("lean", 1000, [1.0], 0, 50 * mib),
+        harness.Result("new", 1000, [9.0], 0, 0),
+    ]
+
+    regressions = harness.compare(results, baseline, tolerance=0.2)
+
+    assert len(regressions) == 2
+    assert regressions[0].startswith("fast: 500 bars/s")
+    assert regressions[1].startswith("lean: 50.0 MB")
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+from market_data.buffers import BarBuffer, format_timestamps
+
+
+def make_bars(start, count):
+    return [
+        {
+            "t": f"2023-01-{day:02d}T05:00:00Z",
+            "o": float(day),
+            "h": day + 1.0,
+            "l": day - 1.0,
+            "c": day + 0.5,
+            "v": day * 100,
+            "n": day,
+            "vw": day + 0.25,
+        }
+        for day in range(start, start + count)
+    ]
+
+
+def test_extend_grows_capacity():
+    buffer = BarBuffer(capacity=2)
+    buffer.extend(make_bars(1, 3))
+    buffer.extend(make_bars(4, 5))
+
+    assert len(buffer) == 8
+    np.testing.assert_array_equal(buffer.column("o"), np.arange(1, 9, dtype=float))
+    assert buffer.column("v").dtype == np.int64
+    assert buffer.column("t")[-1] == "2023-01-08T05:00:00Z"
+
+
+def test_to_frame_uses_pipeline_column_names():
+    df = BarBuffer.from_bars(make_bars(1, 4)).to_frame()
+
+    assert list(df.columns) == [
+        "date",
+        "open",
+        "high",
+        "low",
+        "close",
+        "volume",
+        "trade_count",
+        "vwap",
+    ]
+    assert df["close"].tolist() == [1.5, 2.5, 3.5, 4.5]
+
+
+def test_optional_fields():
+    # Fields that never appear are dropped; partially present ones are filled
+    bars = [{"t": "2023-01-01", "o": 1, "h": 1, "l": 1, "c": 1, "v": 10}]
+    bars.append(dict(bars[0], t="2023-01-02", vw=1.5))
+    df = BarBuffer.from_bars(bars).to_frame()
+
+    assert "trade_count" not in df.columns
+    assert np.isnan(df["vwap"].iloc[0])
+    assert df["vwap"].iloc[1] == 1.5
+
+
+def test_to_frame_parses_dates_once():
+    df = BarBuffer.from_bars(make_bars(1, 3)).to_frame()
+
+    assert str(df["date"].dtype) == "datetime64[ns, UTC]"
+    assert df["date"].iloc[0] == pd.Timestamp("2023-01-01 05:00", tz="UTC")
+    assert format_timestamps(df["date"]).tolist() == [
+        bar["t"] for bar in make_bars(1, 3)
+    ]
+
+
+def test_extend_buffer_merges_pages():
+    # A page without vw appended to one with it keeps the column, NaN-filled
+    buffer = BarBuffer.from_bars(make_bars(1, 2))
+    buffer.extend_buffer(
+        BarBuffer.from_bars([{"t": "2023-01-03T05:00:00Z", "o": 3.0, "c": 3.5}])
+    )
+    df = buffer.to_frame()
+
+    assert len(df) == 3
+    assert df["close"].tolist() == [1.5, 2.5, 3.5]
+    assert df["volume"].tolist()[-1] == 0
+    assert np.isnan(df["vwap"].iloc[-1])
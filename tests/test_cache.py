@@ -0,0 +1,113 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests_mock
+
+from market_data.buffers import BarBuffer
+from market_data.cache import BarCache, to_ns
+from market_data.client import AlpacaClient
+
+
+def make_bars(days, close=1.0):
+    return [
+        {"t": f"2023-01-{d:02d}T05:00:00Z", "o": 1, "h": 1, "l": 1, "c": close}
+        for d in days
+    ]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return BarCache(str(tmp_path / "cache"))
+
+
+def test_missing_ranges(cache):
+    start, end = to_ns("2023-01-01"), to_ns("2023-01-31")
+    assert cache.missing_ranges("AAPL", "1Day", "iex", start, end) == [(start, end)]
+
+    mid = to_ns("2023-01-10")
+    bars = BarBuffer.from_bars(make_bars(range(1, 10)))
+    cache.write("AAPL", "1Day", "iex", bars, start, mid)
+
+    assert cache.missing_ranges("AAPL", "1Day", "iex", start, end) == [(mid, end)]
+    assert cache.missing_ranges("AAPL", "1Day", "iex", start, mid) == []
+    # Keys are independent
+    assert cache.missing_ranges("AAPL", "1Hour", "iex", start, mid) == [(start, mid)]
+
+
+def test_write_merges_and_deduplicates(cache):
+    start, end = to_ns("2023-01-01"), to_ns("2023-01-31")
+    cache.write("AAPL", "1Day", "iex", BarBuffer.from_bars(make_bars([1, 2, 3])), 0, 1)
+    cache.write(
+        "AAPL", "1Day", "iex", BarBuffer.from_bars(make_bars([3, 4], close=2.0)), 0, 1
+    )
+
+    bars = cache.read("AAPL", "1Day", "iex", start, end)
+    assert bars.column("t").tolist() == [
+        "2023-01-01T05:00:00Z",
+        "2023-01-02T05:00:00Z",
+        "2023-01-03T05:00:00Z",
+        "2023-01-04T05:00:00Z",
+    ]
+    # The re-fetched bar replaces the cached one
+    assert bars.column("c").tolist() == [1.0, 1.0, 2.0, 2.0]
+    assert cache.read("AAPL", "1Day", "iex", to_ns("2023-01-03"), end).column(
+        "c"
+    ).tolist() == [2.0, 2.0]
+
+
+def test_write_only_touches_overlapping_chunks(cache, tmp_path):
+    directory = tmp_path / "cache" / "iex" / "1Day" / "AAPL"
+    cache.write(
+        "AAPL", "1Day", "iex", BarBuffer.from_bars(make_bars(range(1, 11))), 0, 1
+    )
+    (history,) = directory.glob("*.npz")
+    cache.write("AAPL", "1Day", "iex", BarBuffer.from_bars(make_bars([20, 21])), 0, 1)
+    cache.write(
+        "AAPL", "1Day", "iex", BarBuffer.from_bars(make_bars([21, 22], 2.0)), 0, 1
+    )
+
+    # The older chunk is left alone; the overlapping one was merged
+    chunks = sorted(p.name for p in directory.glob("*.npz"))
+    assert len(chunks) == 2 and history.name in chunks
+    bars = cache.read("AAPL", "1Day", "iex", to_ns("2023-01-10"), to_ns("2023-01-31"))
+    assert bars.column("c").tolist() == [1.0, 1.0, 2.0, 2.0]
+
+
+def test_concurrent_writers_keep_every_bar(cache):
+    def write(day):
+        bars = BarBuffer.from_bars(make_bars([day]))
+        cache.write("AAPL", "1Day", "iex", bars, to_ns(f"2023-01-{day:02d}"), 0)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(write, range(1, 29)))
+
+    bars = cache.read("AAPL", "1Day", "iex", to_ns("2023-01-01"), to_ns("2023-01-31"))
+    assert len(bars) == 28
+
+
+def test_client_fetches_only_gaps(cache):
+    os.environ["APCA_API_KEY_ID"] = "TEST_KEY"
+    os.environ["APCA_API_SECRET_KEY"] = "TEST_SECRET"
+    client = AlpacaClient(cache=cache)
+
+    with requests_mock.Mocker() as m:
+        m.get(client.BASE_URL, json={"bars": {"AAPL": make_bars(range(1, 11))}})
+        client.get_stock_bars_columnar(
+            ["AAPL"], "1Day", start="2023-01-01", end="2023-01-10"
+        )
+
+        m.get(client.BASE_URL, json={"bars": {"AAPL": make_bars(range(10, 21))}})
+        buffers = client.get_stock_bars_columnar(
+            ["AAPL"], "1Day", start="2023-01-01", end="2023-01-20"
+        )
+
+        assert m.call_count == 2
+        assert m.request_history[1].qs["start"] == ["2023-01-10t00:00:00z"]
+        assert len(buffers["AAPL"]) == 19
+
+        # Fully cached range: no request at all
+        client.get_stock_bars_columnar(
+            ["AAPL"], "1Day", start="2023-01-05", end="2023-01-15"
+        )
+        assert m.call_count == 2
@@ -66,3 +66,83 @@ def test_error_handling(client):
             client.get_stock_bars(["AAPL"], "1Day")
 
         assert excinfo.value.response.status_code == 403
+
+
+def test_get_stock_bars_columnar(client):
+    """
+    Test 4: A multi-symbol request chain is demultiplexed per symbol, with
+    each page appended straight into per-symbol column buffers.
+    """
+    page1 = {
+        "bars": {"AAPL": [{"t": "2023-01-01", "o": 1, "h": 2, "l": 0, "c": 150}]},
+        "next_page_token": "token123",
+    }
+    page2 = {
+        "bars": {
+            "AAPL": [{"t": "2023-01-02", "o": 1, "h": 2, "l": 0, "c": 155}],
+            "MSFT": [{"t": "2023-01-02", "o": 1, "h": 2, "l": 0, "c": 255}],
+        },
+        "next_page_token": None,
+    }
+
+    with requests_mock.Mocker() as m:
+        m.get(
+            client.BASE_URL,
+            [{"json": page1, "status_code": 200}, {"json": page2, "status_code": 200}],
+        )
+
+        buffers = client.get_stock_bars_columnar(["AAPL", "MSFT", "QQQ"], "1Day")
+
+        assert m.call_count == 2
+        assert m.request_history[0].qs["symbols"] == ["aapl,msft,qqq"]
+        assert set(buffers) == {"AAPL", "MSFT"}
+        assert buffers["AAPL"].column("c").tolist() == [150.0, 155.0]
+        assert buffers["MSFT"].column("t").tolist() == ["2023-01-02"]
+
+
+def test_pooled_session(client):
+    """
+    Test 5: All pages go through the client's single keep-alive session, which
+    negotiates compression and carries the auth headers.
+    """
+    session = client.session
+    assert session.headers["APCA-API-KEY-ID"] == "TEST_KEY"
+    assert session.headers["Accept-Encoding"] == "gzip, deflate"
+    assert session.headers["Connection"] == "keep-alive"
+
+    adapter = session.get_adapter(client.BASE_URL)
+    assert adapter._pool_maxsize == 10
+    assert adapter.max_retries.status == 0
+
+    page = {"bars": {"AAPL": [{"t": "2023-01-01", "c": 150}]}}
+    with requests_mock.Mocker(session=session) as m:
+        m.get(client.BASE_URL, json=page)
+        client.get_stock_bars(["AAPL"], "1Day")
+        client.get_stock_bars(["MSFT"], "1Day")
+        assert m.call_count == 2
+        assert m.request_history[0].headers["APCA-API-SECRET-KEY"] == "TEST_SECRET"
+
+
+def test_rate_limited_retry(client):
+    """
+    Test 6: A 429 is waited out via Retry-After instead of aborting the job.
+    """
+    waits = []
+    client.rate_limiter.pause_for = waits.append
+
+    page = {"bars": {"AAPL": [{"t": "2023-01-01", "c": 150}]}}
+    with requests_mock.Mocker() as m:
+        m.get(
+            client.BASE_URL,
+            [
+                {"status_code": 429, "headers": {"Retry-After": "0"}},
+                {"status_code": 429, "headers": {"Retry-After": "0"}},
+                {"json": page, "status_code": 200},
+            ],
+        )
+
+        bars = client.get_stock_bars(["AAPL"], "1Day")
+
+        assert len(bars) == 1
+        assert m.call_count == 3
+        assert waits == [0.0, 0.0]
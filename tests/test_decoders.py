@@ -0,0 +1,65 @@
+import json
+import os
+
+import pytest
+import requests_mock
+
+from market_data import decoders
+from market_data.buffers import BarBuffer
+from market_data.client import AlpacaClient
+
+os.environ["APCA_API_KEY_ID"] = "TEST_KEY"
+os.environ["APCA_API_SECRET_KEY"] = "TEST_SECRET"
+
+PAGE = {
+    "bars": {
+        "AAPL": [
+            {"t": "2024-01-02T14:30:00Z", "o": 1.5, "h": 2, "l": 1, "c": 1.75},
+            {"t": "2024-01-02T14:31:00Z", "o": 1.75, "h": 2, "l": 1, "c": 1.5},
+        ],
+        "MSFT": [{"t": "2024-01-02T14:30:00Z", "o": 3, "h": 3, "l": 3, "c": 3}],
+    },
+    "next_page_token": "token123",
+}
+
+
+def test_auto_prefers_orjson_and_falls_back(monkeypatch):
+    pytest.importorskip("orjson")
+    assert decoders.get_decoder().name == "orjson"
+
+    def missing():
+        raise ImportError("no orjson")
+
+    monkeypatch.setattr(decoders, "_import_orjson", missing)
+    assert decoders.get_decoder("auto").name == "json"
+    with pytest.raises(ImportError):
+        decoders.get_decoder("orjson")
+    with pytest.raises(ValueError):
+        decoders.get_decoder("simdjson")
+
+
+@pytest.mark.parametrize("name", ["json", "orjson"])
+def test_decode_bars_into_buffers(name):
+    if name == "orjson":
+        pytest.importorskip("orjson")
+    decoder = decoders.get_decoder(name)
+
+    buffers, next_page_token = decoder.decode_bars(json.dumps(PAGE).encode())
+
+    assert next_page_token == "token123"
+    for symbol, bars in PAGE["bars"].items():
+        expected = BarBuffer.from_bars(bars).to_frame()
+        assert buffers[symbol].to_frame().equals(expected)
+
+
+def test_client_decodes_columnar_pages_with_its_decoder():
+    client = AlpacaClient(decoder=decoders.JsonDecoder())
+    last = dict(PAGE, next_page_token=None)
+
+    with requests_mock.Mocker() as m:
+        m.get(client.BASE_URL, [{"json": PAGE}, {"json": last}])
+        buffers = client.get_stock_bars_columnar(["AAPL", "MSFT"], "1Min")
+
+    assert client.decoder.name == "json"
+    assert {symbol: len(b) for symbol, b in buffers.items()} == {"AAPL": 4, "MSFT": 2}
+    assert buffers["AAPL"].column("c").tolist() == [1.75, 1.5, 1.75, 1.5]
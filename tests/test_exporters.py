@@ -0,0 +1,143 @@
+import pandas as pd
+import pytest
+
+from market_data.exporters import CsvExporter, get_exporter
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame(
+        {
+            "date": ["2023-01-03T05:00:00Z", "2023-01-04T05:00:00Z"],
+            "open": [1.0, 2.0],
+            "volume": [100, 200],
+            "SMA_2": [float("nan"), 1.5],
+        }
+    )
+
+
+def test_csv_export(frame, tmp_path):
+    path = tmp_path / "out.csv"
+    CsvExporter().write(frame, path)
+    assert pd.read_csv(path)["date"].tolist() == frame["date"].tolist()
+
+
+@pytest.mark.parametrize("name", ["parquet", "feather"])
+def test_columnar_export_keeps_dtypes(name, frame, tmp_path):
+    pytest.importorskip("pyarrow")
+    exporter = get_exporter(name)
+    path = tmp_path / f"out{exporter.extension}"
+    exporter.write(frame, path)
+
+    df = pd.read_parquet(path) if name == "parquet" else pd.read_feather(path)
+    assert isinstance(df.index, pd.DatetimeIndex)
+    assert str(df.index.tz) == "UTC"
+    assert df.index[0] == pd.Timestamp("2023-01-03 05:00", tz="UTC")
+    assert df["volume"].dtype == "int64"
+    assert df["SMA_2"].iloc[1] == 1.5
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        get_exporter("xlsx")
+
+
+@pytest.mark.parametrize("name", ["csv", "parquet", "feather"])
+def test_stream_writer_appends_chunks(name, frame, tmp_path):
+    if name != "csv":
+        pytest.importorskip("pyarrow")
+    exporter = get_exporter(name)
+    path = tmp_path / f"out{exporter.extension}"
+
+    writer = exporter.open_stream(path)
+    writer.write(frame.iloc[:1])
+    writer.write(frame.iloc[1:])
+    writer.close()
+
+    if name == "csv":
+        df = pd.read_csv(path)
+    elif name == "parquet":
+        df = pd.read_parquet(path)
+    else:
+        df = pd.read_feather(path)
+    assert len(df) == 2
+    assert df["volume"].tolist() == [100, 200]
+
+
+@pytest.mark.parametrize("name", ["csv", "parquet", "feather"])
+def test_stream_writer_in_append_mode_keeps_existing_rows(name, frame, tmp_path):
+    if name != "csv":
+        pytest.importorskip("pyarrow")
+    exporter = get_exporter(name)
+    path = tmp_path / f"out{exporter.extension}"
+    exporter.write(frame.iloc[:1], path)
+
+    writer = exporter.open_stream(path, append=True)
+    writer.write(frame.iloc[1:])
+    writer.close()
+
+    df = exporter.read_tail(path, 10)
+    assert df["volume"].tolist() == [100, 200]
+
+
+@pytest.mark.parametrize("name", ["csv", "parquet", "feather"])
+def test_read_tail_and_append(name, frame, tmp_path):
+    if name != "csv":
+        pytest.importorskip("pyarrow")
+    exporter = get_exporter(name)
+    path = tmp_path / f"out{exporter.extension}"
+    exporter.write(frame, path)
+
+    tail = exporter.read_tail(path, 1)
+    assert tail["date"].tolist() == [pd.Timestamp("2023-01-04 05:00", tz="UTC")]
+    assert list(tail.columns) == list(frame.columns)
+
+    new_rows = pd.DataFrame(
+        {
+            "date": ["2023-01-05T05:00:00Z"],
+            "open": [3.0],
+            "volume": [300],
+            "SMA_2": [2.5],
+        }
+    )
+    exporter.append(new_rows, path)
+
+    result = exporter.read_tail(path, 10)
+    expected = pd.concat([frame, new_rows], ignore_index=True)
+    expected["date"] = pd.to_datetime(expected["date"], utc=True)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_csv_writes_fixed_format_dates(tmp_path):
+    # Parsed dates are written back in Alpaca's RFC 3339 form
+    frame = pd.DataFrame(
+        {
+            "date": pd.DatetimeIndex(["2023-01-03 05:00", "2023-01-04"], tz="UTC"),
+            "open": [1.0, 2.0],
+        }
+    )
+    path = tmp_path / "out.csv"
+    CsvExporter().write(frame, path)
+
+    assert pd.read_csv(path)["date"].tolist() == [
+        "2023-01-03T05:00:00Z",
+        "2023-01-04T00:00:00Z",
+    ]
+    assert frame["date"].dtype.kind == "M"
+
+
+def test_csv_append_drops_a_torn_last_row(frame, tmp_path):
+    exporter = CsvExporter()
+    path = tmp_path / "out.csv"
+    exporter.write(frame, path)
+    # An append that crashed halfway through its row
+    with open(path, "ab") as f:
+        f.write(b"2023-01-05T05:0")
+
+    tail = exporter.read_tail(path, 1)
+    assert tail["date"].tolist() == [pd.Timestamp("2023-01-04 05:00", tz="UTC")]
+
+    new_rows = frame.iloc[1:].assign(date="2023-01-05T05:00:00Z", volume=300)
+    exporter.append(new_rows, path)
+
+    assert pd.read_csv(path)["volume"].tolist() == [100, 200, 300]
@@ -1,8 +1,13 @@
 import numpy as np
 import pandas as pd
 import pytest
+import talib
 
-from market_data.indicators import IndicatorCalculator
+from market_data.indicators import (
+    AllocationReport,
+    IndicatorCalculator,
+    split_indicators,
+)
 
 
 @pytest.fixture
@@ -81,3 +86,95 @@ def test_alignment(calculator):
 
     # Index 3: (2+3+4)/3 = 3.0
     assert result["SMA_3"].iloc[3] == 3.0
+
+
+def test_compile_plan(calculator):
+    plan = calculator.compile(["SMA_10", "MACD", "HT_DCPERIOD", "FOO_3", "MAVP"])
+
+    # Compiled once, then served from the cache
+    assert (
+        calculator.compile(["SMA_10", "MACD", "HT_DCPERIOD", "FOO_3", "MAVP"]) is plan
+    )
+
+    assert [s.name for s in plan.specs] == ["SMA", "MACD", "HT_DCPERIOD"]
+    assert plan.specs[0].params == {"timeperiod": 10}
+    assert plan.columns == ["SMA_10", "MACD_0", "MACD_1", "MACD_2", "HT_DCPERIOD"]
+    # Unknown names and functions needing non-OHLCV inputs are rejected up front
+    assert plan.invalid == ["FOO_3", "MAVP"]
+    assert plan.inputs == ("close",)
+
+
+def test_convergence(calculator):
+    sma, ema, obv = calculator.compile(["SMA_20", "EMA_20", "OBV"]).specs
+
+    # Windows depend on their lookback only; recursive state decays slowly
+    assert sma.convergence == (sma.lookback, False)
+    bars, offset = ema.convergence
+    assert bars > 10 * ema.lookback and not offset
+    # Running totals are reproduced up to a constant
+    assert obv.convergence == (0, True)
+
+    plan = calculator.compile(["SMA_20", "EMA_20", "OBV"])
+    assert plan.convergence_bars == bars
+    assert plan.offset_columns == ["OBV"]
+
+
+def test_plan_apply(calculator, sample_data):
+    plan = calculator.compile(["ATR_5", "STOCH"])
+    result = plan.apply(sample_data)
+    assert list(result.columns[-3:]) == ["ATR_5", "STOCH_0", "STOCH_1"]
+    assert pd.notna(result["ATR_5"].iloc[-1])
+
+
+def test_apply_reports_allocations_without_touching_input(calculator):
+    size = 1000
+    df = pd.DataFrame(
+        {
+            "Open": np.linspace(1, 2, size),
+            "High": np.linspace(2, 3, size),
+            "Low": np.linspace(0, 1, size),
+            "Close": np.linspace(1, 2, size),
+            "Volume": np.arange(size, dtype=np.int64),
+        }
+    )
+    report = AllocationReport()
+
+    result = calculator.add_indicators(df, ["SMA_10", "RSI_14"], report)
+
+    # float64 inputs are passed to TA-Lib as views: nothing copied
+    assert report.input_bytes == 0
+    assert report.output_bytes == 2 * size * 8
+    assert list(df.columns) == ["Open", "High", "Low", "Close", "Volume"]
+    assert list(result.columns[-2:]) == ["SMA_10", "RSI_14"]
+
+    # Integer volume has to be converted once
+    calculator.add_indicators(df, ["OBV"], report)
+    assert report.input_bytes == size * 8
+
+
+def test_parameter_grammar(calculator, sample_data):
+    plan = calculator.compile(
+        ["MACD(fast=5,slow=10,signal=3)", "BBANDS(20, nbdevup=2.5)", "SMA(x)"]
+    )
+    macd, bbands = plan.specs
+
+    assert macd.params == {"fastperiod": 5, "slowperiod": 10, "signalperiod": 3}
+    assert bbands.params == {"timeperiod": 20, "nbdevup": 2.5}
+    assert plan.invalid == ["SMA(x)"]
+    assert plan.lookback == 19
+
+    result = plan.apply(sample_data)
+    expected = talib.MACD(
+        sample_data["close"].values, fastperiod=5, slowperiod=10, signalperiod=3
+    )
+    np.testing.assert_array_equal(
+        result["MACD(fast=5,slow=10,signal=3)_0"].values, expected[0]
+    )
+
+
+def test_split_indicators():
+    assert split_indicators("SMA_50, MACD(12,26,9),RSI") == [
+        "SMA_50",
+        "MACD(12,26,9)",
+        "RSI",
+    ]
@@ -0,0 +1,123 @@
+import os
+
+import pytest
+import requests_mock
+
+from market_data.buffers import BarBuffer
+from market_data.client import AlpacaClient
+from market_data.jobs import FAILED, JobManifest, JobRunner, PageCheckpoint
+from market_data.pipeline import StockDataPipeline
+
+os.environ["APCA_API_KEY_ID"] = "TEST_KEY"
+os.environ["APCA_API_SECRET_KEY"] = "TEST_SECRET"
+
+PARAMS = {"timeframe": "1Day", "start": "2024-01-01"}
+
+
+def page(symbol, day, token):
+    bar = {"t": f"2024-01-{day:02d}T05:00:00Z", "o": 1, "h": 1, "l": 1, "c": day}
+    return {"json": {"bars": {symbol: [bar]}, "next_page_token": token}}
+
+
+def test_resumes_failed_ticker_from_its_page_token(tmp_path):
+    client = AlpacaClient()
+    pipeline = StockDataPipeline(output_dir=str(tmp_path / "out"), client=client)
+    manifest_path = tmp_path / "job.json"
+
+    with requests_mock.Mocker() as m:
+        m.get(
+            client.BASE_URL,
+            [
+                page("AAPL", 2, "p2"),
+                page("AAPL", 3, "p3"),
+                {"status_code": 403},
+                page("AAPL", 4, None),
+            ],
+        )
+        runner = JobRunner(pipeline, JobManifest(manifest_path, PARAMS))
+        results = list(runner.run(["AAPL"], "1Day", "2024-01-01"))
+        assert results[0][2] is not None
+        assert runner.manifest.failed()["AAPL"].startswith("HTTPError: 403")
+        assert runner.manifest.tickers["AAPL"]["page_token"] == "p3"
+
+        # A new run picks up the manifest and continues from the failed page
+        resumed = JobRunner(pipeline, JobManifest(manifest_path, PARAMS))
+        ((_, path, error),) = resumed.run(
+            ["AAPL"], "1Day", "2024-01-01", only_failed=True
+        )
+
+    assert error is None
+    assert m.request_history[3].qs["page_token"] == ["p3"]
+    assert pipeline.exporter.read_tail(path, 10)["close"].tolist() == [2, 3, 4]
+    assert resumed.manifest.outputs() == {"AAPL": str(path)}
+    # Spooled pages and temporary files are gone
+    assert not (tmp_path / "job.json.pages" / "AAPL").exists()
+    assert [p.name for p in path.parent.iterdir()] == [path.name]
+
+
+def test_batched_run_records_each_ticker(tmp_path):
+    client = AlpacaClient()
+    pipeline = StockDataPipeline(output_dir=str(tmp_path / "out"), client=client)
+    manifest = JobManifest(tmp_path / "job.json", PARAMS)
+    manifest.add(["AAPL"])
+    manifest.start("AAPL")
+    manifest.finish("AAPL", tmp_path / "AAPL.csv")
+
+    bars = {
+        symbol: [{"t": "2024-01-02T05:00:00Z", "o": 1, "h": 1, "l": 1, "c": 1}]
+        for symbol in ["MSFT", "QQQ"]
+    }
+    with requests_mock.Mocker() as m:
+        m.get(client.BASE_URL, json={"bars": bars, "next_page_token": None})
+        runner = JobRunner(pipeline, manifest)
+        results = list(
+            runner.run(
+                ["AAPL", "MSFT", "QQQ", "SPY"], "1Day", "2024-01-01", batch_size=3
+            )
+        )
+
+    # The finished ticker is skipped and the rest share one request chain
+    assert m.call_count == 1
+    assert m.request_history[0].qs["symbols"] == ["msft,qqq,spy"]
+    assert [ticker for ticker, _, _ in results] == ["MSFT", "QQQ", "SPY"]
+    assert set(manifest.outputs()) == {"AAPL", "MSFT", "QQQ"}
+    assert manifest.todo(["AAPL", "MSFT", "QQQ", "SPY"]) == []
+
+
+def test_manifest_skips_done_tickers_and_checks_params(tmp_path):
+    manifest = JobManifest(tmp_path / "job.json", PARAMS)
+    manifest.add(["AAPL", "MSFT", "QQQ"])
+    manifest.start("AAPL")
+    manifest.finish("AAPL", tmp_path / "AAPL.csv")
+    manifest.start("MSFT")
+    manifest.fail("MSFT", ValueError("boom"))
+    manifest.start("QQQ")  # interrupted while running
+
+    reloaded = JobManifest(tmp_path / "job.json", PARAMS)
+    assert reloaded.status("MSFT") == FAILED
+    assert reloaded.todo(["AAPL", "MSFT", "QQQ"]) == ["MSFT", "QQQ"]
+    assert reloaded.todo(["AAPL", "MSFT", "QQQ"], only_failed=True) == ["MSFT"]
+    with pytest.raises(ValueError):
+        JobManifest(tmp_path / "job.json", dict(PARAMS, timeframe="1Hour"))
+
+
+def test_page_checkpoint_spools_pages_without_rewriting_the_manifest(
+    tmp_path, monkeypatch
+):
+    manifest = JobManifest(tmp_path / "job.json", PARAMS)
+    manifest.add(["AAPL"])
+    saves = []
+    monkeypatch.setattr(manifest, "save", lambda: saves.append(1))
+    checkpoint = PageCheckpoint(manifest, "AAPL", tmp_path / "pages")
+    for day in range(2, 6):
+        bars = page("AAPL", day, None)["json"]["bars"]["AAPL"]
+        token = f"p{day + 1}" if day < 5 else None
+        checkpoint.save_page({"AAPL": BarBuffer.from_bars(bars)}, token)
+        assert checkpoint.token == token
+
+    assert saves == []
+    assert checkpoint.complete
+    # A new checkpoint (e.g. after a restart) reads the state from the spool
+    resumed = PageCheckpoint(manifest, "AAPL", tmp_path / "pages")
+    assert resumed.complete
+    assert resumed.load()["AAPL"].column("c").tolist() == [2, 3, 4, 5]
@@ -0,0 +1,181 @@
+import asyncio
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from market_data.buffers import BAR_FIELDS
+from market_data.live import LiveIngestor, RingBuffer, StreamAuthError
+from market_data.mock_stream import MockAlpacaStream, synthetic_bars
+
+# --live needs the optional websockets package (`--extras live`)
+serve = pytest.importorskip("websockets.asyncio.server").serve
+
+
+@pytest.fixture(autouse=True)
+def credentials():
+    os.environ["APCA_API_KEY_ID"] = "TEST_KEY"
+    os.environ["APCA_API_SECRET_KEY"] = "TEST_SECRET"
+
+
+def test_ring_buffer_drops_oldest():
+    ring = RingBuffer(BAR_FIELDS, capacity=3)
+    for i in range(5):
+        ring.append({"t": f"bar{i}", "c": float(i)})
+
+    assert ring.full()
+    assert ring.dropped == 2
+    rows = ring.drain()
+    assert rows["t"].tolist() == ["bar2", "bar3", "bar4"]
+    np.testing.assert_array_equal(rows["c"], [2.0, 3.0, 4.0])
+    assert len(ring) == 0
+
+
+def test_ring_buffer_rejects_bad_fields_without_writing():
+    ring = RingBuffer(BAR_FIELDS, capacity=1)
+    ring.append({"t": "bar0", "c": 1.0})
+    with pytest.raises(ValueError):
+        ring.append({"t": "bar1", "c": "n/a"})
+
+    assert ring.drain()["t"].tolist() == ["bar0"]
+
+
+def test_malformed_messages_are_skipped(tmp_path):
+    ingestor = LiveIngestor(["AAA"], output_dir=str(tmp_path))
+    bar = {"T": "b", "S": "AAA", "t": "2024-01-02T14:30:00Z", "c": 1.0}
+
+    async def run():
+        await ingestor._handle("not json")
+        await ingestor._handle('{"T": "b"}')
+        await ingestor._handle(
+            json.dumps([{"T": "b", "t": "2024-01-02T14:30:00Z"}, "b", bar])
+        )
+        await ingestor._handle(json.dumps([dict(bar, v="many")]))
+
+    asyncio.run(run())
+
+    assert ingestor.stats["invalid"] == 5
+    assert ingestor.stats["bars"] == 1
+    assert len(ingestor._rings[("AAA", "bars")]) == 1
+
+
+def test_bad_utf8_and_json_frames_do_not_end_the_stream(tmp_path):
+    bar = {"T": "b", "S": "AAA", "t": "2024-01-02T14:30:00Z", "c": 1.0}
+
+    async def handler(ws):
+        await ws.send(b"\xff\xfe", text=True)
+        await ws.send("not json")
+        await ws.send(json.dumps([{"T": "success", "msg": "connected"}]))
+        await ws.recv()
+        await ws.send(json.dumps(["auth?", {"T": "success", "msg": "authenticated"}]))
+        await ws.recv()
+        await ws.send(b'[{"T": "b", "S": "\xff"}]', text=True)
+        await ws.send("[{")
+        await ws.send(json.dumps([bar]))
+        await ws.wait_closed()
+
+    async def run():
+        async with serve(handler, "127.0.0.1", 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            ingestor = LiveIngestor(
+                ["AAA"], output_dir=str(tmp_path), url=f"ws://127.0.0.1:{port}/"
+            )
+            task = asyncio.create_task(ingestor.run(duration=30))
+            while ingestor.stats["bars"] < 1 and not task.done():
+                await asyncio.sleep(0.01)
+            ingestor.stop()
+            return await task
+
+    stats = asyncio.run(run())
+
+    assert stats["bars"] == 1
+    assert stats["invalid"] == 5
+    assert stats["reconnects"] == 0
+
+
+def test_message_over_max_size_drops_the_connection(tmp_path):
+    async def run():
+        # One 50-bar frame is several KB, well over the 1000-byte limit
+        mock = MockAlpacaStream(synthetic_bars(["AAA"], 50), batch_size=50)
+        url = await mock.start()
+        ingestor = LiveIngestor(
+            ["AAA"], output_dir=str(tmp_path), url=url, max_message_size=1000
+        )
+        task = asyncio.create_task(ingestor.run(duration=30))
+        while ingestor.stats["reconnects"] < 1 and not task.done():
+            await asyncio.sleep(0.01)
+        ingestor.stop()
+        stats = await task
+        await mock.close()
+        return stats
+
+    stats = asyncio.run(run())
+
+    assert stats["reconnects"] == 1
+    assert stats["bars"] == 0
+
+
+def test_ingests_through_reconnect_with_backpressure(tmp_path):
+    count = 500
+
+    async def run():
+        mock = MockAlpacaStream(
+            synthetic_bars(["AAA", "BBB"], count),
+            key="TEST_KEY",
+            secret="TEST_SECRET",
+            batch_size=50,
+            disconnect_after=300,
+        )
+        url = await mock.start()
+        # Rings smaller than the feed force flushes from the reader
+        ingestor = LiveIngestor(
+            ["AAA", "BBB"],
+            output_dir=str(tmp_path),
+            url=url,
+            flush_interval=10.0,
+            capacity=64,
+        )
+        task = asyncio.create_task(ingestor.run(duration=30))
+        while ingestor.stats["bars"] < 2 * count and not task.done():
+            await asyncio.sleep(0.01)
+        ingestor.stop()
+        stats = await task
+        await mock.close()
+        return stats, mock
+
+    stats, mock = asyncio.run(run())
+
+    assert stats["bars"] == 2 * count
+    assert stats["dropped"] == 0
+    assert stats["reconnects"] == 1
+    assert mock.connections == 2
+
+    for symbol in ("AAA", "BBB"):
+        df = pd.read_csv(tmp_path / f"{symbol}_bars_live.csv")
+        assert len(df) == count
+        assert df["date"].is_monotonic_increasing
+        assert df["date"].is_unique
+        assert list(df.columns[:6]) == [
+            "date",
+            "open",
+            "high",
+            "low",
+            "close",
+            "volume",
+        ]
+
+
+def test_rejected_credentials_are_not_retried(tmp_path):
+    async def run():
+        mock = MockAlpacaStream([], key="OTHER", secret="OTHER")
+        url = await mock.start()
+        ingestor = LiveIngestor(["AAA"], output_dir=str(tmp_path), url=url)
+        try:
+            await ingestor.run(duration=10)
+        finally:
+            await mock.close()
+
+    with pytest.raises(StreamAuthError):
+        asyncio.run(run())
@@ -0,0 +1,79 @@
+from datetime import date
+
+import pandas as pd
+
+from market_data.market_calendar import (
+    TradingCalendar,
+    nyse_early_closes,
+    nyse_holidays,
+)
+
+
+def test_holidays_2024():
+    assert sorted(nyse_holidays(2024)) == [
+        date(2024, 1, 1),
+        date(2024, 1, 15),
+        date(2024, 2, 19),
+        date(2024, 3, 29),
+        date(2024, 5, 27),
+        date(2024, 6, 19),
+        date(2024, 7, 4),
+        date(2024, 9, 2),
+        date(2024, 11, 28),
+        date(2024, 12, 25),
+    ]
+    assert nyse_early_closes(2024) == {
+        date(2024, 7, 3),
+        date(2024, 11, 29),
+        date(2024, 12, 24),
+    }
+
+
+def test_observed_dates():
+    # Saturday New Year's Day is not moved to the previous Friday
+    assert date(2021, 12, 31) not in nyse_holidays(2021)
+    assert date(2022, 1, 1) not in nyse_holidays(2022)
+    # Saturday Christmas moves to Friday, Sunday Juneteenth to Monday
+    assert date(2021, 12, 24) in nyse_holidays(2021)
+    assert date(2022, 6, 20) in nyse_holidays(2022)
+    # No Christmas Eve early close when it is the observed holiday
+    assert date(2021, 12, 24) not in nyse_early_closes(2021)
+
+
+def test_special_closures():
+    calendar = TradingCalendar()
+    assert not calendar.is_session(date(2025, 1, 9))
+    assert calendar.previous_session(date(2012, 10, 31)) == date(2012, 10, 26)
+
+
+def test_intraday_warmup_skips_holiday_and_early_close():
+    calendar = TradingCalendar()
+    open_after_holiday = pd.Timestamp("2024-07-05T13:30:00Z")
+
+    # July 4th is closed and July 3rd closes at 13:00 ET (17:00Z)
+    start = calendar.warmup_start(open_after_holiday, 10, "1Min")
+    assert start == pd.Timestamp("2024-07-03T16:50:00Z")
+
+    # The early session has 210 minutes; one more reaches the 2nd's close
+    start = calendar.warmup_start(open_after_holiday, 211, "1Min")
+    assert start == pd.Timestamp("2024-07-02T19:59:00Z")
+
+    # Hourly slots overlapping 9:30-13:00 ET: 9:00, 10:00, 11:00 and 12:00
+    start = calendar.warmup_start(open_after_holiday, 4, "1Hour")
+    assert start == pd.Timestamp("2024-07-03T13:00:00Z")
+    start = calendar.warmup_start(open_after_holiday, 5, "1Hour")
+    assert start == pd.Timestamp("2024-07-02T19:00:00Z")
+
+
+def test_extended_hours_sessions():
+    calendar = TradingCalendar(extended_hours=True)
+    start = calendar.warmup_start(pd.Timestamp("2024-07-05T08:00:00Z"), 2, "1Hour")
+    # Pre-market opens 4:00 ET (08:00Z); the 3rd's post-market ends 17:00 ET
+    assert start == pd.Timestamp("2024-07-03T19:00:00Z")
+
+
+def test_daily_warmup_counts_sessions():
+    calendar = TradingCalendar()
+    start = calendar.warmup_start(pd.Timestamp("2024-07-08"), 3, "1Day")
+    # Sessions before the 8th: 5th, 3rd, 2nd (4th is a holiday)
+    assert start == pd.Timestamp("2024-07-02", tz="UTC")
@@ -0,0 +1,97 @@
+import json
+import os
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import requests_mock
+
+from market_data import metrics
+from market_data.client import AlpacaClient
+from market_data.indicators import IndicatorCalculator
+
+
+def test_counters_and_timings():
+    recorder = metrics.Metrics()
+    recorder.increment("pages_total")
+    recorder.increment("pages_total", 2)
+    recorder.increment("http_requests_total", status=200)
+    recorder.observe("stage_seconds", 0.5, stage="fetch")
+    recorder.observe("stage_seconds", 1.5, stage="fetch")
+
+    counters = recorder.counters()
+    assert counters[("pages_total", ())] == 3
+    assert counters[("http_requests_total", (("status", "200"),))] == 1
+    assert recorder.timings()[("stage_seconds", (("stage", "fetch"),))] == (
+        2,
+        2.0,
+        1.5,
+    )
+
+
+def test_null_metrics_record_nothing():
+    with metrics.NULL_METRICS.timer("stage_seconds", stage="fetch"):
+        metrics.NULL_METRICS.increment("pages_total")
+
+    assert metrics.NULL_METRICS.counters() == {}
+    assert metrics.NULL_METRICS.timings() == {}
+
+
+def test_sinks(tmp_path):
+    jsonl, prom = tmp_path / "metrics.jsonl", tmp_path / "metrics.prom"
+    recorder = metrics.Metrics(
+        [metrics.JsonLinesSink(jsonl), metrics.PrometheusTextSink(prom)]
+    )
+    recorder.increment("rows_exported_total", 10)
+    recorder.observe("stage_seconds", 0.25, stage="export")
+    recorder.flush()
+
+    records = [json.loads(line) for line in jsonl.read_text().splitlines()]
+    assert [(r["name"], r["type"]) for r in records] == [
+        ("rows_exported_total", "counter"),
+        ("stage_seconds", "timer"),
+    ]
+    assert records[1]["labels"] == {"stage": "export"}
+    assert records[1]["sum"] == 0.25
+
+    text = prom.read_text()
+    assert "# TYPE market_data_rows_exported_total counter" in text
+    assert "market_data_rows_exported_total 10" in text
+    assert 'market_data_stage_seconds_count{stage="export"} 1' in text
+    assert 'market_data_stage_seconds_sum{stage="export"} 0.25' in text
+
+
+def test_client_records_requests():
+    os.environ["APCA_API_KEY_ID"] = "TEST_KEY"
+    os.environ["APCA_API_SECRET_KEY"] = "TEST_SECRET"
+    recorder = metrics.Metrics()
+    client = AlpacaClient(metrics=recorder)
+
+    page = {"bars": {"AAPL": [{"t": "2023-01-02", "c": 155}]}, "next_page_token": None}
+    with requests_mock.Mocker() as m, patch("time.sleep"):
+        m.get(
+            client.BASE_URL,
+            [{"status_code": 500}, {"json": page, "status_code": 200}],
+        )
+        client.get_stock_bars(["AAPL"], "1Day")
+
+    counters = recorder.counters()
+    assert counters[("http_requests_total", (("status", "500"),))] == 1
+    assert counters[("http_requests_total", (("status", "200"),))] == 1
+    assert counters[("http_retries_total", (("reason", "server_error"),))] == 1
+    assert counters[("pages_total", ())] == 1
+    assert counters[("bars_received_total", ())] == 1
+    assert counters[("http_bytes_received_total", ())] > 0
+    assert recorder.timings()[("json_decode_seconds", ())][0] == 1
+
+
+def test_per_indicator_timings():
+    recorder = metrics.Metrics()
+    close = np.linspace(1.0, 2.0, 50)
+    data = pd.DataFrame({"open": close, "high": close, "low": close, "close": close})
+
+    IndicatorCalculator(metrics=recorder).add_indicators(data, ["SMA_5", "RSI_14"])
+
+    timings = recorder.timings()
+    assert timings[("indicator_seconds", (("indicator", "SMA"),))][0] == 1
+    assert timings[("indicator_seconds", (("indicator", "RSI"),))][0] == 1
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from market_data.indicators import IndicatorCalculator
+from market_data.online import OnlineIndicatorBook, OnlineIndicatorEngine
+
+INDICATORS = [
+    "SMA_20",
+    "EMA_10",
+    "RSI_14",
+    "MACD(fast=5,slow=10,signal=3)",
+    "BBANDS(20, 2.5, 1.5)",
+    "ATR_14",
+    "MAX_5",
+    "MIN_7",
+    "OBV",
+]
+
+
+@pytest.fixture
+def bars():
+    rng = np.random.default_rng(1)
+    size = 300
+    close = 100 + np.cumsum(rng.normal(size=size))
+    # A flat stretch exercises zero gains/losses and zero variance
+    close[100:110] = close[99]
+    return pd.DataFrame(
+        {
+            "date": pd.date_range("2024-01-01", periods=size, freq="min"),
+            "open": close + rng.normal(size=size) * 0.1,
+            "high": close + 1 + rng.random(size),
+            "low": close - 1 - rng.random(size),
+            "close": close,
+            "volume": rng.integers(100, 1000, size),
+        }
+    )
+
+
+def test_matches_talib_batch(bars):
+    batch = IndicatorCalculator().add_indicators(bars, INDICATORS)
+    engine = OnlineIndicatorEngine(INDICATORS)
+
+    online = pd.DataFrame([dict(engine.update(bar)) for bar in bars.to_dict("records")])
+
+    for column in engine.columns:
+        np.testing.assert_allclose(
+            online[column].values,
+            batch[column].values,
+            rtol=1e-9,
+            equal_nan=True,
+            err_msg=column,
+        )
+
+
+def test_seed_then_update(bars):
+    batch = IndicatorCalculator().add_indicators(bars, INDICATORS)
+    book = OnlineIndicatorBook(INDICATORS)
+    book.seed("TEST", bars.iloc[:-1])
+
+    # Alpaca style keys are accepted too
+    last = bars.iloc[-1]
+    values = book.update(
+        "TEST",
+        {
+            "o": last["open"],
+            "h": last["high"],
+            "l": last["low"],
+            "c": last["close"],
+            "v": last["volume"],
+        },
+    )
+
+    for column in book.engine("TEST").columns:
+        assert values[column] == pytest.approx(batch[column].iloc[-1], rel=1e-9)
+
+
+def test_unsupported_indicators_are_reported():
+    engine = OnlineIndicatorEngine(["SMA_5", "CDLDOJI", "BBANDS(matype=1)", "NOPE"])
+    assert engine.columns == ["SMA_5"]
+    assert sorted(engine.unsupported) == ["BBANDS(matype=1)", "CDLDOJI", "NOPE"]
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from market_data.indicators import IndicatorCalculator
+from market_data.panel import Panel, compute_panel
+
+
+@pytest.fixture
+def calculator():
+    return IndicatorCalculator()
+
+
+def _ohlcv(symbols, rows, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100.0 + np.cumsum(rng.normal(0.0, 1.0, (symbols, rows)), axis=1)
+    return {
+        "open": close + rng.normal(0.0, 0.2, close.shape),
+        "high": close + rng.uniform(0.0, 1.0, close.shape),
+        "low": close - rng.uniform(0.0, 1.0, close.shape),
+        "close": close,
+        "volume": rng.integers(100, 1000, close.shape).astype(np.float64),
+    }
+
+
+# Kernels on every row length, and TA-Lib once per row
+@pytest.mark.parametrize("kernel_max_bars", [10**6, 0])
+def test_compute_panel_matches_talib_per_symbol(calculator, kernel_max_bars):
+    inputs = _ohlcv(6, 200)
+    # A symbol listed later (and its low one bar later still), one with no
+    # bars at all, and halted ones: a missing bar, and a missing low
+    for column in ["open", "high", "close"]:
+        inputs[column][1, :40] = np.nan
+    inputs["low"][1, :41] = np.nan
+    for values in inputs.values():
+        values[2] = np.nan
+        values[3, 100] = np.nan
+    inputs["low"][4, 150] = np.nan
+
+    plan = calculator.compile(
+        [
+            "SMA_20",
+            "EMA_10",
+            "RSI_14",
+            "ATR_14",
+            "BBANDS(20,2,1.5)",
+            "BBANDS(10,2,2,1)",
+            "MAX_7",
+            "MIN_30",
+            "MACD(12,26,9)",
+            "OBV",
+        ]
+    )
+    results = compute_panel(plan, inputs, kernel_max_bars=kernel_max_bars)
+
+    assert list(results) == plan.columns
+    for row in range(6):
+        expected = plan.compute({c: v[row] for c, v in inputs.items()})
+        for column, values in expected.items():
+            np.testing.assert_allclose(
+                results[column][row], values, rtol=1e-9, atol=1e-9, err_msg=column
+            )
+
+
+def test_panel_from_frames_matches_per_frame(calculator):
+    dates = pd.date_range("2024-01-01", periods=60, freq="D", tz="UTC")
+    inputs = _ohlcv(3, 60)
+    frames = {
+        symbol: pd.DataFrame(
+            {"date": dates, **{c: v[row] for c, v in inputs.items()}}
+        ).iloc[start:]
+        for row, (symbol, start) in enumerate([("AAA", 0), ("BBB", 10), ("CCC", 0)])
+    }
+
+    panel = Panel.from_frames(frames).add_indicators(
+        ["SMA_5", "RSI_14"], calculator=calculator
+    )
+
+    assert panel.shape == (3, 60)
+    assert np.isnan(panel["close"][1, :10]).all()
+    for symbol, frame in frames.items():
+        expected = calculator.add_indicators(frame, ["SMA_5", "RSI_14"])
+        actual = panel.frame(symbol).iloc[len(dates) - len(frame) :]
+        pd.testing.assert_frame_equal(
+            actual.reset_index(drop=True), expected.reset_index(drop=True)
+        )
+
+
+def test_cross_sectional_features_and_snapshot():
+    dates = pd.date_range("2024-01-01", periods=2, freq="D", tz="UTC")
+    close = np.array([[1.0, 4.0], [2.0, np.nan], [3.0, 2.0], [4.0, 2.0]])
+    panel = Panel(["A", "B", "C", "D"], dates, {"close": close})
+
+    features = panel.add_cross_sectional(["close"])
+    snapshot = features.snapshot()
+
+    np.testing.assert_allclose(features["close_rank"][:, 0], [0.25, 0.5, 0.75, 1.0])
+    assert snapshot.index.tolist() == ["A", "B", "C", "D"]
+    np.testing.assert_allclose(snapshot["close_rank"], [1.0, np.nan, 0.5, 0.5])
+    half = np.sqrt(0.5)
+    np.testing.assert_allclose(
+        snapshot["close_zscore"], [2 * half, np.nan, -half, -half]
+    )
+    assert features.snapshot("2024-01-01 12:00")["close"].tolist() == [1, 2, 3, 4]
+    with pytest.raises(ValueError):
+        panel.add_cross_sectional(["close"], ["median"])
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from market_data.indicators import IndicatorCalculator, IndicatorPlan
+from market_data.parallel import ParallelIndicatorEngine
+
+
+@pytest.fixture(scope="module")
+def engine():
+    with ParallelIndicatorEngine(workers=2) as engine:
+        yield engine
+
+
+@pytest.fixture
+def frames():
+    rng = np.random.default_rng(42)
+    frames = {}
+    for i in range(6):
+        size = 120 + 15 * i
+        close = rng.random(size) + 100
+        frames[f"T{i}"] = pd.DataFrame(
+            {
+                "Open": close + rng.random(size) - 0.5,
+                "High": close + 1,
+                "Low": close - 1,
+                "Close": close,
+                "Volume": rng.integers(100, 1000, size),
+            }
+        )
+    return frames
+
+
+def test_matches_serial_calculation(engine, frames):
+    indicators = ["SMA_10", "RSI_14", "MACD", "CDLDOJI"]
+    results = engine.add_indicators(frames, indicators)
+
+    calculator = IndicatorCalculator()
+    for ticker, frame in frames.items():
+        expected = calculator.add_indicators(frame.copy(), indicators)
+        pd.testing.assert_frame_equal(results[ticker], expected)
+
+    # Candlestick outputs keep TA-Lib's integer dtype after the round trip
+    assert results["T0"]["CDLDOJI"].dtype == np.int32
+
+
+def test_no_valid_indicators(engine, frames):
+    assert engine.add_indicators(frames, ["NOPE"]) is frames
+
+
+def test_failed_indicator_is_left_out(frames, monkeypatch):
+    compute = IndicatorPlan.compute
+
+    def compute_without_sma(self, inputs, *args, **kwargs):
+        results = compute(self, inputs, *args, **kwargs)
+        results.pop("SMA_10", None)  # as if TA-Lib had raised
+        return results
+
+    monkeypatch.setattr(IndicatorPlan, "compute", compute_without_sma)
+    # Workers are forked after the patch, so it applies in them too
+    with ParallelIndicatorEngine(workers=2) as engine:
+        results = engine.add_indicators(frames, ["SMA_10", "RSI_14"])
+
+    calculator = IndicatorCalculator()
+    for ticker, frame in frames.items():
+        expected = calculator.add_indicators(frame.copy(), ["SMA_10", "RSI_14"])
+        assert "SMA_10" not in expected.columns
+        pd.testing.assert_frame_equal(results[ticker], expected)
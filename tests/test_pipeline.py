@@ -1,11 +1,35 @@
+import asyncio
 import shutil
 import unittest
 from pathlib import Path
 from unittest.mock import patch
 
+import numpy as np
 import pandas as pd
 
+from market_data.buffers import BarBuffer
 from market_data.pipeline import StockDataPipeline
+from market_data.store import BarStore
+
+RECURSIVE_INDICATORS = ["EMA_20", "RSI_14", "MACD(12,26,9)", "OBV", "SMA_10"]
+
+
+def _random_walk_bars(periods, seed=0):
+    """Daily bars of a random walk, for indicators whose state never resets."""
+    rng = np.random.default_rng(seed)
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.01, periods)))
+    dates = pd.date_range(start="2020-01-01", periods=periods, freq="D")
+    return [
+        {
+            "t": d.strftime("%Y-%m-%dT05:00:00Z"),
+            "o": close[i] * 0.999,
+            "h": close[i] * 1.01,
+            "l": close[i] * 0.99,
+            "c": close[i],
+            "v": float(rng.integers(100, 1000)),
+        }
+        for i, d in enumerate(dates)
+    ]
 
 
 class TestStockDataPipeline(unittest.TestCase):
@@ -18,17 +42,34 @@ class TestStockDataPipeline(unittest.TestCase):
             shutil.rmtree(self.output_dir)
 
     def test_calculate_lookback(self):
-        # SMA_50 -> 50 * 2 = 100
-        self.assertEqual(self.pipeline._calculate_lookback_bars(["SMA_50"]), 100)
-        # Multiple, take max (RSI_14, SMA_50) -> 100
+        # SMA_50 needs 49 prior bars for its first value (TA-Lib lookback)
+        self.assertEqual(self.pipeline._calculate_lookback_bars(["SMA_50"]), 49)
+        # Multiple, take max (RSI_14 -> 14, SMA_50 -> 49)
+        self.assertEqual(
+            self.pipeline._calculate_lookback_bars(["RSI_14", "SMA_50"]), 49
+        )
+        # No period -> TA-Lib default (SMA timeperiod=30)
+        self.assertEqual(self.pipeline._calculate_lookback_bars(["SMA"]), 29)
+        # Multi-parameter spec: slow EMA (25) + signal EMA (8)
         self.assertEqual(
-            self.pipeline._calculate_lookback_bars(["RSI_14", "SMA_50"]), 100
+            self.pipeline._calculate_lookback_bars(["MACD(fast=12,slow=26,signal=9)"]),
+            33,
         )
-        # No implicit -> default logic (e.g. 60)
-        self.assertEqual(self.pipeline._calculate_lookback_bars(["SMA"]), 60)
         # Empty -> 0
         self.assertEqual(self.pipeline._calculate_lookback_bars([]), 0)
 
+    def test_intraday_warmup_start(self):
+        # SMA_3 needs 2 prior 5Min bars: the last two slots before the
+        # July 3rd early close (July 4th is a holiday)
+        self.assertEqual(
+            self.pipeline._warmup_start_date("2024-07-05T13:30:00Z", "5Min", ["SMA_3"]),
+            "2024-07-03T16:50:00Z",
+        )
+        self.assertEqual(
+            self.pipeline._warmup_start_date("2024-07-08", "1Day", ["SMA_3"]),
+            "2024-07-03",
+        )
+
     @patch("market_data.client.AlpacaClient")
     def test_process_ticker_warmup_logic(self, MockClient):
         # Mock the client instance
@@ -53,7 +94,9 @@ class TestStockDataPipeline(unittest.TestCase):
                 }
             )
 
-        mock_client_instance.get_stock_bars.return_value = mock_bars
+        mock_client_instance.get_stock_bars_columnar.return_value = {
+            "TEST": BarBuffer.from_bars(mock_bars)
+        }
 
         # We request from 2023-02-20 (Day 50)
         target_start = "2023-02-20"
@@ -66,9 +109,10 @@ class TestStockDataPipeline(unittest.TestCase):
             indicators=["SMA_10"],
         )
 
-        # Verify call to get_stock_bars used an earlier date than target_start
+        # Verify call to get_stock_bars_columnar used an earlier date than
+        # target_start
         # call_args[1] is kwargs
-        call_kwargs = mock_client_instance.get_stock_bars.call_args[1]
+        call_kwargs = mock_client_instance.get_stock_bars_columnar.call_args[1]
         called_start = call_kwargs["start"]
 
         # Check that called_start < target_start (string comparison works for ISO)
@@ -94,3 +138,390 @@ class TestStockDataPipeline(unittest.TestCase):
             pd.notna(sma_val),
             f"SMA_10 should not be NaN at start date {first_date} if warm-up worked",
         )
+
+    @patch("market_data.client.AlpacaClient")
+    def test_process_tickers_batched(self, MockClient):
+        mock_client_instance = MockClient.return_value
+        self.pipeline.client = mock_client_instance
+
+        dates = pd.date_range(start="2023-01-01", periods=30, freq="D")
+
+        def make_bars(price):
+            return [
+                {
+                    "t": d.isoformat(),
+                    "o": price,
+                    "h": price,
+                    "l": price,
+                    "c": price,
+                    "v": 1000,
+                }
+                for d in dates
+            ]
+
+        # One request chain per batch; the second batch returns no data for ZZZ
+        mock_client_instance.get_stock_bars_columnar.side_effect = [
+            {
+                "AAA": BarBuffer.from_bars(make_bars(10.0)),
+                "BBB": BarBuffer.from_bars(make_bars(20.0)),
+            },
+            {},
+        ]
+
+        results = list(
+            self.pipeline.process_tickers(
+                tickers=["AAA", "BBB", "ZZZ"],
+                timeframe="1Day",
+                start_date="2023-01-15",
+                indicators=["SMA_5"],
+                batch_size=2,
+            )
+        )
+
+        self.assertEqual(mock_client_instance.get_stock_bars_columnar.call_count, 2)
+        first_call = mock_client_instance.get_stock_bars_columnar.call_args_list[0]
+        self.assertEqual(first_call[1]["tickers"], ["AAA", "BBB"])
+
+        self.assertEqual([r[0] for r in results], ["AAA", "BBB", "ZZZ"])
+        self.assertTrue(all(error is None for _, _, error in results))
+        self.assertIsNone(results[2][1])
+
+        df = pd.read_csv(results[1][1])
+        self.assertTrue((df["close"] == 20.0).all())
+        self.assertTrue(df["SMA_5"].notna().all())
+
+    def test_aprocess_tickers(self):
+        dates = pd.date_range(start="2023-01-01", periods=30, freq="D")
+        bars = [
+            {"t": d.isoformat(), "o": 1.0, "h": 1.0, "l": 1.0, "c": 1.0, "v": 10}
+            for d in dates
+        ]
+
+        async def fake_fetch(tickers, *args):
+            if tickers == ["BAD"]:
+                raise RuntimeError("boom")
+            return {t: BarBuffer.from_bars(bars) for t in tickers}
+
+        async def run():
+            return [
+                result
+                async for result in self.pipeline.aprocess_tickers(
+                    tickers=["AAA", "BAD", "CCC"],
+                    timeframe="1Day",
+                    start_date="2023-01-15",
+                    indicators=["SMA_5"],
+                    max_concurrency=2,
+                )
+            ]
+
+        with patch(
+            "market_data.pipeline.AsyncAlpacaClient.get_stock_bars_columnar",
+            side_effect=fake_fetch,
+        ):
+            results = {
+                ticker: (path, error) for ticker, path, error in asyncio.run(run())
+            }
+
+        self.assertEqual(set(results), {"AAA", "BAD", "CCC"})
+        self.assertIsInstance(results["BAD"][1], RuntimeError)
+        self.assertTrue(results["AAA"][0].exists())
+        self.assertIsNone(results["CCC"][1])
+
+    @patch("market_data.client.AlpacaClient")
+    def test_streaming_matches_batch(self, MockClient):
+        mock_client_instance = MockClient.return_value
+        self.pipeline.client = mock_client_instance
+
+        dates = pd.date_range(start="2023-01-01", periods=60, freq="D")
+        bars = [
+            {
+                "t": d.strftime("%Y-%m-%dT05:00:00Z"),
+                "o": float(i),
+                "h": i + 1.0,
+                "l": i - 1.0,
+                "c": i + 0.5,
+                "v": 100 + i,
+            }
+            for i, d in enumerate(dates)
+        ]
+        # Pages of 7 bars, smaller than the SMA window plus warm-up
+        mock_client_instance.iter_stock_bars_columnar.return_value = (
+            ("TEST", BarBuffer.from_bars(bars[i : i + 7]))
+            for i in range(0, len(bars), 7)
+        )
+        mock_client_instance.get_stock_bars_columnar.return_value = {
+            "TEST": BarBuffer.from_bars(bars)
+        }
+
+        kwargs = dict(
+            ticker="TEST",
+            timeframe="1Day",
+            start_date="2023-01-20",
+            indicators=["SMA_10", "MAX_5"],
+        )
+        streamed = pd.read_csv(self.pipeline.process_ticker_streaming(**kwargs))
+        batch = pd.read_csv(self.pipeline.process_ticker(**kwargs))
+
+        pd.testing.assert_frame_equal(streamed, batch)
+        self.assertEqual(streamed["date"].iloc[0], "2023-01-20T05:00:00Z")
+
+    @patch("market_data.client.AlpacaClient")
+    def test_streaming_recursive_matches_batch(self, MockClient):
+        mock_client_instance = MockClient.return_value
+        self.pipeline.client = mock_client_instance
+
+        bars = _random_walk_bars(2000)
+        # Pages much shorter than the indicators' convergence
+        mock_client_instance.iter_stock_bars_columnar.return_value = (
+            ("TEST", BarBuffer.from_bars(bars[i : i + 150]))
+            for i in range(0, len(bars), 150)
+        )
+        mock_client_instance.get_stock_bars_columnar.return_value = {
+            "TEST": BarBuffer.from_bars(bars)
+        }
+
+        kwargs = dict(
+            ticker="TEST",
+            timeframe="1Day",
+            start_date="2020-03-01",
+            indicators=RECURSIVE_INDICATORS,
+        )
+        streamed = pd.read_csv(self.pipeline.process_ticker_streaming(**kwargs))
+        batch = pd.read_csv(self.pipeline.process_ticker(**kwargs))
+
+        pd.testing.assert_frame_equal(streamed, batch, check_exact=False, rtol=1e-9)
+
+    @patch("market_data.client.AlpacaClient")
+    def test_append_matches_full_rewrite(self, MockClient):
+        mock_client_instance = MockClient.return_value
+        self.pipeline.client = mock_client_instance
+
+        dates = pd.date_range(start="2023-01-01", periods=40, freq="D")
+        bars = [
+            {
+                "t": d.strftime("%Y-%m-%dT05:00:00Z"),
+                "o": float(i),
+                "h": i + 1.0,
+                "l": i - 1.0,
+                "c": i + (i % 3),
+                "v": 100 + i,
+            }
+            for i, d in enumerate(dates)
+        ]
+        kwargs = dict(
+            ticker="TEST",
+            timeframe="1Day",
+            start_date="2023-01-10",
+            indicators=["SMA_10", "MAX_5"],
+        )
+
+        mock_client_instance.get_stock_bars_columnar.return_value = {
+            "TEST": BarBuffer.from_bars(bars[:30])
+        }
+        path = self.pipeline.process_ticker(append=True, **kwargs)
+
+        # The refresh returns everything from the last stored bar onwards
+        mock_client_instance.get_stock_bars_columnar.return_value = {
+            "TEST": BarBuffer.from_bars(bars[29:])
+        }
+        self.assertEqual(self.pipeline.process_ticker(append=True, **kwargs), path)
+        call_kwargs = mock_client_instance.get_stock_bars_columnar.call_args[1]
+        self.assertEqual(call_kwargs["start"], "2023-01-30T05:00:00Z")
+        appended = pd.read_csv(path)
+
+        mock_client_instance.get_stock_bars_columnar.return_value = {
+            "TEST": BarBuffer.from_bars(bars)
+        }
+        full = pd.read_csv(self.pipeline.process_ticker(**kwargs))
+
+        self.assertEqual(len(appended), 31)
+        pd.testing.assert_frame_equal(appended, full)
+
+    @patch("market_data.client.AlpacaClient")
+    def test_append_recursive_matches_full_rewrite(self, MockClient):
+        mock_client_instance = MockClient.return_value
+        self.pipeline.client = mock_client_instance
+
+        bars = _random_walk_bars(1500)
+        kwargs = dict(
+            ticker="TEST",
+            timeframe="1Day",
+            start_date="2020-01-20",
+            indicators=RECURSIVE_INDICATORS,
+        )
+        mock_client_instance.get_stock_bars_columnar.return_value = {
+            "TEST": BarBuffer.from_bars(bars)
+        }
+        path = self.pipeline.process_ticker(**kwargs)
+        full = pd.read_csv(path)
+        path.unlink()
+
+        mock_client_instance.get_stock_bars_columnar.return_value = {
+            "TEST": BarBuffer.from_bars(bars[:1200])
+        }
+        self.assertEqual(self.pipeline.process_ticker(append=True, **kwargs), path)
+        mock_client_instance.get_stock_bars_columnar.return_value = {
+            "TEST": BarBuffer.from_bars(bars[1199:])
+        }
+        self.pipeline.process_ticker(append=True, **kwargs)
+        call_kwargs = mock_client_instance.get_stock_bars_columnar.call_args[1]
+        self.assertEqual(call_kwargs["start"], bars[1199]["t"])
+
+        pd.testing.assert_frame_equal(
+            pd.read_csv(path), full, check_exact=False, rtol=1e-9
+        )
+
+    @patch("market_data.client.AlpacaClient")
+    def test_append_to_short_file_rewrites_it(self, MockClient):
+        mock_client_instance = MockClient.return_value
+        self.pipeline.client = mock_client_instance
+
+        bars = _random_walk_bars(300)
+        kwargs = dict(
+            ticker="TEST",
+            timeframe="1Day",
+            start_date="2020-01-20",
+            indicators=RECURSIVE_INDICATORS,
+        )
+        mock_client_instance.get_stock_bars_columnar.return_value = {
+            "TEST": BarBuffer.from_bars(bars[:200])
+        }
+        path = self.pipeline.process_ticker(append=True, **kwargs)
+
+        # Fewer rows than the EMA needs to converge: refetched from the start
+        mock_client_instance.get_stock_bars_columnar.return_value = {
+            "TEST": BarBuffer.from_bars(bars)
+        }
+        self.pipeline.process_ticker(append=True, **kwargs)
+        appended = pd.read_csv(path)
+        full = pd.read_csv(self.pipeline.process_ticker(**kwargs))
+
+        self.assertEqual(len(appended), 281)
+        pd.testing.assert_frame_equal(appended, full)
+
+    @patch("market_data.client.AlpacaClient")
+    def test_append_to_short_file_without_bars_keeps_it(self, MockClient):
+        mock_client_instance = MockClient.return_value
+        self.pipeline.client = mock_client_instance
+
+        bars = _random_walk_bars(300)
+        kwargs = dict(
+            ticker="TEST",
+            timeframe="1Day",
+            start_date="2020-01-20",
+            indicators=RECURSIVE_INDICATORS,
+        )
+        mock_client_instance.get_stock_bars_columnar.return_value = {
+            "TEST": BarBuffer.from_bars(bars[:200])
+        }
+        path = self.pipeline.process_ticker(append=True, **kwargs)
+        before = path.read_bytes()
+
+        # The refetch from the file's first row comes back empty
+        mock_client_instance.get_stock_bars_columnar.return_value = {}
+        self.assertEqual(self.pipeline.process_ticker(append=True, **kwargs), path)
+        self.assertEqual(path.read_bytes(), before)
+
+    @patch("market_data.client.AlpacaClient")
+    def test_timeframes_from_one_download(self, MockClient):
+        mock_client_instance = MockClient.return_value
+        self.pipeline.client = mock_client_instance
+
+        # Two regular sessions of minute bars
+        minutes = pd.date_range("2024-07-01 13:30", periods=390, freq="min").append(
+            pd.date_range("2024-07-02 13:30", periods=390, freq="min")
+        )
+        bars = [
+            {
+                "t": ts.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "o": 1.0,
+                "h": 2.0,
+                "l": 0.5,
+                "c": 1.5,
+                "v": 10,
+                "n": 1,
+                "vw": 1.25,
+            }
+            for ts in minutes
+        ]
+        mock_client_instance.get_stock_bars_columnar.return_value = {
+            "TEST": BarBuffer.from_bars(bars)
+        }
+
+        paths = self.pipeline.process_ticker_timeframes(
+            "TEST", ["15Min", "1Hour", "1Day"], start_date="2024-07-01"
+        )
+
+        mock_client_instance.get_stock_bars_columnar.assert_called_once()
+        call_kwargs = mock_client_instance.get_stock_bars_columnar.call_args[1]
+        self.assertEqual(call_kwargs["timeframe"], "1Min")
+        self.assertEqual(len(pd.read_csv(paths["15Min"])), 52)
+        self.assertEqual(len(pd.read_csv(paths["1Hour"])), 14)
+        daily = pd.read_csv(paths["1Day"])
+        self.assertEqual(
+            daily["date"].tolist(), ["2024-07-01T04:00:00Z", "2024-07-02T04:00:00Z"]
+        )
+        self.assertEqual(daily["volume"].tolist(), [3900, 3900])
+
+    @patch("market_data.client.AlpacaClient")
+    def test_store_matches_export(self, MockClient):
+        mock_client_instance = MockClient.return_value
+        self.pipeline.client = mock_client_instance
+        self.pipeline.store = BarStore(str(self.output_dir / "store"))
+
+        dates = pd.date_range(start="2023-01-01", periods=40, freq="D")
+        bars = [
+            {
+                "t": d.strftime("%Y-%m-%dT05:00:00Z"),
+                "o": float(i),
+                "h": i + 1.0,
+                "l": i - 1.0,
+                "c": i + (i % 3),
+                "v": 100 + i,
+            }
+            for i, d in enumerate(dates)
+        ]
+        mock_client_instance.get_stock_bars_columnar.return_value = {
+            "TEST": BarBuffer.from_bars(bars)
+        }
+
+        path = self.pipeline.process_ticker(
+            "TEST", "1Day", "2023-01-10", indicators=["SMA_5"]
+        )
+        exported = pd.read_csv(path)
+        stored = self.pipeline.store.read("TEST", "1Day")
+
+        self.assertEqual(list(stored.columns), list(exported.columns))
+        pd.testing.assert_frame_equal(
+            stored.drop(columns="date"), exported.drop(columns="date")
+        )
+        self.assertEqual(stored["date"].iloc[0], pd.Timestamp("2023-01-10 05:00Z"))
+
+    @patch("market_data.client.AlpacaClient")
+    def test_append_rejected_by_store_leaves_file_unchanged(self, MockClient):
+        mock_client_instance = MockClient.return_value
+        self.pipeline.client = mock_client_instance
+        self.pipeline.store = BarStore(str(self.output_dir / "store"))
+
+        bars = _random_walk_bars(40)
+        kwargs = dict(
+            ticker="TEST",
+            timeframe="1Day",
+            start_date="2020-01-10",
+            indicators=["SMA_5"],
+        )
+        mock_client_instance.get_stock_bars_columnar.return_value = {
+            "TEST": BarBuffer.from_bars(bars[:30])
+        }
+        path = self.pipeline.process_ticker(append=True, **kwargs)
+        before = path.read_bytes()
+        # The stored series no longer has the file's columns
+        stored = self.pipeline.store.read("TEST", "1Day")
+        self.pipeline.store.write("TEST", "1Day", stored[["date", "close"]])
+
+        mock_client_instance.get_stock_bars_columnar.return_value = {
+            "TEST": BarBuffer.from_bars(bars[29:])
+        }
+        with self.assertRaises(ValueError):
+            self.pipeline.process_ticker(append=True, **kwargs)
+        self.assertEqual(path.read_bytes(), before)
@@ -0,0 +1,65 @@
+from market_data import ratelimit
+from market_data.ratelimit import SharedTokenBucket, TokenBucket
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def test_paces_after_burst():
+    clock = FakeClock()
+    bucket = TokenBucket(rate_per_minute=60, burst=2, clock=clock, sleep=clock.sleep)
+
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0
+    # Burst exhausted: one token per second at 60/min
+    assert bucket.acquire() == 1.0
+    assert clock.slept == [1.0]
+
+
+def test_pause_and_rate_limit_headers():
+    clock = FakeClock()
+    bucket = TokenBucket(rate_per_minute=60, clock=clock, sleep=clock.sleep)
+
+    bucket.pause_for(5)
+    assert bucket.acquire() >= 5
+
+    # Server says the quota is spent until reset -> everyone waits for it
+    bucket.observe(
+        {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(clock.now + 30)}
+    )
+    assert bucket.acquire() >= 30
+
+
+def test_shared_bucket_across_instances(tmp_path):
+    clock = FakeClock()
+    path = str(tmp_path / "bucket.json")
+    kwargs = dict(rate_per_minute=60, burst=2, clock=clock, sleep=clock.sleep)
+    first = SharedTokenBucket(path, **kwargs)
+    second = SharedTokenBucket(path, **kwargs)
+
+    assert first.acquire() == 0
+    assert second.acquire() == 0
+    # The two instances (as two processes would) drained the same bucket
+    assert first.acquire() == 1.0
+
+
+def test_retry_after_seconds():
+    assert ratelimit.retry_after_seconds({"Retry-After": "7"}) == 7.0
+    assert ratelimit.retry_after_seconds({"X-RateLimit-Reset": "110"}, now=100) == 10.0
+    assert (
+        ratelimit.retry_after_seconds(
+            {"Retry-After": "Wed, 21 Oct 2015 07:28:10 GMT"}, now=0
+        )
+        > 0
+    )
+    assert ratelimit.retry_after_seconds({}) is None
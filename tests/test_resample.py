@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from market_data.market_calendar import TradingCalendar
+from market_data.resample import resample_bars
+
+
+def minute_bars(start, end):
+    dates = pd.date_range(start, end, freq="min", tz="UTC", inclusive="left")
+    n = len(dates)
+    return pd.DataFrame(
+        {
+            "date": dates,
+            "open": np.arange(n, dtype=float),
+            "high": np.arange(n) + 1.0,
+            "low": np.arange(n) - 1.0,
+            "close": np.arange(n) + 0.5,
+            "volume": np.arange(1, n + 1, dtype=np.int64),
+            "trade_count": np.ones(n, dtype=np.int64),
+            "vwap": np.arange(n) + 0.25,
+        }
+    )
+
+
+def test_intraday_aggregation():
+    df = minute_bars("2024-07-02 13:30", "2024-07-02 13:40")
+    result = resample_bars(df, "5Min")
+
+    assert result["date"].tolist() == [
+        pd.Timestamp("2024-07-02 13:30", tz="UTC"),
+        pd.Timestamp("2024-07-02 13:35", tz="UTC"),
+    ]
+    first = result.iloc[0]
+    assert (first["open"], first["high"], first["low"], first["close"]) == (
+        0.0,
+        5.0,
+        -1.0,
+        4.5,
+    )
+    assert first["volume"] == 15
+    assert first["trade_count"] == 5
+    # Volume-weighted: sum(vwap * volume) / sum(volume)
+    vwap = df["vwap"].iloc[:5]
+    volume = df["volume"].iloc[:5]
+    assert first["vwap"] == pytest.approx((vwap * volume).sum() / volume.sum())
+
+
+def test_buckets_stop_at_trading_day_boundaries():
+    # New York's midnight is 04:00 UTC in July, inside the 00:00-06:00 UTC
+    # bucket: the bars after it start a new bar stamped at midnight ET
+    df = minute_bars("2024-07-02 02:00", "2024-07-02 08:00")
+    result = resample_bars(df, "6Hour")
+
+    assert result["date"].tolist() == [
+        pd.Timestamp("2024-07-02 00:00", tz="UTC"),
+        pd.Timestamp("2024-07-02 04:00", tz="UTC"),
+        pd.Timestamp("2024-07-02 06:00", tz="UTC"),
+    ]
+    assert result["trade_count"].tolist() == [120, 120, 120]
+    assert result["volume"].sum() == df["volume"].sum()
+
+
+def test_daily_bars_use_the_regular_session():
+    # July 3rd 2024 closes at 1 p.m., the 4th is a holiday
+    df = minute_bars("2024-07-03 08:00", "2024-07-06 00:00")
+    result = resample_bars(df, "1Day", TradingCalendar())
+
+    assert result["date"].tolist() == [
+        pd.Timestamp("2024-07-03 04:00", tz="UTC"),
+        pd.Timestamp("2024-07-05 04:00", tz="UTC"),
+    ]
+    assert result["trade_count"].tolist() == [210, 390]
+
+
+def test_weekly_and_monthly_stamps():
+    df = minute_bars("2024-07-03 13:30", "2024-07-03 13:31")
+
+    weekly = resample_bars(df, "1Week")
+    monthly = resample_bars(df, "3Month")
+
+    assert weekly["date"].iloc[0] == pd.Timestamp("2024-07-01 04:00", tz="UTC")
+    assert monthly["date"].iloc[0] == pd.Timestamp("2024-07-01 04:00", tz="UTC")
@@ -0,0 +1,69 @@
+import os
+
+import pytest
+
+from benchmarks.replay import ReplayServer
+from market_data.buffers import BarBuffer
+from market_data.client import AlpacaClient
+from market_data.pipeline import StockDataPipeline
+from market_data.ratelimit import TokenBucket
+from market_data.sharding import shard_ranges, stitch_shards
+
+os.environ["APCA_API_KEY_ID"] = "TEST_KEY"
+os.environ["APCA_API_SECRET_KEY"] = "TEST_SECRET"
+
+
+def bars(*stamps):
+    return BarBuffer.from_bars([{"t": t, "c": float(i)} for i, t in enumerate(stamps)])
+
+
+def test_shard_ranges_split_at_month_starts():
+    ranges = shard_ranges("2024-01-15", "2024-03-10T12:00:00Z", "month")
+
+    assert ranges == [
+        ("2024-01-15T00:00:00Z", "2024-02-01T00:00:00Z"),
+        ("2024-02-01T00:00:00Z", "2024-03-01T00:00:00Z"),
+        ("2024-03-01T00:00:00Z", "2024-03-10T12:00:00Z"),
+    ]
+    assert shard_ranges("2024-01-15", "2024-01-20", "month") == [
+        ("2024-01-15T00:00:00Z", "2024-01-20T00:00:00Z")
+    ]
+
+
+def test_stitch_drops_boundary_duplicates():
+    first = bars("2024-01-31T20:00:00Z", "2024-02-01T00:00:00Z")
+    second = bars("2024-02-01T00:00:00Z", "2024-02-01T14:30:00Z")
+
+    stitched = stitch_shards([first, None, second])
+
+    assert stitched.column("t").tolist() == [
+        "2024-01-31T20:00:00Z",
+        "2024-02-01T00:00:00Z",
+        "2024-02-01T14:30:00Z",
+    ]
+    assert stitched.column("c").tolist() == [0.0, 1.0, 1.0]
+    assert stitch_shards([None, BarBuffer()]) is None
+
+
+def test_pipeline_fetches_shards_concurrently(tmp_path):
+    # The replay server ignores start/end, so every shard returns the same
+    # bars and stitching must collapse them to one copy
+    server = ReplayServer(["AAPL"], bars_per_symbol=30, page_size=10)
+    client = AlpacaClient(rate_limiter=TokenBucket(rate_per_minute=1e6))
+    client.BASE_URL = server.start()
+    pipeline = StockDataPipeline(
+        output_dir=str(tmp_path), client=client, shard_period="month"
+    )
+    try:
+        path = pipeline.process_ticker(
+            "AAPL", "1Min", start_date="2024-01-02", end_date="2024-03-15"
+        )
+    finally:
+        server.close()
+        pipeline.close()
+
+    # Three shards of three pages each
+    assert server.requests == 9
+    assert len(pipeline.exporter.read_tail(path, 100)) == 30
+    with pytest.raises(ValueError):
+        pipeline.process_ticker_streaming("AAPL", "1Min", start_date="2024-01-02")
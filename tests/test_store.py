@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from market_data.store import BarStore
+
+
+def make_frame(rows, start="2024-01-02 14:30"):
+    return pd.DataFrame(
+        {
+            "date": pd.date_range(start, periods=rows, freq="min", tz="UTC"),
+            "close": np.arange(rows, dtype=np.float64),
+            "volume": np.arange(rows, dtype=np.int64) * 10,
+        }
+    )
+
+
+def test_read_time_slice_from_mapped_columns(tmp_path):
+    store = BarStore(str(tmp_path), index_stride=7)
+    df = make_frame(100)
+    store.write("AAPL", "1Min", df)
+
+    sliced = store.read("AAPL", "1Min", "2024-01-02T14:50:00Z", "2024-01-02T15:00:00Z")
+
+    expected = df.iloc[20:31].reset_index(drop=True)
+    pd.testing.assert_frame_equal(sliced, expected)
+    views = store.slice("AAPL", "1Min", "2024-01-02T14:50:00Z", columns=["close"])
+    assert list(views) == ["date", "close"]
+    assert isinstance(views["close"], np.memmap)
+    assert len(store.read("AAPL", "1Min", end="2024-01-01")) == 0
+    assert store.symbols("1Min") == ["AAPL"]
+    with pytest.raises(KeyError):
+        store.read("MSFT", "1Min")
+
+
+def test_append_only_adds_later_rows(tmp_path):
+    store = BarStore(str(tmp_path), index_stride=4)
+    df = make_frame(30)
+    store.write("AAPL", "1Min", df.iloc[:20])
+    # Bytes of an append that crashed before committing are discarded
+    with open(next(tmp_path.glob("1Min/AAPL/close.*.bin")), "ab") as f:
+        f.write(b"\xff" * 24)
+
+    assert store.append("AAPL", "1Min", df.iloc[15:]) == 10
+    assert store.append("AAPL", "1Min", df.iloc[25:]) == 0
+    pd.testing.assert_frame_equal(store.read("AAPL", "1Min"), df)
+    with pytest.raises(ValueError):
+        store.append("AAPL", "1Min", df[["date", "close"]])
+
+
+def test_write_replaces_the_series(tmp_path):
+    store = BarStore(str(tmp_path))
+    store.write("AAPL", "1Min", make_frame(10))
+    store.write("AAPL", "1Min", make_frame(5, start="2024-02-01")[["date", "close"]])
+
+    files = sorted(p.name for p in (tmp_path / "1Min" / "AAPL").iterdir())
+    assert files == ["close.1.bin", "date.1.bin", "meta.json"]
+    assert store.read("AAPL", "1Min")["close"].tolist() == [0, 1, 2, 3, 4]